@@ -0,0 +1,247 @@
+"""
+IELTS Score Analyzer - Compact Analysis Results
+Memory-light result objects; the full analysis dict is only built when serialized
+"""
+
+import time
+from array import array
+from datetime import datetime
+
+from ielts_engine import (
+    analyze_scores_rule_based, analyze_profile, personalize_analysis, profile_code, NO_PROFILE
+)
+from json_serializer import dumps as json_dumps, encode_profile, encode_personalized
+from compact_format import StringDictionary, compact_row, encode_compact_profile, encode_compact_personalized
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+
+class AnalysisResult:
+    """
+    One analyzed student, stored as its inputs only.
+    The rule-based analysis is deterministic, so to_dict() rebuilds the
+    same dict analyze_scores_rule_based returned at analysis time.
+    """
+
+    __slots__ = ('student_name', 'listening', 'speaking', 'reading', 'writing', 'analyzed_at')
+
+    def __init__(self, scores: dict, student_name: str, analyzed_at: float = None):
+        self.student_name = student_name
+        self.listening = scores['listening']
+        self.speaking = scores['speaking']
+        self.reading = scores['reading']
+        self.writing = scores['writing']
+        self.analyzed_at = time.time() if analyzed_at is None else analyzed_at
+
+    @property
+    def scores(self) -> dict:
+        return {
+            'listening': self.listening,
+            'speaking': self.speaking,
+            'reading': self.reading,
+            'writing': self.writing
+        }
+
+    def to_dict(self) -> dict:
+        return analyze_scores_rule_based(
+            self.scores, self.student_name, datetime.fromtimestamp(self.analyzed_at)
+        )
+
+
+class ProfileCache:
+    """
+    analyze_profile() results and their encoded parts, shared by the batches
+    of one run. Holds at most `limit` profiles (a few KB each); profiles seen
+    after that are analyzed per batch and freed with it.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._profiles = {}             # profile code -> analyze_profile() result
+        self._parts = {}                # profile code -> encode_profile() parts
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def profile(self, code: int, scores: dict) -> dict:
+        profile = self._profiles.get(code)
+        if profile is None:
+            profile = analyze_profile(scores)
+            if len(self._profiles) < self.limit:
+                self._profiles[code] = profile
+        return profile
+
+    def encoded(self, code: int, profile: dict) -> tuple:
+        parts = self._parts.get(code)
+        if parts is None:
+            parts = encode_profile(profile)
+            if code in self._profiles:
+                self._parts[code] = parts
+        return parts
+
+
+class ResultBatch:
+    """
+    Struct-of-arrays container for a batch of analyses.
+    Per student it keeps the name, four float scores, a profile code and a
+    timestamp (about 100 bytes); indexing or iterating yields full analysis
+    dicts. Rows that failed to parse are kept as-is, in their original position.
+
+    Students with the same half-band scores share one profile code, and the
+    name-independent analysis is computed once per code. Rows reused from an
+    earlier run (append_reused) are stored the same way, with their original
+    timestamp, and are only marked as not analyzed in this run.
+
+    Batches built one after another (the chunks of a roster) can take their
+    profiles from one ProfileCache, so each is still analyzed once per run.
+    """
+
+    def __init__(self, cache: 'ProfileCache' = None):
+        self.names = []
+        self.scores = array('d')        # 4 values per row, in SKILLS order
+        self.codes = array('l')         # profile code per row, NO_PROFILE if none
+        self.analyzed_at = array('d')
+        self.errors = {}                # row index -> error dict
+        self.profiles = {}              # profile code -> analyze_profile() result
+        self.profiled_rows = 0
+        self.reused_rows = set()        # row indexes taken over from an earlier run
+        self._fresh_profiles = set()    # profile codes of rows analyzed in this run
+        self._parts = {}                # profile code -> encode_profile() parts
+        self._cache = cache
+
+    def append(self, scores: dict, student_name: str, analyzed_at: float = None):
+        self._append(scores, student_name, time.time() if analyzed_at is None else analyzed_at)
+
+    def append_reused(self, scores: dict, student_name: str, analyzed_at: float):
+        """Add a row whose stored result is still valid, keeping its original timestamp"""
+        self.reused_rows.add(len(self.names))
+        self._append(scores, student_name, analyzed_at, fresh=False)
+
+    def _append(self, scores: dict, student_name: str, analyzed_at: float, fresh: bool = True):
+        self.names.append(student_name)
+        self.scores.extend(scores[skill] for skill in SKILLS)
+        self.analyzed_at.append(analyzed_at)
+
+        code = profile_code(scores)
+        self.codes.append(code)
+        if code != NO_PROFILE:
+            if fresh:
+                self.profiled_rows += 1
+                self._fresh_profiles.add(code)
+            if code not in self.profiles:
+                cache = self._cache
+                self.profiles[code] = cache.profile(code, scores) if cache is not None else analyze_profile(scores)
+
+    def _append_placeholder(self):
+        # Keep the columns aligned for rows that are not analyzed here
+        self.names.append(None)
+        self.scores.extend((0.0, 0.0, 0.0, 0.0))
+        self.codes.append(NO_PROFILE)
+        self.analyzed_at.append(0.0)
+
+    def append_error(self, error: dict):
+        self.errors[len(self.names)] = error
+        self._append_placeholder()
+
+    def __len__(self):
+        return len(self.names)
+
+    def row_scores(self, index: int) -> dict:
+        base = index * 4
+        return dict(zip(SKILLS, self.scores[base:base + 4]))
+
+    def __getitem__(self, index: int) -> dict:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if index in self.errors:
+            return self.errors[index]
+        analyzed_at = datetime.fromtimestamp(self.analyzed_at[index])
+        code = self.codes[index]
+        if code != NO_PROFILE:
+            return personalize_analysis(self.profiles[code], self.names[index], analyzed_at)
+        return analyze_scores_rule_based(self.row_scores(index), self.names[index], analyzed_at)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def encoded(self, index: int, iso: str = None) -> bytes:
+        """
+        One serialized row, byte-identical to json_dumps(self[index]). Each
+        profile is encoded once; only the name, summary and timestamp differ per row.
+        """
+        code = self.codes[index]
+        if code == NO_PROFILE:
+            return json_dumps(self[index])
+        parts = self._parts.get(code)
+        if parts is None:
+            profile = self.profiles[code]
+            parts = self._parts[code] = (
+                self._cache.encoded(code, profile) if self._cache is not None else encode_profile(profile)
+            )
+        if iso is None:
+            iso = datetime.fromtimestamp(self.analyzed_at[index]).isoformat()
+        return encode_personalized(parts, self.names[index], iso)
+
+    def _iter_iso(self):
+        """(index, ISO timestamp) of every row; rows of one run share the conversion"""
+        last_timestamp = iso = None
+        for index in range(len(self)):
+            timestamp = self.analyzed_at[index]
+            if timestamp != last_timestamp:
+                last_timestamp, iso = timestamp, datetime.fromtimestamp(timestamp).isoformat()
+            yield index, iso
+
+    def iter_encoded(self):
+        """All rows serialized, in order (see encoded)"""
+        for index, iso in self._iter_iso():
+            yield self.encoded(index, iso)
+
+    def iter_compact(self, dictionary: StringDictionary):
+        """All rows serialized as compact_row() JSON, each profile encoded once"""
+        parts_by_code = {}
+        for index, iso in self._iter_iso():
+            code = self.codes[index]
+            if code == NO_PROFILE:
+                yield json_dumps(compact_row(self[index], dictionary))
+                continue
+            parts = parts_by_code.get(code)
+            if parts is None:
+                parts = parts_by_code[code] = encode_compact_profile(self.profiles[code], dictionary)
+            yield encode_compact_personalized(parts, self.names[index], iso)
+
+    def profile_stats(self) -> dict:
+        """How many analyses the profile sharing saved"""
+        stats = ProfileStats()
+        stats.add(self)
+        return stats.to_json()
+
+    def result(self, index: int) -> AnalysisResult:
+        """Compact object view of one row"""
+        if index in self.errors:
+            raise ValueError(f"Row {index} has no analysis: {self.errors[index]['error']}")
+        return AnalysisResult(self.row_scores(index), self.names[index], self.analyzed_at[index])
+
+
+class ProfileStats:
+    """ResultBatch.profile_stats() over consecutive batches of one run"""
+
+    def __init__(self):
+        self.analyzed_rows = 0
+        self.profiled_rows = 0
+        self.profiles = set()       # profile codes of rows analyzed in this run
+
+    def add(self, results: ResultBatch):
+        self.analyzed_rows += len(results) - len(results.errors) - len(results.reused_rows)
+        self.profiled_rows += results.profiled_rows
+        self.profiles.update(results._fresh_profiles)
+
+    def to_json(self) -> dict:
+        unique = len(self.profiles) + (self.analyzed_rows - self.profiled_rows)
+        return {
+            'analyzed_rows': self.analyzed_rows,
+            'unique_profiles': unique,
+            'dedup_ratio': round(self.analyzed_rows / unique, 2) if unique else 0.0,
+        }
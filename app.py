@@ -3,322 +3,108 @@ IELTS Score Analyzer - AI Document Summarizer
 Backend API using Flask + Optional LLM Integration
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
+import atexit
 import os
 import json
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import chain, islice
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 from io import BytesIO
+from urllib.parse import quote
+
+from report_writer import render_report_parts, stamp_report, report_filename, iter_reports_zip, check_analysis, ReportDataError
+from response_cache import ResponseCache, content_hash
+from http_compression import available_encodings, compress_stream
+from compact_format import COMPACT_FORMAT, StringDictionary, expand_row
+from analysis_results import ResultBatch, ProfileCache, ProfileStats, SKILLS
+from batch_validation import validate_columns, ValidationSummary
+from roster_io import iter_roster_rows, RosterFormatError, MappedRoster
+from cohort_format import CohortFile, CohortFormatError, COHORT_EXTENSION, write_cohort
+from cohort_stats import cohort_stats
+from incremental_store import IncrementalStore, IncrementalRun
+from history_store import HistoryStore, DEFAULT_LIMIT, name_key
+from progress import student_progress, class_progress
+from name_index import build_index, DEFAULT_LIMIT as NAME_SEARCH_LIMIT
+from percentiles import build_ranks, student_key
+from upload_spool import (
+    SpoolingRequest, ResultSpool, MAX_UPLOAD_BYTES, UPLOAD_TMP_DIR, SPOOL_PREFIX, spooled_file,
+    cleanup_stale_uploads
+)
+from json_serializer import dumps as json_dumps
+from llm_analysis import analyze_with_llm
+from catalog import get_catalog, start_watcher
+from ielts_engine import analyze_scores_rule_based
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 CORS(app)
 
-# Optional: LLM Integration (uncomment and configure as needed)
-# from openai import OpenAI
-# from anthropic import Anthropic
-
-# Configuration
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
-ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY', '')
-
-# IELTS Band Descriptions
-BAND_DESCRIPTIONS = {
-    9: "Expert User - Thành thạo hoàn toàn",
-    8: "Very Good User - Rất thành thạo", 
-    7: "Good User - Thành thạo",
-    6: "Competent User - Đủ năng lực",
-    5: "Modest User - Khiêm tốn",
-    4: "Limited User - Hạn chế",
-    3: "Extremely Limited - Rất hạn chế",
-    2: "Intermittent User - Không ổn định",
-    1: "Non User - Không sử dụng được"
-}
-
-# Skill names in Vietnamese
-SKILL_NAMES = {
-    'listening': 'Nghe (Listening)',
-    'speaking': 'Nói (Speaking)',
-    'reading': 'Đọc (Reading)',
-    'writing': 'Viết (Writing)'
-}
-
-# Comprehensive recommendations database
-RECOMMENDATIONS = {
-    'listening': {
-        'low': [
-            "Nghe podcast tiếng Anh hàng ngày (BBC Learning English, IELTS Liz, 6 Minute English)",
-            "Xem phim/series có phụ đề tiếng Anh, sau đó dần bỏ phụ đề",
-            "Luyện nghe với các bài test IELTS Listening thực tế từ Cambridge",
-            "Tập nghe các giọng khác nhau: British, American, Australian",
-            "Sử dụng app như ELSA Speak hoặc Speechling để cải thiện khả năng nghe"
-        ],
-        'medium': [
-            "Tăng độ khó bằng cách nghe TED Talks, documentaries",
-            "Practice note-taking skills khi nghe các bài giảng academic",
-            "Làm quen với tất cả các dạng câu hỏi IELTS Listening",
-            "Nghe và shadowing theo để cải thiện cả speaking lẫn listening"
-        ],
-        'high': [
-            "Duy trì bằng cách nghe tin tức quốc tế hàng ngày (BBC, CNN)",
-            "Thử thách bản thân với academic lectures từ Coursera, edX",
-            "Luyện nghe các chủ đề chuyên ngành phức tạp"
-        ]
-    },
-    'speaking': {
-        'low': [
-            "Thực hành nói mỗi ngày, tự ghi âm và nghe lại để tự đánh giá",
-            "Tìm partner luyện Speaking hoặc sử dụng app như Cambly, iTalki",
-            "Học và luyện các topic thường gặp trong IELTS Speaking Part 1, 2, 3",
-            "Xây dựng vocabulary theo chủ đề với collocations và phrases",
-            "Tập phát âm đúng các âm khó và luyện word stress"
-        ],
-        'medium': [
-            "Tập trả lời câu hỏi Part 2 với cue card trong 2 phút",
-            "Học cách phát triển ý tưởng và đưa ví dụ cụ thể",
-            "Cải thiện pronunciation, intonation và connected speech",
-            "Học cách sử dụng fillers tự nhiên và tránh ngập ngừng"
-        ],
-        'high': [
-            "Thực hành tranh luận và thảo luận các chủ đề phức tạp",
-            "Học idioms, phrasal verbs và advanced vocabulary",
-            "Tập paraphrase câu hỏi và sử dụng ngôn ngữ đa dạng"
-        ]
-    },
-    'reading': {
-        'low': [
-            "Đọc sách báo tiếng Anh hàng ngày (The Guardian, BBC News, The Economist)",
-            "Bắt đầu với các bài đọc ngắn phù hợp level, từ từ tăng độ dài",
-            "Học kỹ năng skimming (đọc lướt) và scanning (tìm thông tin cụ thể)",
-            "Xây dựng vocabulary thông qua đọc và ghi chép từ mới vào flashcard",
-            "Sử dụng app như Kindle với dictionary tích hợp"
-        ],
-        'medium': [
-            "Làm quen với tất cả các dạng bài Reading IELTS (True/False/NG, Matching, etc.)",
-            "Tập đọc nhanh và tìm thông tin hiệu quả trong thời gian giới hạn",
-            "Đọc academic articles và research papers để quen với văn phong học thuật",
-            "Học cách identify main ideas và supporting details"
-        ],
-        'high': [
-            "Đọc các tài liệu chuyên ngành phức tạp (journals, reports)",
-            "Cải thiện tốc độ đọc mà vẫn duy trì comprehension cao",
-            "Đọc và phân tích các bài văn argumentative"
-        ]
-    },
-    'writing': {
-        'low': [
-            "Viết nhật ký bằng tiếng Anh mỗi ngày để tạo thói quen",
-            "Học cấu trúc bài luận IELTS Task 1 (report) và Task 2 (essay)",
-            "Luyện viết câu phức (complex sentences) với linking words",
-            "Nhờ giáo viên hoặc native speaker chữa bài viết và học từ feedback",
-            "Học các mẫu câu academic writing phổ biến"
-        ],
-        'medium': [
-            "Tập phân tích đề và lập dàn ý (outline) trước khi viết",
-            "Học cách paraphrase hiệu quả và sử dụng synonyms đa dạng",
-            "Viết ít nhất 2-3 bài essay mỗi tuần và tự chấm theo rubric",
-            "Học cách viết introduction và conclusion ấn tượng"
-        ],
-        'high': [
-            "Tập viết các bài luận phức tạp với nhiều góc nhìn khác nhau",
-            "Cải thiện academic vocabulary và formal expressions",
-            "Học cách sử dụng ví dụ và data để support arguments"
-        ]
-    }
-}
-
-
-def calculate_overall(scores: dict) -> float:
-    """Calculate overall IELTS band score"""
-    total = sum(scores.values())
-    avg = total / 4
-    # Round to nearest 0.5
-    return round(avg * 2) / 2
-
-
-def get_score_level(score: float) -> str:
-    """Categorize score level"""
-    if score >= 7:
-        return 'high'
-    elif score >= 5:
-        return 'medium'
-    return 'low'
-
-
-def get_band_description(score: float) -> str:
-    """Get band description for a score"""
-    band = int(score)
-    band = max(1, min(9, band))
-    return BAND_DESCRIPTIONS.get(band, "")
-
-
-def analyze_scores_rule_based(scores: dict, student_name: str) -> dict:
-    """
-    Rule-based analysis of IELTS scores
-    Returns structured analysis with summary, strengths, weaknesses, recommendations
-    """
-    overall = calculate_overall(scores)
-    
-    # Create skill array with scores
-    skills = [
-        {'name': 'listening', 'score': scores['listening'], 'label': SKILL_NAMES['listening']},
-        {'name': 'speaking', 'score': scores['speaking'], 'label': SKILL_NAMES['speaking']},
-        {'name': 'reading', 'score': scores['reading'], 'label': SKILL_NAMES['reading']},
-        {'name': 'writing', 'score': scores['writing'], 'label': SKILL_NAMES['writing']}
-    ]
-    
-    # Sort by score
-    sorted_skills = sorted(skills, key=lambda x: x['score'], reverse=True)
-    strengths = [s for s in sorted_skills if s['score'] >= overall]
-    weaknesses = [s for s in sorted_skills if s['score'] < overall]
-    
-    # Generate summary
-    summary_parts = [f"Học viên {student_name} đạt điểm IELTS tổng thể {overall}."]
-    
-    if strengths:
-        strength_names = [s['label'].split(' ')[0] for s in strengths]
-        summary_parts.append(f"Có khả năng {' và '.join(strength_names)} tốt")
-        if strengths[0]['score'] >= 7:
-            summary_parts[-1] += f" với điểm nổi bật ở kỹ năng {strengths[0]['label'].split(' ')[0]} ({strengths[0]['score']})."
-        else:
-            summary_parts[-1] += "."
-    
-    if weaknesses:
-        weakness_names = [w['label'].split(' ')[0] for w in weaknesses]
-        summary_parts.append(
-            f"Tuy nhiên, {' và '.join(weakness_names)} còn hạn chế "
-            "do có thể chưa thường xuyên luyện tập các kỹ năng này."
-        )
-    
-    summary = " ".join(summary_parts)
-    
-    # Generate recommendations for weak skills
-    recommendations_list = []
-    for skill in weaknesses:
-        level = get_score_level(skill['score'])
-        skill_recs = RECOMMENDATIONS[skill['name']][level]
-        recommendations_list.append({
-            'skill': skill['label'],
-            'score': skill['score'],
-            'items': skill_recs
-        })
-    
-    # Also add some recommendations for maintaining strengths
-    for skill in strengths[:1]:  # Top strength
-        level = get_score_level(skill['score'])
-        skill_recs = RECOMMENDATIONS[skill['name']][level]
-        recommendations_list.append({
-            'skill': skill['label'] + ' (Duy trì)',
-            'score': skill['score'],
-            'items': skill_recs[:2]  # Just top 2 recommendations
-        })
-    
-    # Generate action items
-    action_items = []
-    if weaknesses:
-        weakest = weaknesses[-1]
-        action_items.append(
-            f"Ưu tiên cải thiện kỹ năng {weakest['label'].split(' ')[0]} "
-            f"(hiện tại: {weakest['score']}, mục tiêu: {min(9, weakest['score'] + 1)})"
+# Recent batch results kept for bulk export, keyed by job ID:
+# (stored at, ResultSpool of the serialized rows, compact dictionary or None).
+# The rows are on disk, but the index lives in this worker only, bounded by
+# count, total rows and age; with several workers, export by posting the results.
+MAX_BATCH_JOBS = int(os.getenv('MAX_BATCH_JOBS', '20'))
+MAX_BATCH_JOB_ROWS = int(os.getenv('MAX_BATCH_JOB_ROWS', '1000000'))
+BATCH_JOB_TTL = float(os.getenv('BATCH_JOB_TTL', '3600'))
+BATCH_JOBS = OrderedDict()
+BATCH_JOBS_LOCK = threading.Lock()
+
+# Rejected rows listed in an export error response
+MAX_REPORTED_ERRORS = 100
+
+# Rows validated together when reading a roster; a chunk is the unit held in
+# memory (about 1 KB per row while parsed), its results go to a ResultSpool
+BATCH_CHUNK_ROWS = int(os.getenv('BATCH_CHUNK_ROWS', '4096'))
+
+# Score profiles shared between the chunks of one batch (about 6 KB each)
+BATCH_PROFILE_CACHE = int(os.getenv('BATCH_PROFILE_CACHE', '4096'))
+
+# Largest array accepted by /api/analyze-bulk
+MAX_BULK_STUDENTS = int(os.getenv('MAX_BULK_STUDENTS', '100000'))
+
+# Row hashes and results of earlier uploads, for incremental batch runs
+INCREMENTAL_STORE = None
+
+# Every analysis is kept in the history store unless HISTORY_ENABLED=0
+HISTORY_ENABLED = os.getenv('HISTORY_ENABLED', '1') not in ('0', 'false', 'no')
+HISTORY_STORE = None
+
+# Diacritics-insensitive search over stored student names, built on first search
+NAME_INDEX = None
+
+# Band counts per cohort for the percentile fields of /api/analyze
+COHORT_RANKS = None
+
+# Rule-based analyses and exported reports, keyed by the hash of their inputs
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+ANALYSIS_CACHE = ResponseCache(RESPONSE_CACHE_SIZE)
+EXPORT_CACHE = ResponseCache(RESPONSE_CACHE_SIZE)
+
+# Static strings for the compact batch output format, per catalog version
+COMPACT_DICTIONARIES = {}
+
+# Reload catalog.json in every worker when it changes on disk
+start_watcher()
+
+
+def compact_dictionary(catalog) -> StringDictionary:
+    dictionary = COMPACT_DICTIONARIES.get(catalog.version)
+    if dictionary is None:
+        dictionary = StringDictionary.from_tables(
+            catalog.skill_names, catalog.band_descriptions, catalog.recommendations,
+            catalog.status_labels, catalog.maintain_suffix, catalog.action_items
         )
-    
-    action_items.extend([
-        f"Đặt mục tiêu đạt {min(9, overall + 0.5)} trong 3 tháng tới",
-        "Luyện tập ít nhất 2 tiếng mỗi ngày, tập trung vào các kỹ năng yếu",
-        "Làm mock test đầy đủ 2 tuần/lần để theo dõi tiến độ",
-        "Tham gia study group hoặc tìm tutor để được hướng dẫn"
-    ])
-    
-    return {
-        'student_name': student_name,
-        'overall': overall,
-        'band_description': get_band_description(overall),
-        'skills': skills,
-        'strengths': [
-            {'skill': s['label'], 'score': s['score'], 
-             'status': 'Xuất sắc' if s['score'] >= 7 else 'Tốt'}
-            for s in strengths
-        ],
-        'weaknesses': [
-            {'skill': w['label'], 'score': w['score'], 'status': 'Cần cải thiện'}
-            for w in weaknesses
-        ],
-        'summary': summary,
-        'recommendations': recommendations_list,
-        'action_items': action_items,
-        'analyzed_at': datetime.now().isoformat()
-    }
-
-
-def analyze_with_llm(scores: dict, student_name: str, provider: str = 'openai') -> dict:
-    """
-    Use LLM (GPT-4 / Claude) for more sophisticated analysis
-    Falls back to rule-based if API not configured
-    """
-    # Prepare the prompt
-    prompt = f"""Bạn là một chuyên gia tư vấn IELTS. Hãy phân tích điểm IELTS của học viên và đưa ra nhận xét, đề xuất cải thiện.
-
-Thông tin học viên:
-- Tên: {student_name}
-- Listening: {scores['listening']}
-- Speaking: {scores['speaking']}  
-- Reading: {scores['reading']}
-- Writing: {scores['writing']}
-
-Hãy phân tích và đưa ra:
-1. Tóm tắt đánh giá tổng thể (2-3 câu)
-2. Điểm mạnh của học viên
-3. Điểm yếu cần cải thiện
-4. Đề xuất cụ thể cho từng kỹ năng yếu (resources, phương pháp học)
-5. Action items - kế hoạch hành động cụ thể trong 1-3 tháng
-
-Trả lời bằng tiếng Việt, ngắn gọn và thực tế."""
-
-    # Try OpenAI
-    if provider == 'openai' and OPENAI_API_KEY:
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=OPENAI_API_KEY)
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Bạn là chuyên gia tư vấn IELTS với nhiều năm kinh nghiệm."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-            llm_analysis = response.choices[0].message.content
-            
-            # Combine with rule-based analysis
-            base_analysis = analyze_scores_rule_based(scores, student_name)
-            base_analysis['llm_analysis'] = llm_analysis
-            base_analysis['llm_provider'] = 'OpenAI GPT-4'
-            return base_analysis
-            
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-    
-    # Try Anthropic Claude
-    if provider == 'anthropic' and ANTHROPIC_API_KEY:
-        try:
-            from anthropic import Anthropic
-            client = Anthropic(api_key=ANTHROPIC_API_KEY)
-            response = client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1024,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            llm_analysis = response.content[0].text
-            
-            base_analysis = analyze_scores_rule_based(scores, student_name)
-            base_analysis['llm_analysis'] = llm_analysis
-            base_analysis['llm_provider'] = 'Anthropic Claude'
-            return base_analysis
-            
-        except Exception as e:
-            print(f"Anthropic API error: {e}")
-    
-    # Fallback to rule-based
-    return analyze_scores_rule_based(scores, student_name)
+        COMPACT_DICTIONARIES.clear()
+        COMPACT_DICTIONARIES[catalog.version] = dictionary
+    return dictionary
 
 
 @app.route('/')
@@ -327,41 +113,131 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze():
-    """API endpoint to analyze IELTS scores"""
+class InvalidStudent(ValueError):
+    """A student record that fails validation"""
+
+
+REQUIRED_FIELDS = ['student_name', 'listening', 'speaking', 'reading', 'writing']
+MAX_LABEL_LENGTH = 64
+
+
+def parse_student(data: dict):
+    """Validate one student record, returns (scores, student_name)"""
+    if not isinstance(data, dict):
+        raise InvalidStudent('Student record must be a JSON object')
+    
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            raise InvalidStudent(f'Missing field: {field}')
+    
     try:
-        data = request.json
-        
-        # Validate input
-        required_fields = ['student_name', 'listening', 'speaking', 'reading', 'writing']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing field: {field}'}), 400
-        
         scores = {
             'listening': float(data['listening']),
             'speaking': float(data['speaking']),
             'reading': float(data['reading']),
             'writing': float(data['writing'])
         }
+    except (TypeError, ValueError) as e:
+        raise InvalidStudent(f'Invalid score value: {str(e)}')
+    
+    # Validate score ranges
+    for skill, score in scores.items():
+        if not 0 <= score <= 9:
+            raise InvalidStudent(f'Invalid {skill} score. Must be 0-9')
+    
+    return scores, data['student_name']
+
+
+def parse_label(data: dict, field: str):
+    """Optional student_id / cohort of a record, as a trimmed string or None"""
+    value = data.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise InvalidStudent(f'{field} must be a string')
+    value = str(value).strip()
+    if len(value) > MAX_LABEL_LENGTH:
+        raise InvalidStudent(f'{field} is longer than {MAX_LABEL_LENGTH} characters')
+    return value or None
+
+
+def parse_target(value):
+    """Optional target band for progress projections"""
+    if value is None or value == '':
+        return None
+    target = float(value)
+    if not 0 <= target <= 9:
+        raise ValueError('target must be 0-9')
+    return target
+
+
+def json_response(payload) -> Response:
+    """JSON response through the deterministic serializer"""
+    return Response(json_dumps(payload), mimetype='application/json')
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching If-None-Match"""
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze():
+    """API endpoint to analyze IELTS scores"""
+    try:
+        data = request.json
         
-        # Validate score ranges
-        for skill, score in scores.items():
-            if not 0 <= score <= 9:
-                return jsonify({'error': f'Invalid {skill} score. Must be 0-9'}), 400
+        # Validate input
+        try:
+            scores, student_name = parse_student(data)
+            student_id = parse_label(data, 'student_id')
+            cohort = parse_label(data, 'cohort')
+        except InvalidStudent as e:
+            return jsonify({'error': str(e)}), 400
         
-        student_name = data['student_name']
         use_llm = data.get('use_llm', False)
         llm_provider = data.get('llm_provider', 'openai')
         
         # Perform analysis
         if use_llm:
             analysis = analyze_with_llm(scores, student_name, llm_provider)
-        else:
+            if student_id:
+                analysis['student_id'] = student_id
+            analysis['percentile'] = score_percentiles(scores, analysis['overall'], cohort, student_id, student_name)
+            record_history(analysis, student_id, cohort=cohort)
+            return json_response(analysis)
+        
+        # Rule-based analysis only depends on its inputs, so it can be cached
+        cache_key = content_hash({'scores': scores, 'student_name': student_name},
+                                 namespace=f'input:{get_catalog().version}')
+        cached = ANALYSIS_CACHE.get(cache_key)
+        if cached is None:
             analysis = analyze_scores_rule_based(scores, student_name)
+            cached = (content_hash(analysis, namespace='analysis'), analysis)
+            ANALYSIS_CACHE.put(cache_key, cached)
+        analysis_etag, cached_analysis = cached
+        
+        analysis = dict(cached_analysis, analyzed_at=datetime.now().isoformat())
+        if student_id:
+            analysis['student_id'] = student_id
+        analysis['percentile'] = score_percentiles(scores, analysis['overall'], cohort, student_id, student_name)
+        # Every submission is kept, including ones answered with 304 below
+        record_history(analysis, student_id, cohort=cohort)
+        
+        # The body also depends on every field added per request (the percentile
+        # changes as the cohort grows), so all of them go into the ETag
+        per_request = {key: value for key, value in analysis.items() if key not in cached_analysis}
+        etag = content_hash({'analysis': analysis_etag, 'cohort': cohort, **per_request}, namespace='response')
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
         
-        return jsonify(analysis)
+        response = json_response(analysis)
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
         
     except ValueError as e:
         return jsonify({'error': f'Invalid score value: {str(e)}'}), 400
@@ -369,110 +245,444 @@ def analyze():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/analyze-bulk', methods=['POST'])
+def analyze_bulk():
+    """Analyze an array of student records in one request"""
+    try:
+        data = request.json
+        students = data.get('students') if isinstance(data, dict) else data
+        if not isinstance(students, list):
+            return jsonify({'error': 'Expected a JSON array of students or {"students": [...]}'}), 400
+        if len(students) > MAX_BULK_STUDENTS:
+            return jsonify({'error': f'Too many students. Maximum is {MAX_BULK_STUDENTS}'}), 413
+        try:
+            cohort = parse_label(data, 'cohort') if isinstance(data, dict) else None
+        except InvalidStudent as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Validate everything first, then analyze with one shared timestamp
+        results = ResultBatch()
+        analyzed_at = time.time()
+        error_count = 0
+        student_ids = []
+        for index, record in enumerate(students):
+            try:
+                scores, student_name = parse_student(record)
+                student_id = parse_label(record, 'student_id')
+            except InvalidStudent as e:
+                results.append_error({'error': str(e), 'index': index})
+                student_ids.append(None)
+                error_count += 1
+                continue
+            results.append(scores, student_name, analyzed_at)
+            student_ids.append(student_id)
+        record_batch_history(results, student_ids, source='bulk', cohort=cohort)
+        
+        return stream_json_response(
+            iter_batch_json(results, {
+                'count': len(results), 'errors': error_count, 'profiles': results.profile_stats()
+            }, encoded=with_student_ids(results.iter_encoded(), student_ids))
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/export', methods=['POST'])
 def export_report():
     """Export analysis as text/PDF report"""
     try:
         data = request.json
         analysis = data.get('analysis', {})
+        try:
+            check_analysis(analysis)
+        except ReportDataError as e:
+            return jsonify({'error': f'Invalid analysis: {str(e)}'}), 400
         
-        # Generate report content
-        report = f"""
-╔══════════════════════════════════════════════════════════════╗
-║           IELTS SCORE ANALYSIS REPORT                        ║
-║           BÁO CÁO PHÂN TÍCH ĐIỂM IELTS                       ║
-╚══════════════════════════════════════════════════════════════╝
+        # Apart from its generation date the report is a function of the analysis:
+        # the rest is cached, and the date (to the minute, as printed) is stamped per request
+        generated_at = datetime.now()
+        cache_key = content_hash(analysis, namespace='report')
+        etag = content_hash({'report': cache_key, 'generated_at': generated_at.strftime('%Y%m%d%H%M')},
+                            namespace='report-response')
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        
+        parts = EXPORT_CACHE.get(cache_key)
+        if parts is None:
+            parts = render_report_parts(analysis)
+            EXPORT_CACHE.put(cache_key, parts)
+        
+        # Return as downloadable file
+        response = send_file(
+            BytesIO(stamp_report(parts, generated_at)),
+            mimetype='text/plain',
+            as_attachment=True,
+            download_name=report_filename(analysis, generated_at)
+        )
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-📅 Ngày phân tích: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-👤 Học viên: {analysis.get('student_name', 'N/A')}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def store_batch_job(spool: ResultSpool, dictionary: dict = None):
+    """
+    Keep spooled batch results so they can be exported later by job ID;
+    dictionary is the compact format's when the rows are compact. Returns
+    None (and the caller keeps the spool) when the batch alone is larger
+    than MAX_BATCH_JOB_ROWS.
+    """
+    if len(spool) > MAX_BATCH_JOB_ROWS:
+        return None
+    job_id = uuid.uuid4().hex
+    with BATCH_JOBS_LOCK:
+        BATCH_JOBS[job_id] = (time.monotonic(), spool, dictionary)
+        _evict_batch_jobs()
+    return job_id
+
+
+def _evict_batch_jobs():
+    """Drop expired jobs, then the oldest ones until the count and row limits hold"""
+    expired = time.monotonic() - BATCH_JOB_TTL
+    rows = sum(len(spool) for _, spool, _ in BATCH_JOBS.values())
+    while BATCH_JOBS:
+        stored_at, spool, _ = next(iter(BATCH_JOBS.values()))
+        if stored_at >= expired and len(BATCH_JOBS) <= MAX_BATCH_JOBS and rows <= MAX_BATCH_JOB_ROWS:
+            break
+        BATCH_JOBS.popitem(last=False)
+        spool.close()
+        rows -= len(spool)
+
+
+def batch_job(job_id):
+    """Stored results of a batch job as analysis dicts, or None when unknown or expired"""
+    with BATCH_JOBS_LOCK:
+        _evict_batch_jobs()
+        job = BATCH_JOBS.get(job_id)
+        if job is None:
+            return None
+        # Opened under the lock, so a later eviction cannot cut the export short
+        rows = map(json.loads, iter(job[1]))
+    dictionary = job[2]
+    return (expand_row(row, dictionary) for row in rows) if dictionary else rows
+
+
+def close_batch_jobs():
+    """Delete the spooled results of every stored batch job"""
+    with BATCH_JOBS_LOCK:
+        for _, spool, _ in BATCH_JOBS.values():
+            spool.close()
+        BATCH_JOBS.clear()
+
+
+# Job results are temp files that outlive their request: remove them on exit
+atexit.register(close_batch_jobs)
+
+
+def attachment_header(filename: str) -> str:
+    """Content-Disposition value that survives non-ASCII student names"""
+    try:
+        filename.encode('ascii')
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"attachment; filename*=UTF-8''{quote(filename)}"
 
-📊 ĐIỂM TỔNG THỂ: {analysis.get('overall', 0)}
-   {analysis.get('band_description', '')}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def iter_batch_json(results, meta: dict, head: dict = None, row_format=None,
+                    rows_per_chunk: int = 256, encoded=None):
+    """
+    Serialize {**head, "results": [...], **meta} a few rows at a time.
+    row_format converts each result before serialization; encoded, when
+    given, yields the rows already serialized.
+    """
+    yield b'{'
+    for key, value in (head or {}).items():
+        yield json_dumps(key) + b':' + json_dumps(value) + b','
+    yield b'"results":['
+    if encoded is None and row_format is None and isinstance(results, ResultBatch):
+        # Shared score profiles are encoded once per batch
+        encoded = results.iter_encoded()
+    elif encoded is None:
+        rows = map(row_format, results) if row_format else iter(results)
+        encoded = map(json_dumps, rows)
+    prefix = b''
+    while True:
+        chunk = list(islice(encoded, rows_per_chunk))
+        if not chunk:
+            break
+        yield prefix + b','.join(chunk)
+        prefix = b','
+    yield b']'
+    for key, value in meta.items():
+        yield b',' + json_dumps(key) + b':' + json_dumps(value)
+    yield b'}'
+
+
+def with_student_ids(encoded, student_ids: list):
+    """Serialized rows with "student_id" appended where there is one, as in /api/analyze"""
+    for row, student_id in zip(encoded, student_ids):
+        if student_id:
+            row = row[:-1] + b',"student_id":' + json_dumps(student_id) + b'}'
+        yield row
+
+
+def stream_json_response(chunks) -> Response:
+    """Chunked JSON response, compressed with the best coding the client accepts"""
+    chunks = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+    encoding = request.accept_encodings.best_match(available_encodings())
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding:
+        chunks = compress_stream(chunks, encoding)
+        headers['Content-Encoding'] = encoding
+    return Response(stream_with_context(chunks), mimetype='application/json', headers=headers)
+
+
+@app.route('/api/export-batch', methods=['POST'])
+def export_batch():
+    """Export one report per student as a streamed zip archive"""
+    try:
+        data = request.json or {}
+        
+        if 'job_id' in data:
+            results = batch_job(data['job_id'])
+            if results is None:
+                return jsonify({'error': f"Unknown or expired job ID: {data['job_id']}"}), 404
+        elif isinstance(data.get('results'), list):
+            results = data['results']
+            # Check every row up front: a failure inside the stream would end in a truncated 200
+            invalid = []
+            for index, analysis in enumerate(results):
+                if isinstance(analysis, dict) and 'error' in analysis:
+                    continue
+                try:
+                    check_analysis(analysis)
+                except ReportDataError as e:
+                    invalid.append({'index': index, 'error': str(e)})
+            if invalid:
+                return jsonify({'error': f'{len(invalid)} results cannot be exported',
+                                'invalid': invalid[:MAX_REPORTED_ERRORS]}), 400
+        else:
+            return jsonify({'error': 'Missing field: job_id or results'}), 400
+        
+        filename = f"IELTS_Reports_{datetime.now().strftime('%Y%m%d')}.zip"
+        return Response(
+            stream_with_context(iter_reports_zip(results)),
+            mimetype='application/zip',
+            headers={'Content-Disposition': attachment_header(filename)}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-📈 CHI TIẾT ĐIỂM:
-"""
-        for skill in analysis.get('skills', []):
-            bar_length = int(skill['score'] / 9 * 20)
-            bar = '█' * bar_length + '░' * (20 - bar_length)
-            report += f"   • {skill['label']}: {skill['score']} [{bar}]\n"
 
-        report += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e=None):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'Upload too large (limit {limit_mb} MB)'}), 413
 
-📝 TÓM TẮT ĐÁNH GIÁ:
-{analysis.get('summary', '')}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def iter_roster_chunks(file):
+    """
+    Yield lists of roster rows. CSV uploads spooled to disk are read through
+    mmap in line-aligned byte ranges; everything else is read as a stream.
+    """
+    spooled = spooled_file(file.stream)
+    if os.path.splitext(file.filename)[1].lower() == COHORT_EXTENSION:
+        with open_cohort(file) as cohort:
+            for start in range(0, len(cohort), BATCH_CHUNK_ROWS):
+                yield list(cohort.iter_rows(start, min(start + BATCH_CHUNK_ROWS, len(cohort))))
+        return
+    if spooled is not None and os.path.splitext(file.filename)[1].lower() in ('.csv', '.txt', ''):
+        with MappedRoster(spooled) as roster:
+            if roster.line_aligned:
+                yield from iter_chunks(chain.from_iterable(
+                    roster.iter_range(start, end) for start, end in roster.ranges()
+                ))
+                return
+        file.stream.seek(0)
+    
+    yield from iter_chunks(iter_roster_rows(file.stream, file.filename))
 
-💪 ĐIỂM MẠNH:
-"""
-        for s in analysis.get('strengths', []):
-            report += f"   ✓ {s['skill']}: {s['score']} - {s['status']}\n"
 
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def iter_chunks(rows):
+    """Lists of BATCH_CHUNK_ROWS rows; each is released here before the next is read"""
+    while True:
+        chunk = list(islice(rows, BATCH_CHUNK_ROWS))
+        if not chunk:
+            return
+        yield chunk
+        del chunk
 
-📉 ĐIỂM CẦN CẢI THIỆN:
-"""
-        for w in analysis.get('weaknesses', []):
-            report += f"   ⚠ {w['skill']}: {w['score']} - {w['status']}\n"
 
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def open_cohort(file) -> CohortFile:
+    """Map a cohort upload in place when spooled, otherwise read it from memory"""
+    spooled = spooled_file(file.stream)
+    try:
+        return CohortFile(spooled if spooled is not None else file.stream.read())
+    except CohortFormatError as e:
+        raise RosterFormatError(str(e))
 
-🎯 ĐỀ XUẤT CẢI THIỆN:
-"""
-        for rec in analysis.get('recommendations', []):
-            report += f"\n   📌 {rec['skill']}:\n"
-            for item in rec['items']:
-                report += f"      → {item}\n"
 
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def history_store():
+    """The shared HistoryStore, or None when history is disabled"""
+    global HISTORY_STORE
+    if HISTORY_STORE is None and HISTORY_ENABLED:
+        HISTORY_STORE = HistoryStore()
+    return HISTORY_STORE
 
-📌 KẾ HOẠCH HÀNH ĐỘNG:
-"""
-        for i, action in enumerate(analysis.get('action_items', []), 1):
-            report += f"   {i}. {action}\n"
 
-        if 'llm_analysis' in analysis:
-            report += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def name_index():
+    """The shared NameIndex, following the history store; None when history is disabled"""
+    global NAME_INDEX
+    if NAME_INDEX is None:
+        history = history_store()
+        if history is not None:
+            NAME_INDEX = build_index(history)
+    return NAME_INDEX
 
-🤖 PHÂN TÍCH AI ({analysis.get('llm_provider', 'AI')}):
-{analysis['llm_analysis']}
-"""
 
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Báo cáo được tạo bởi IELTS Score Analyzer - AI Document Summarizer
-"""
+def cohort_ranks():
+    """The shared CohortRanks, following the history store; None when history is disabled"""
+    global COHORT_RANKS
+    if COHORT_RANKS is None:
+        history = history_store()
+        if history is not None:
+            COHORT_RANKS = build_ranks(history)
+    return COHORT_RANKS
 
-        # Return as downloadable file
-        buffer = BytesIO()
-        buffer.write(report.encode('utf-8'))
-        buffer.seek(0)
+
+def score_percentiles(scores: dict, overall: float, cohort=None, student_id=None, student_name=None):
+    """Percentile fields for an analysis, against the other students stored before it"""
+    ranks = cohort_ranks()
+    if ranks is None:
+        return None
+    student = student_key(student_id, name_key(student_name or 'Unknown'))
+    return ranks.percentiles(dict(scores, overall=overall), cohort, student)
+
+
+def record_history(analysis: dict, student_id=None, source: str = 'web', cohort: str = None):
+    history = history_store()
+    if history is not None:
+        history.record(analysis, student_id, source, cohort)
+
+
+def record_batch_history(results, student_ids: list = None, source: str = 'batch', cohort: str = None):
+    history = history_store()
+    if history is not None:
+        history.record_batch(results, student_ids, source, cohort)
+
+
+def incremental_store() -> IncrementalStore:
+    global INCREMENTAL_STORE
+    if INCREMENTAL_STORE is None:
+        INCREMENTAL_STORE = IncrementalStore()
+    return INCREMENTAL_STORE
+
+
+def add_roster_chunk(rows, results, summary, analyzed_at, incremental=None, student_ids=None):
+    """
+    Validate one chunk of rows column by column and append it to the batch.
+    With an IncrementalRun, unchanged rows reuse their stored results.
+    """
+    names = [row.get('student_name') or 'Unknown' for row in rows]
+    if student_ids is not None:
+        student_ids.extend(row.get('student_id') for row in rows)
+    columns = {skill: [row.get(skill) for row in rows] for skill in SKILLS}
+    validation = validate_columns(columns, len(rows))
+    reusable = incremental.lookup(rows, validation) if incremental else {}
+    
+    offset = summary.row_count
+    for index, student_name in enumerate(names):
+        if index in reusable:
+            results.append_reused(validation.row_scores(index), student_name, reusable[index])
+        elif validation.is_valid(index):
+            results.append(validation.row_scores(index), student_name, analyzed_at)
+            if incremental:
+                incremental.remember(index, len(results) - 1)
+        else:
+            results.append_error({
+                'error': validation.row_message(index),
+                'row': offset + index,
+                'reasons': validation.row_errors(index)
+            })
+    summary.add(validation)
+    if incremental:
+        incremental.save(results)
+
+
+@app.route('/api/batch-analyze', methods=['POST'])
+def batch_analyze():
+    """Analyze multiple students from a CSV, XLSX, JSON or JSONL roster"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file uploaded'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
         
-        filename = f"IELTS_Report_{analysis.get('student_name', 'Student')}_{datetime.now().strftime('%Y%m%d')}.txt"
+        output_format = request.values.get('format', 'full')
+        if output_format not in ('full', COMPACT_FORMAT):
+            return jsonify({'error': f'Invalid format: {output_format}. Must be full or compact'}), 400
         
-        return send_file(
-            buffer,
-            mimetype='text/plain',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Incremental mode: rows are matched to earlier uploads of the same roster by student_id
+        incremental = None
+        if request.values.get('incremental', '').lower() in ('1', 'true', 'yes'):
+            incremental = IncrementalRun(incremental_store(), request.values.get('roster', ''))
+        
+        dictionary = compact_dictionary(get_catalog()) if output_format == COMPACT_FORMAT else None
+        # Rows count towards the cohort's percentiles; the roster name is the default cohort
+        cohort = request.values.get('cohort') or request.values.get('roster')
         
+        # Validate and analyze the roster one chunk of rows at a time. Only the
+        # current chunk is in memory: its serialized rows go to a temp file
+        # that the response and later exports read back.
+        spool = ResultSpool()
+        try:
+            summary = ValidationSummary()
+            stats = ProfileStats()
+            analyzed_at = time.time()
+            profiles = ProfileCache(BATCH_PROFILE_CACHE)
+            for rows in iter_roster_chunks(file):
+                results = ResultBatch(profiles)
+                student_ids = []
+                add_roster_chunk(rows, results, summary, analyzed_at, incremental, student_ids)
+                del rows    # free the parsed chunk before the next one is read
+                spool.write(results.iter_compact(dictionary) if dictionary else results.iter_encoded())
+                stats.add(results)
+                record_batch_history(results, student_ids, cohort=cohort)
+            encoded = iter(spool)
+        except BaseException:
+            spool.close()
+            raise
+        
+        job_id = store_batch_job(spool, dictionary.to_json() if dictionary else None)
+        if job_id is None:
+            spool.close()
+        meta = {
+            'count': len(spool), 'job_id': job_id, 'validation': summary.to_json(),
+            'profiles': stats.to_json()
+        }
+        if incremental:
+            meta['incremental'] = incremental.to_json()
+        
+        head = {'format': COMPACT_FORMAT, 'dictionary': dictionary.to_json()} if dictionary else None
+        return stream_json_response(iter_batch_json(None, meta, head=head, encoded=encoded))
+        
+    except RosterFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        return upload_too_large()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/batch-analyze', methods=['POST'])
-def batch_analyze():
-    """Analyze multiple students from CSV data"""
+@app.route('/api/cohort-stats', methods=['POST'])
+def cohort_statistics():
+    """Band distributions for a whole roster (cohort file or any roster format)"""
     try:
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -481,38 +691,165 @@ def batch_analyze():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Read CSV
-        import csv
-        from io import StringIO
+        if os.path.splitext(file.filename)[1].lower() == COHORT_EXTENSION:
+            with open_cohort(file) as cohort:
+                return jsonify(cohort_stats(cohort).to_json())
         
-        content = file.read().decode('utf-8')
-        reader = csv.DictReader(StringIO(content))
+        # Other formats are converted to a temporary cohort file first
+        with tempfile.NamedTemporaryFile(prefix=SPOOL_PREFIX, suffix=COHORT_EXTENSION,
+                                         dir=UPLOAD_TMP_DIR) as converted:
+            write_cohort(iter_roster_rows(file.stream, file.filename), converted.name)
+            with CohortFile(converted.name) as cohort:
+                return jsonify(cohort_stats(cohort).to_json())
         
-        results = []
-        for row in reader:
-            try:
-                scores = {
-                    'listening': float(row.get('listening', 0)),
-                    'speaking': float(row.get('speaking', 0)),
-                    'reading': float(row.get('reading', 0)),
-                    'writing': float(row.get('writing', 0))
-                }
-                student_name = row.get('student_name', row.get('name', 'Unknown'))
-                
-                analysis = analyze_scores_rule_based(scores, student_name)
-                results.append(analysis)
-            except Exception as e:
-                results.append({'error': str(e), 'row': row})
-        
-        return jsonify({'results': results, 'count': len(results)})
+    except RosterFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except RequestEntityTooLarge:
+        return upload_too_large()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _query_time(value):
+    """Unix seconds or an ISO date/datetime from a query parameter"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+@app.route('/api/history', methods=['GET'])
+def analysis_history():
+    """Stored analyses by student_id, exact name and/or date range, newest first"""
+    history = history_store()
+    if history is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    try:
+        args = request.args
+        entries = history.query(
+            student_id=args.get('student_id') or None,
+            student_name=args.get('student_name') or None,
+            since=_query_time(args.get('from')),
+            until=_query_time(args.get('to')),
+            limit=int(args.get('limit', DEFAULT_LIMIT)),
+            include_result=args.get('full', '').lower() in ('1', 'true', 'yes')
+        )
+        return json_response({'count': len(entries), 'analyses': entries})
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/history/status', methods=['GET'])
+def history_status():
+    """History writer counters and queue depth"""
+    history = history_store()
+    if history is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    return jsonify(history.status())
+
+
+@app.route('/api/history/search', methods=['GET'])
+def search_history_text():
+    """Stored AI analyses whose text matches q, ranked, with snippets; skill/min_band/max_band filter"""
+    history = history_store()
+    if history is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    if not history.full_text:
+        return jsonify({'error': 'Full-text search is not available (SQLite without FTS5)'}), 501
+    try:
+        args = request.args
+        results = history.search_text(
+            args.get('q', ''),
+            skill=args.get('skill', 'overall'),
+            min_band=float(args['min_band']) if args.get('min_band') else None,
+            max_band=float(args['max_band']) if args.get('max_band') else None,
+            limit=int(args.get('limit', DEFAULT_LIMIT))
+        )
+        return json_response({'count': len(results), 'results': results})
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/students/search', methods=['GET'])
+def search_students():
+    """Stored students whose name matches q, ignoring diacritics and case (prefixes allowed)"""
+    index = name_index()
+    if index is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    try:
+        limit = int(request.args.get('limit', NAME_SEARCH_LIMIT))
+        students = index.search(request.args.get('q', ''), limit)
+        for student in students:
+            student['last_analyzed_at'] = datetime.fromtimestamp(student['last_analyzed_at']).isoformat()
+        return json_response({'count': len(students), 'students': students})
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/progress/<student_id>', methods=['GET'])
+def progress_for_student(student_id):
+    """Score series, deltas, trend and projected date for one student's stored analyses"""
+    history = history_store()
+    if history is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    try:
+        target = parse_target(request.args.get('target'))
+        progress = student_progress(history.score_rows([student_id]), target)
+        if progress is None:
+            return jsonify({'error': f'No stored analyses for student_id {student_id}'}), 404
+        return json_response(progress)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/progress/class', methods=['POST'])
+def progress_for_class():
+    """Trend summaries for a list of students, fitted together"""
+    history = history_store()
+    if history is None:
+        return jsonify({'error': 'History is disabled'}), 404
+    try:
+        data = request.json
+        student_ids = data.get('student_ids') if isinstance(data, dict) else None
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({'error': 'Expected {"student_ids": [...]}'}), 400
+        if len(student_ids) > MAX_BULK_STUDENTS:
+            return jsonify({'error': f'Too many students. Maximum is {MAX_BULK_STUDENTS}'}), 413
         
+        students = class_progress(history.score_rows(student_ids), parse_target(data.get('target')))
+        found = {student['student_id'] for student in students}
+        return json_response({
+            'count': len(students),
+            'students': students,
+            'missing': [student_id for student_id in map(str, student_ids) if student_id not in found]
+        })
+    except ValueError as e:
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/catalog', methods=['GET'])
+def catalog_tables():
+    """Recommendation catalog in effect, with its version"""
+    catalog = get_catalog()
+    return jsonify({'version': catalog.version, **catalog.to_json()})
+
+
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
     os.makedirs('templates', exist_ok=True)
+    cleanup_stale_uploads()
     
     print("""
 ╔══════════════════════════════════════════════════════════════╗
@@ -526,8 +863,18 @@ To use with LLM:
 
 API Endpoints:
   POST /api/analyze      - Analyze single student
+  POST /api/analyze-bulk - Analyze a JSON array of students
   POST /api/export       - Export report
-  POST /api/batch-analyze - Analyze multiple students (CSV)
+  POST /api/batch-analyze - Analyze multiple students (CSV/XLSX/JSON/JSONL/.ielts)
+  POST /api/cohort-stats - Band distributions for a roster or cohort file
+  POST /api/export-batch - Export batch reports as a zip stream
+  GET  /api/history      - Stored analyses by student_id, name or date range
+  GET  /api/history/search - Full-text search over stored AI analyses
+  GET  /api/history/status - History writer queue depth and counters
+  GET  /api/students/search - Find stored students by name (no diacritics needed)
+  GET  /api/progress/<id> - Score series, trend and projected date for a student
+  POST /api/progress/class - Trends for a list of students
+  GET  /api/catalog      - Recommendation catalog (reloaded when catalog.json changes)
 """)
     
     app.run(debug=True, port=5000)
@@ -0,0 +1,181 @@
+"""
+IELTS Score Analyzer - Batch Validation
+Column-at-a-time validation of batch score inputs
+
+Each score column is parsed in bulk, then checked with whole-column masks
+for the 0-9 range and half-band steps. Problems are reported per column as
+reason codes with the row indices they apply to, instead of one exception
+per row.
+"""
+
+import math
+from array import array
+
+# Optional: vectorized checks when numpy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+# Reason codes
+MISSING = 'missing'
+NOT_A_NUMBER = 'not_a_number'
+OUT_OF_RANGE = 'out_of_range'
+NOT_HALF_BAND = 'not_half_band'
+
+REASON_MESSAGES = {
+    MISSING: 'missing score',
+    NOT_A_NUMBER: 'not a number',
+    OUT_OF_RANGE: 'must be 0-9',
+    NOT_HALF_BAND: 'must be a multiple of 0.5',
+}
+
+
+class ColumnValidation:
+    """Parsed score columns plus a compact error report"""
+
+    def __init__(self, row_count: int):
+        self.row_count = row_count
+        self.values = {}    # skill -> parsed floats (numpy array or array('d'))
+        self.errors = {}    # skill -> {reason: [row indices]}
+        self._by_row = None
+
+    @property
+    def invalid_rows(self) -> dict:
+        """row -> {skill: reason}, built once on first use"""
+        if self._by_row is None:
+            self._by_row = {}
+            for skill, reasons in self.errors.items():
+                for reason, rows in reasons.items():
+                    for row in rows:
+                        self._by_row.setdefault(row, {})[skill] = reason
+        return self._by_row
+
+    def is_valid(self, row: int) -> bool:
+        return row not in self.invalid_rows
+
+    def row_scores(self, row: int) -> dict:
+        return {skill: float(self.values[skill][row]) for skill in self.values}
+
+    def row_errors(self, row: int) -> dict:
+        """{skill: reason} for one row"""
+        return self.invalid_rows.get(row, {})
+
+    def row_message(self, row: int) -> str:
+        return '; '.join(
+            f"{skill}: {REASON_MESSAGES[reason]}" for skill, reason in self.row_errors(row).items()
+        )
+
+    def to_json(self) -> dict:
+        return {
+            'rows': self.row_count,
+            'invalid_rows': len(self.invalid_rows),
+            'errors': self.errors,
+        }
+
+
+def _parse_column(cells: list):
+    """Parse raw cells to floats; unparseable cells become NaN"""
+    if np is not None:
+        try:
+            # Fast path: numpy parses the whole column in C
+            return np.asarray(cells, dtype=np.float64)
+        except (TypeError, ValueError):
+            pass
+
+    values = array('d')
+    for cell in cells:
+        try:
+            values.append(float(cell))
+        except (TypeError, ValueError):
+            values.append(math.nan)
+    return np.frombuffer(values, dtype=np.float64) if np is not None else values
+
+
+def _is_blank(cell) -> bool:
+    return cell is None or (isinstance(cell, str) and not cell.strip())
+
+
+def _check_column(cells: list, values) -> dict:
+    """Reason code -> row indices for one parsed column"""
+    errors = {}
+
+    if np is not None:
+        nan = np.isnan(values)
+        if nan.any():
+            nan_rows = np.flatnonzero(nan)
+            blank = np.fromiter((_is_blank(cells[i]) for i in nan_rows), dtype=bool, count=len(nan_rows))
+            if blank.any():
+                errors[MISSING] = nan_rows[blank].tolist()
+            if not blank.all():
+                errors[NOT_A_NUMBER] = nan_rows[~blank].tolist()
+        with np.errstate(invalid='ignore'):
+            out_of_range = ~nan & ((values < 0) | (values > 9))
+            doubled = values * 2
+            off_step = ~nan & ~out_of_range & (doubled != np.round(doubled))
+        if out_of_range.any():
+            errors[OUT_OF_RANGE] = np.flatnonzero(out_of_range).tolist()
+        if off_step.any():
+            errors[NOT_HALF_BAND] = np.flatnonzero(off_step).tolist()
+        return errors
+
+    for row, value in enumerate(values):
+        if value != value:  # NaN
+            reason = MISSING if _is_blank(cells[row]) else NOT_A_NUMBER
+        elif not 0 <= value <= 9:
+            reason = OUT_OF_RANGE
+        elif value * 2 != round(value * 2):
+            reason = NOT_HALF_BAND
+        else:
+            continue
+        errors.setdefault(reason, []).append(row)
+    return errors
+
+
+def validate_columns(columns: dict, row_count: int = None, skills=SKILLS) -> ColumnValidation:
+    """
+    Validate score columns given as {skill: [raw cell, ...]}.
+    A skill without a column is reported as missing for every row.
+    """
+    if row_count is None:
+        row_count = max((len(cells) for cells in columns.values()), default=0)
+
+    result = ColumnValidation(row_count)
+    for skill in skills:
+        cells = columns.get(skill)
+        if cells is None:
+            cells = [None] * row_count
+        values = _parse_column(cells)
+        result.values[skill] = values
+        errors = _check_column(cells, values)
+        if errors:
+            result.errors[skill] = errors
+    return result
+
+
+class ValidationSummary:
+    """Merged report for a batch validated in consecutive chunks"""
+
+    def __init__(self):
+        self.row_count = 0
+        self.invalid_count = 0
+        self.errors = {}
+
+    def add(self, validation: ColumnValidation):
+        """Fold in the next chunk; its row indices are shifted to batch positions"""
+        offset = self.row_count
+        for skill, reasons in validation.errors.items():
+            merged = self.errors.setdefault(skill, {})
+            for reason, rows in reasons.items():
+                merged.setdefault(reason, []).extend(row + offset for row in rows)
+        self.row_count += validation.row_count
+        self.invalid_count += len(validation.invalid_rows)
+
+    def to_json(self) -> dict:
+        return {
+            'rows': self.row_count,
+            'invalid_rows': self.invalid_count,
+            'errors': self.errors,
+        }
@@ -0,0 +1,104 @@
+"""
+Benchmark: peak memory of /api/batch-analyze on a large spooled CSV upload
+Chạy: python benchmarks/bench_batch_memory.py [số học viên] [full|compact] [--no-history] [--uniform]
+
+Run in a fresh process: peak RSS (ru_maxrss) only ever grows, so the
+measurement is the peak during the large upload minus the peak after a
+small warm-up upload (imports, catalog, compact dictionary).
+
+Scores cluster around each student's level, as in real rosters; --uniform
+draws every skill independently from 3.0-9.0 instead (about 28,500 score
+profiles, far more than the shared profile cache keeps), the worst case
+for throughput.
+"""
+
+import os
+import sys
+import time
+import random
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+
+def student_scores(rng, uniform: bool) -> list:
+    if uniform:
+        return [rng.randint(6, 18) / 2 for _ in SKILLS]
+    level = rng.gauss(6.0, 0.9)
+    return [min(max(round((level + rng.gauss(0, 0.6)) * 2) / 2, 0.0), 9.0) for _ in SKILLS]
+
+
+def write_roster(path: str, count: int, uniform: bool = False):
+    rng = random.Random(42)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('student_id,student_name,' + ','.join(SKILLS) + '\n')
+        for i in range(count):
+            scores = ','.join(map(str, student_scores(rng, uniform)))
+            f.write(f"HV{i:08d},Học viên {i},{scores}\n")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def post_roster(client, path: str, output_format: str) -> int:
+    """Stream one batch response to nowhere; returns its size in bytes"""
+    with open(path, 'rb') as f:
+        response = client.post('/api/batch-analyze', buffered=False, content_type='multipart/form-data',
+                               data={'file': (f, 'roster.csv'), 'format': output_format, 'cohort': 'bench'})
+        assert response.status_code == 200, response.status_code
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+    return size
+
+
+def measure(count: int, output_format: str = 'full', history: bool = True, uniform: bool = False) -> dict:
+    """Peak RSS growth (MB) and throughput of one batch upload of count rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['HISTORY_DB'] = os.path.join(tmp, 'history.db')
+        os.environ['INCREMENTAL_DB'] = os.path.join(tmp, 'incremental.db')
+        os.environ['HISTORY_ENABLED'] = '1' if history else '0'
+        import app
+
+        client = app.app.test_client()
+        small, large = os.path.join(tmp, 'small.csv'), os.path.join(tmp, 'large.csv')
+        write_roster(small, 1000, uniform)
+        write_roster(large, count, uniform)
+        post_roster(client, small, output_format)
+        if history:
+            app.history_store().flush(60)
+        baseline = peak_rss_mb()
+
+        start = time.perf_counter()
+        size = post_roster(client, large, output_format)
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mb()
+        if history:
+            app.history_store().close(600)
+        return {
+            'rows': count,
+            'upload_mb': os.path.getsize(large) / (1024 * 1024),
+            'response_mb': size / (1024 * 1024),
+            'rows_per_s': count / elapsed,
+            'baseline_mb': baseline,
+            'peak_growth_mb': peak - baseline,
+        }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    count = int(args[0]) if args else 1_000_000
+    output_format = args[1] if len(args) > 1 else 'full'
+    result = measure(count, output_format, history='--no-history' not in sys.argv, uniform='--uniform' in sys.argv)
+    print(f"upload   {result['upload_mb']:>10,.1f} MB  ->  response {result['response_mb']:,.1f} MB")
+    print(f"analyze  {result['rows_per_s']:>10,.0f} rows/s")
+    print(f"peak RSS {result['peak_growth_mb']:>+10,.1f} MB over {result['baseline_mb']:,.1f} MB after warm-up")
+
+
+if __name__ == '__main__':
+    main()
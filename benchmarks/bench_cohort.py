@@ -0,0 +1,59 @@
+"""
+Benchmark: binary cohort files (open, full statistics scan, random row access)
+Chạy: python benchmarks/bench_cohort.py [số học viên]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cohort_format import CohortFile, write_cohort, RECORD_SIZE
+from cohort_stats import cohort_stats
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        row = {'student_name': f"Học viên {i}", 'student_id': f"HV{i:08d}"}
+        for skill in SKILLS:
+            row[skill] = rng.randint(6, 18) / 2
+        yield row
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = os.path.join(tempfile.gettempdir(), f"bench_cohort_{count}.ielts")
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        write_cohort(make_rows(count), path)
+        print(f"write    {count / (time.perf_counter() - start):>14,.0f} rows/s")
+
+    start = time.perf_counter()
+    cohort = CohortFile(path)
+    print(f"open     {(time.perf_counter() - start) * 1e6:>14,.0f} µs")
+
+    start = time.perf_counter()
+    stats = cohort_stats(cohort)
+    elapsed = time.perf_counter() - start
+    print(f"scan     {count / elapsed:>14,.0f} rows/s   {count * RECORD_SIZE / elapsed / 1e9:>6.2f} GB/s")
+
+    rng = random.Random(7)
+    picks = [rng.randrange(count) for _ in range(10000)]
+    start = time.perf_counter()
+    for index in picks:
+        cohort[index]
+    print(f"analyze  {len(picks) / (time.perf_counter() - start):>14,.0f} random rows/s")
+
+    print(f"overall mean {stats.overall.mean():.2f} over {stats.rows:,} students")
+    cohort.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: name search index vs a normalizing linear scan over stored students
+Chạy: python benchmarks/bench_name_index.py [số học viên]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_index import NameIndex, fold
+
+FAMILY = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Huỳnh', 'Phan', 'Vũ', 'Võ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ', 'Ngô']
+MIDDLE = ['Văn', 'Thị', 'Hữu', 'Đức', 'Minh', 'Ngọc', 'Thanh', 'Quốc', 'Gia', 'Bảo', 'Hoài', 'Xuân', 'Kim', 'Thu']
+GIVEN = ['An', 'Ân', 'Bình', 'Chi', 'Dũng', 'Đạt', 'Giang', 'Hà', 'Hải', 'Hạnh', 'Hiếu', 'Hoa', 'Hùng', 'Khang',
+         'Khánh', 'Lan', 'Linh', 'Long', 'Mai', 'Nam', 'Nga', 'Nhung', 'Phúc', 'Quân', 'Sơn', 'Tâm', 'Thảo',
+         'Trang', 'Tú', 'Tuấn', 'Vy', 'Yến', 'Thư', 'Uyên', 'Vinh', 'Quang', 'Kiên', 'Duy', 'Trung', 'Phương']
+
+QUERIES = ['Nguyen Van An', 'tran duc', 'dang thi ng', 'le minh kh', 'vy bui', 'hai']
+
+
+def make_students(count: int):
+    rng = random.Random(42)
+    return [
+        (f'HV{i:06d}', f'{rng.choice(FAMILY)} {rng.choice(MIDDLE)} {rng.choice(GIVEN)}', float(i))
+        for i in range(count)
+    ]
+
+
+def scan(students, query: str):
+    """Fold every stored name per query, as a lookup without the index would"""
+    terms = fold(query).split()
+    return [s for s in students if all(any(t.startswith(q) for t in fold(s[1]).split()) for q in terms)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    students = make_students(count)
+
+    start = time.perf_counter()
+    index = NameIndex()
+    index.add_rows((student_id, name, name.casefold(), at) for student_id, name, at in students)
+    print(f"build                  {time.perf_counter() - start:8.2f} s for {count:,} students")
+
+    sample = students[:min(count, 20_000)]
+    for query in QUERIES:
+        start = time.perf_counter()
+        scan(sample, query)
+        scanned = (time.perf_counter() - start) * count / len(sample)
+
+        runs = 200
+        start = time.perf_counter()
+        for _ in range(runs):
+            index.search(query)
+        indexed = (time.perf_counter() - start) / runs
+        print(f"{query!r:<22} scan {scanned * 1000:9.1f} ms   index {indexed * 1000:7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
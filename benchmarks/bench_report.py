@@ -0,0 +1,51 @@
+"""
+Benchmark: report rendering throughput
+Chạy: python benchmarks/bench_report.py [số báo cáo]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_writer import render_report_bytes, iter_reports_zip
+from ielts_engine import analyze_scores_rule_based
+
+HALF_BANDS = [x / 2 for x in range(6, 19)]
+
+
+def make_analyses(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        analyze_scores_rule_based(
+            {skill: rng.choice(HALF_BANDS) for skill in ('listening', 'speaking', 'reading', 'writing')},
+            f"Học viên {i}"
+        )
+        for i in range(count)
+    ]
+
+
+def bench(label: str, count: int, func):
+    start = time.perf_counter()
+    total_bytes = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count / elapsed:>12,.0f} reports/s   {total_bytes / elapsed / 1e6:>8.1f} MB/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    analyses = make_analyses(count)
+    generated_at = datetime.now()
+
+    print(f"Rendering {count:,} reports")
+    bench("compiled template", count,
+          lambda: sum(len(render_report_bytes(a, generated_at)) for a in analyses))
+    bench("zip stream (deflate)", count,
+          lambda: sum(len(chunk) for chunk in iter_reports_zip(analyses, generated_at)))
+
+
+if __name__ == '__main__':
+    main()
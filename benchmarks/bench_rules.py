@@ -0,0 +1,78 @@
+"""
+Benchmark: compiled rules vs the previous hand-coded checks (levels, strengths, statuses, targets)
+Chạy: python benchmarks/bench_rules.py [số học viên]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ielts_engine import calculate_overall, analyze_profile
+from rules import RULES
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+
+def make_scores(count: int):
+    rng = random.Random(42)
+    return [{skill: rng.randint(6, 18) / 2 for skill in SKILLS} for _ in range(count)]
+
+
+def old_score_level(score: float) -> str:
+    """ielts_engine.get_score_level before rules.py"""
+    if score >= 7:
+        return 'high'
+    elif score >= 5:
+        return 'medium'
+    return 'low'
+
+
+def hand_coded(scores: dict):
+    """The checks as ielts_engine wrote them before rules.py"""
+    overall = calculate_overall(scores)
+    out = []
+    for skill in SKILLS:
+        score = scores[skill]
+        level = old_score_level(score)
+        strong = score >= overall
+        status = ('excellent' if score >= 7 else 'good') if strong else 'needs_work'
+        out.append((level, strong, status, min(9, score + 1)))
+    return out, min(9, overall + 0.5)
+
+
+def compiled(scores: dict):
+    overall = calculate_overall(scores)
+    level, is_strength, status, target = RULES.level, RULES.is_strength, RULES.status, RULES.weakest_target
+    out = []
+    for skill in SKILLS:
+        score = scores[skill]
+        strong = is_strength(score, overall)
+        out.append((level(score), strong, status(score) if strong else 'needs_work', target(score)))
+    return out, RULES.overall_target(overall)
+
+
+def timed(label: str, count: int, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {count / elapsed:>14,.0f} students/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    students = make_scores(count)
+
+    assert [hand_coded(s) for s in students[:1000]] == [compiled(s) for s in students[:1000]]
+
+    timed("hand-coded", count, lambda: [hand_coded(s) for s in students])
+    timed("compiled closures", count, lambda: [compiled(s) for s in students])
+
+    sample = students[:min(count, 20_000)]
+    timed("full analyze_profile", len(sample), lambda: [analyze_profile(s) for s in sample])
+
+
+if __name__ == '__main__':
+    main()
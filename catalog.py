@@ -0,0 +1,213 @@
+"""
+IELTS Score Analyzer - Recommendation Catalog
+Band descriptions, skill names, labels and recommendations loaded from catalog.json
+
+The file is parsed into an immutable Catalog, pre-indexed by (skill, level).
+A watcher thread polls the file and swaps in a rebuilt Catalog by replacing a
+single module reference, so readers never lock: take get_catalog() once per
+analysis and read everything from that snapshot.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from types import MappingProxyType
+
+CATALOG_PATH = os.getenv(
+    'IELTS_CATALOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.json')
+)
+CATALOG_POLL_SECONDS = float(os.getenv('CATALOG_POLL_SECONDS', '2'))
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+LEVELS = ('low', 'medium', 'high')
+STATUSES = ('excellent', 'good', 'needs_work')
+BANDS = range(1, 10)
+
+
+class CatalogError(ValueError):
+    """Raised when a catalog file is missing, unreadable or incomplete"""
+    pass
+
+
+def _text(value, where: str) -> str:
+    if not isinstance(value, str):
+        raise CatalogError(f"{where}: expected a string")
+    return value
+
+
+def _texts(value, where: str) -> tuple:
+    if not isinstance(value, list) or not value:
+        raise CatalogError(f"{where}: expected a non-empty list of strings")
+    return tuple(_text(item, f"{where}[{i}]") for i, item in enumerate(value))
+
+
+def _table(data: dict, name: str) -> dict:
+    table = data.get(name)
+    if not isinstance(table, dict):
+        raise CatalogError(f"{name}: expected an object")
+    return table
+
+
+class Catalog:
+    """One immutable version of the catalog tables"""
+
+    __slots__ = (
+        'skill_names', 'band_descriptions', 'status_labels', 'maintain_suffix',
+        'action_items', 'recommendations', 'advice', 'version', 'source', 'stamp'
+    )
+
+    def __init__(self, data: dict, source: str = None, stamp: tuple = None):
+        if not isinstance(data, dict):
+            raise CatalogError("Catalog must be a JSON object")
+        skill_names = _table(data, 'skill_names')
+        bands = _table(data, 'band_descriptions')
+        statuses = _table(data, 'status_labels')
+        recommendations = _table(data, 'recommendations')
+
+        advice = {}
+        for skill in SKILLS:
+            levels = recommendations.get(skill)
+            if not isinstance(levels, dict):
+                raise CatalogError(f"recommendations.{skill}: expected an object")
+            for level in LEVELS:
+                advice[(skill, level)] = _texts(levels.get(level), f"recommendations.{skill}.{level}")
+
+        set_ = object.__setattr__
+        set_(self, 'skill_names', MappingProxyType(
+            {skill: _text(skill_names.get(skill), f"skill_names.{skill}") for skill in SKILLS}
+        ))
+        set_(self, 'band_descriptions', MappingProxyType(
+            {band: _text(bands.get(str(band)), f"band_descriptions.{band}") for band in reversed(BANDS)}
+        ))
+        set_(self, 'status_labels', MappingProxyType(
+            {status: _text(statuses.get(status), f"status_labels.{status}") for status in STATUSES}
+        ))
+        set_(self, 'maintain_suffix', _text(data.get('maintain_suffix'), 'maintain_suffix'))
+        set_(self, 'action_items', _texts(data.get('action_items'), 'action_items'))
+        set_(self, 'advice', MappingProxyType(advice))
+        set_(self, 'recommendations', MappingProxyType({
+            skill: MappingProxyType({level: advice[(skill, level)] for level in LEVELS}) for skill in SKILLS
+        }))
+        set_(self, 'version', hashlib.blake2b(
+            json.dumps(self.to_json(), ensure_ascii=False, sort_keys=True).encode('utf-8'), digest_size=6
+        ).hexdigest())
+        set_(self, 'source', source)
+        set_(self, 'stamp', stamp)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog is immutable; load a new one instead")
+
+    def band_description(self, band: int) -> str:
+        return self.band_descriptions[max(1, min(9, band))]
+
+    def to_json(self) -> dict:
+        """Same layout as catalog.json"""
+        return {
+            'skill_names': dict(self.skill_names),
+            'band_descriptions': {str(band): text for band, text in self.band_descriptions.items()},
+            'status_labels': dict(self.status_labels),
+            'maintain_suffix': self.maintain_suffix,
+            'action_items': list(self.action_items),
+            'recommendations': {
+                skill: {level: list(items) for level, items in levels.items()}
+                for skill, levels in self.recommendations.items()
+            },
+        }
+
+
+def _stamp(path: str) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_catalog(path: str = CATALOG_PATH) -> Catalog:
+    try:
+        stamp = _stamp(path)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CatalogError(f"Cannot read catalog {path}: {e}") from e
+    return Catalog(data, source=path, stamp=stamp)
+
+
+_CURRENT = load_catalog()
+
+
+def get_catalog() -> Catalog:
+    """The catalog in effect; a plain reference read, never blocks"""
+    return _CURRENT
+
+
+def set_catalog(catalog: Catalog) -> Catalog:
+    """Swap in a new catalog; analyses already running keep their snapshot"""
+    global _CURRENT
+    previous, _CURRENT = _CURRENT, catalog
+    return previous
+
+
+def reload_catalog(path: str = None) -> Catalog:
+    """Load and swap in the catalog file; on error the current one stays"""
+    catalog = load_catalog(path or _CURRENT.source or CATALOG_PATH)
+    set_catalog(catalog)
+    return catalog
+
+
+# =============================================================================
+# FILE WATCHER
+# =============================================================================
+
+class CatalogWatcher(threading.Thread):
+    """Polls the catalog file and reloads it when its mtime or size changes"""
+
+    def __init__(self, path: str = CATALOG_PATH, interval: float = CATALOG_POLL_SECONDS):
+        super().__init__(name='catalog-watcher', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.seen = _CURRENT.stamp if _CURRENT.source == path else None
+        self._stopped = threading.Event()
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; True if swapped"""
+        try:
+            stamp = _stamp(self.path)
+        except OSError:
+            return False
+        if stamp == self.seen:
+            return False
+        # Remember the stamp even if loading fails, so a bad edit is reported once
+        self.seen = stamp
+        try:
+            catalog = load_catalog(self.path)
+        except CatalogError as e:
+            print(f"Catalog reload failed, keeping version {_CURRENT.version}: {e}", file=sys.stderr)
+            return False
+        if catalog.version == _CURRENT.version:
+            return False
+        set_catalog(catalog)
+        print(f"Catalog reloaded: version {catalog.version}", file=sys.stderr)
+        return True
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_WATCHER = None
+_WATCHER_LOCK = threading.Lock()
+
+
+def start_watcher(path: str = None, interval: float = CATALOG_POLL_SECONDS) -> CatalogWatcher:
+    """Start the polling watcher once per process; interval <= 0 disables it"""
+    global _WATCHER
+    if interval <= 0:
+        return None
+    with _WATCHER_LOCK:
+        if _WATCHER is None:
+            _WATCHER = CatalogWatcher(path or _CURRENT.source or CATALOG_PATH, interval)
+            _WATCHER.start()
+        return _WATCHER
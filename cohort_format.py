@@ -0,0 +1,273 @@
+"""
+IELTS Score Analyzer - Binary Cohort Format
+Fixed-width cohort files that are memory-mapped instead of re-parsed
+
+Layout (little-endian):
+    header   64 bytes   magic, version, record size, count, section offsets
+    records  16 bytes   4 x uint8 score*2 (255 = invalid), name and ID
+                        as (uint32 offset, uint16 length) into the string table
+    strings             UTF-8 names and IDs, back to back
+
+Opening a cohort only reads the header; records are read straight from the
+mapped pages.
+
+Usage: python cohort_format.py roster.csv cohort.ielts
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from itertools import islice
+
+from ielts_engine import analyze_scores_rule_based
+from batch_validation import validate_columns, SKILLS
+from roster_io import iter_roster_rows
+
+# Optional: zero-copy column views when numpy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b'IELTSCH1'
+VERSION = 1
+COHORT_EXTENSION = '.ielts'
+
+HEADER = struct.Struct('<8sHHIQQQQ')   # magic, version, record size, flags, count, 3 offsets/sizes
+HEADER_SIZE = 64
+RECORD = struct.Struct('<4BIHIH')
+RECORD_SIZE = RECORD.size              # 16
+
+INVALID_SCORE = 0xFF
+MAX_STRING_BYTES = 0xFFFF
+MAX_STRING_TABLE = 0xFFFFFFFF
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([
+        ('scores', 'u1', (4,)),
+        ('name_offset', '<u4'), ('name_length', '<u2'),
+        ('id_offset', '<u4'), ('id_length', '<u2'),
+    ])
+    assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+
+class CohortFormatError(ValueError):
+    """File that is not a readable cohort"""
+
+
+# =============================================================================
+# WRITER
+# =============================================================================
+
+def _encode_string(value, strings, offset: int):
+    data = b'' if value is None else str(value).encode('utf-8')
+    if len(data) > MAX_STRING_BYTES:
+        data = data[:MAX_STRING_BYTES].decode('utf-8', 'ignore').encode('utf-8')
+    if offset + len(data) > MAX_STRING_TABLE:
+        raise CohortFormatError("String table exceeds 4 GB")
+    strings.write(data)
+    return offset, len(data)
+
+
+def write_cohort(rows, dest, chunk_rows: int = 65536) -> int:
+    """
+    Write roster rows (dicts with student_name, student_id and the four
+    scores) to a cohort file. Invalid scores are stored as INVALID_SCORE.
+    Returns the number of records written.
+    """
+    count = 0
+    string_size = 0
+    rows = iter(rows)
+    with open(dest, 'wb') as out, tempfile.TemporaryFile() as strings:
+        out.write(b'\0' * HEADER_SIZE)
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            columns = {skill: [row.get(skill) for row in chunk] for skill in SKILLS}
+            validation = validate_columns(columns, len(chunk))
+            invalid = validation.invalid_rows
+
+            records = bytearray(RECORD_SIZE * len(chunk))
+            for index, row in enumerate(chunk):
+                bad = invalid.get(index, {})
+                doubled = [
+                    INVALID_SCORE if skill in bad else int(validation.values[skill][index] * 2)
+                    for skill in SKILLS
+                ]
+                name_offset, name_length = _encode_string(row.get('student_name'), strings, string_size)
+                string_size += name_length
+                id_offset, id_length = _encode_string(row.get('student_id'), strings, string_size)
+                string_size += id_length
+                RECORD.pack_into(records, index * RECORD_SIZE, *doubled,
+                                 name_offset, name_length, id_offset, id_length)
+            out.write(records)
+            count += len(chunk)
+
+        strings_offset = HEADER_SIZE + count * RECORD_SIZE
+        strings.seek(0)
+        shutil.copyfileobj(strings, out, 1024 * 1024)
+
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, 0, count,
+                              HEADER_SIZE, strings_offset, string_size))
+    return count
+
+
+def convert_roster(src, dest) -> int:
+    """Convert a CSV/XLSX/JSON roster file to the cohort format"""
+    with open(src, 'rb') as stream:
+        return write_cohort(iter_roster_rows(stream, os.fspath(src)), dest)
+
+
+# =============================================================================
+# READER
+# =============================================================================
+
+class CohortFile:
+    """
+    Read-only, memory-mapped cohort. Accepts a path, an open binary file or
+    an in-memory buffer. Indexing returns the rule-based analysis of a row.
+    """
+
+    def __init__(self, source):
+        self._file = None
+        self._map = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.buffer = memoryview(source)
+        else:
+            if isinstance(source, (str, os.PathLike)):
+                self._file = source = open(source, 'rb')
+            else:
+                source.flush()
+            if os.fstat(source.fileno()).st_size < HEADER_SIZE:
+                self.close()
+                raise CohortFormatError("Not a cohort file")
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffer = memoryview(self._map)
+
+        if len(self.buffer) < HEADER_SIZE:
+            self.close()
+            raise CohortFormatError("Not a cohort file")
+        (magic, version, record_size, _flags, self.count,
+         self.records_offset, self.strings_offset, strings_size) = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise CohortFormatError("Not a cohort file (or unsupported version)")
+        if self.strings_offset + strings_size > len(self.buffer):
+            self.close()
+            raise CohortFormatError("Truncated cohort file")
+
+        self._records = self.buffer[self.records_offset:self.strings_offset]
+        self._strings = self.buffer[self.strings_offset:self.strings_offset + strings_size]
+        self.records = (
+            np.frombuffer(self._records, dtype=RECORD_DTYPE, count=self.count)
+            if np is not None else None
+        )
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, index: int):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return RECORD.unpack_from(self._records, index * RECORD_SIZE)
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._strings[offset:offset + length], 'utf-8')
+
+    def name(self, index: int) -> str:
+        record = self._record(index)
+        return self._string(record[4], record[5])
+
+    def student_id(self, index: int) -> str:
+        record = self._record(index)
+        return self._string(record[6], record[7])
+
+    def scores(self, index: int) -> dict:
+        """Scores of one row; invalid scores are None"""
+        return {
+            skill: None if doubled == INVALID_SCORE else doubled / 2
+            for skill, doubled in zip(SKILLS, self._record(index)[:4])
+        }
+
+    def row(self, index: int) -> dict:
+        """One record as a roster row"""
+        record = self._record(index)
+        row = {
+            'student_name': self._string(record[4], record[5]),
+            'student_id': self._string(record[6], record[7]),
+        }
+        for skill, doubled in zip(SKILLS, record[:4]):
+            row[skill] = None if doubled == INVALID_SCORE else doubled / 2
+        return row
+
+    def iter_rows(self, start: int = 0, stop: int = None):
+        for index in range(start, self.count if stop is None else stop):
+            yield self.row(index)
+
+    def is_valid(self, index: int) -> bool:
+        return INVALID_SCORE not in self._record(index)[:4]
+
+    def __getitem__(self, index: int) -> dict:
+        record = self._record(index)
+        if INVALID_SCORE in record[:4]:
+            raise ValueError(f"Row {index} has invalid scores")
+        scores = {skill: doubled / 2 for skill, doubled in zip(SKILLS, record[:4])}
+        return analyze_scores_rule_based(scores, self._string(record[4], record[5]))
+
+    def doubled_scores(self, start: int = 0, stop: int = None):
+        """
+        (rows, 4) uint8 view of score*2 without copying (numpy), or a flat
+        list of the same values in SKILLS order.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        if self.records is not None:
+            return self.records['scores'][start:stop]
+        values = []
+        for record in RECORD.iter_unpack(self._records[start * RECORD_SIZE:stop * RECORD_SIZE]):
+            values.extend(record[:4])
+        return values
+
+    def close(self):
+        self.records = None
+        for view in (getattr(self, '_records', None), getattr(self, '_strings', None),
+                     getattr(self, 'buffer', None)):
+            if view is not None:
+                try:
+                    view.release()
+                except BufferError:
+                    pass  # a column view is still in use; the map goes with it
+        self._records = self._strings = self.buffer = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def is_cohort(prefix: bytes) -> bool:
+    return prefix[:len(MAGIC)] == MAGIC
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    written = convert_roster(sys.argv[1], sys.argv[2])
+    print(f"{written} students -> {sys.argv[2]}")
@@ -0,0 +1,269 @@
+"""
+IELTS Score Analyzer - Cohort Statistics
+Band distributions and summary statistics from one pass over score*2 columns
+
+Scores are half-bands, so a cohort's distribution is exactly a 19-bin
+histogram per skill. Every statistic (mean, spread, quantiles, levels) is
+derived from the histograms, and histograms from different files or chunks
+merge by adding counts.
+"""
+
+import math
+
+from rules import RULES
+from batch_validation import SKILLS
+from cohort_format import INVALID_SCORE
+
+# Optional: vectorized counting when numpy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HALF_BANDS = 19          # 0.0, 0.5, ... 9.0
+DOUBLED_SUMS = 73        # sum of the four score*2 values, 0..72
+
+# Overall band (as score*2) for each sum of doubled scores; matches
+# calculate_overall(), including Python's round-half-to-even
+OVERALL_BY_SUM = [round(total / 4) for total in range(DOUBLED_SUMS)]
+
+
+class BandHistogram:
+    """Counts per half-band; index i is band i / 2"""
+
+    __slots__ = ('counts',)
+
+    def __init__(self, counts=None):
+        self.counts = [int(n) for n in counts] if counts is not None else [0] * HALF_BANDS
+
+    def merge(self, other: 'BandHistogram') -> 'BandHistogram':
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        return self
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def mean(self) -> float:
+        n = self.count
+        return sum(i * c for i, c in enumerate(self.counts)) / 2 / n if n else 0.0
+
+    def std(self) -> float:
+        n = self.count
+        if not n:
+            return 0.0
+        mean = self.mean()
+        return math.sqrt(sum(c * (i / 2 - mean) ** 2 for i, c in enumerate(self.counts)) / n)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank quantile, exact for half-band data"""
+        n = self.count
+        if not n:
+            return 0.0
+        rank = max(1, math.ceil(q * n))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return i / 2
+        return (HALF_BANDS - 1) / 2
+
+    def levels(self) -> dict:
+        levels = {'high': 0, 'medium': 0, 'low': 0}
+        for level, c in zip(RULES.half_band_levels, self.counts):
+            levels[level] += c
+        return levels
+
+    def to_json(self) -> dict:
+        n = self.count
+        bands = [i for i, c in enumerate(self.counts) if c]
+        return {
+            'count': n,
+            'mean': round(self.mean(), 3),
+            'std': round(self.std(), 3),
+            'min': bands[0] / 2 if bands else None,
+            'max': bands[-1] / 2 if bands else None,
+            'p25': self.quantile(0.25),
+            'median': self.quantile(0.5),
+            'p75': self.quantile(0.75),
+            'levels': self.levels(),
+            'distribution': {f"{i / 2:.1f}": self.counts[i] for i in bands},
+        }
+
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations (Welford), mergeable across shards"""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def add_values(self, values):
+        """Fold in a block of values through its own moments"""
+        if np is not None and isinstance(values, np.ndarray):
+            if len(values):
+                block_mean = float(values.mean())
+                self.merge(RunningMoments(len(values), block_mean, float(((values - block_mean) ** 2).sum())))
+            return
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        """Chan et al. pairwise update"""
+        if not other.n:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        return self
+
+    def variance(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+
+    def to_json(self) -> dict:
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2}
+
+
+class CohortStats:
+    """Per-skill and overall histograms for a set of students"""
+
+    def __init__(self):
+        self.rows = 0
+        self.invalid_rows = 0
+        self.skills = {skill: BandHistogram() for skill in SKILLS}
+        self.overall = BandHistogram()
+
+    def merge(self, other: 'CohortStats') -> 'CohortStats':
+        self.rows += other.rows
+        self.invalid_rows += other.invalid_rows
+        for skill in SKILLS:
+            self.skills[skill].merge(other.skills[skill])
+        self.overall.merge(other.overall)
+        return self
+
+    def add_doubled(self, doubled):
+        """
+        Count a block of score*2 values: a (rows, 4) uint8 array, or a flat
+        sequence in SKILLS order. INVALID_SCORE marks a missing/bad score;
+        such rows still count for their valid skills but not for overall.
+        """
+        if np is not None and isinstance(doubled, np.ndarray):
+            self._add_array(doubled)
+            return
+
+        skill_counts = [hist.counts for hist in self.skills.values()]
+        overall = self.overall.counts
+        for base in range(0, len(doubled), 4):
+            row = doubled[base:base + 4]
+            self.rows += 1
+            if INVALID_SCORE in row:
+                self.invalid_rows += 1
+                for counts, value in zip(skill_counts, row):
+                    if value != INVALID_SCORE:
+                        counts[value] += 1
+                continue
+            for counts, value in zip(skill_counts, row):
+                counts[value] += 1
+            overall[OVERALL_BY_SUM[sum(row)]] += 1
+
+    def _add_array(self, doubled):
+        self.rows += len(doubled)
+        for k, skill in enumerate(SKILLS):
+            counts = np.bincount(doubled[:, k], minlength=256)
+            self.skills[skill].merge(BandHistogram(counts[:HALF_BANDS]))
+
+        # Column-wise adds beat axis=1 reductions on 4-wide rows. A valid row
+        # sums to at most 72 and any INVALID_SCORE pushes the sum past 255,
+        # so the first DOUBLED_SUMS bins hold exactly the valid rows.
+        sums = doubled[:, 0].astype(np.uint16)
+        for k in range(1, len(SKILLS)):
+            sums += doubled[:, k]
+        by_sum = np.bincount(sums, minlength=DOUBLED_SUMS)
+        valid = by_sum[:DOUBLED_SUMS]
+        self.invalid_rows += len(doubled) - int(valid.sum())
+        overall = np.bincount(OVERALL_BY_SUM_ARRAY, weights=valid, minlength=HALF_BANDS)
+        self.overall.merge(BandHistogram(overall))
+
+    def add_scores(self, scores: dict):
+        """Count one student given as {skill: score or None}"""
+        self.add_doubled([
+            INVALID_SCORE if scores.get(skill) is None else int(scores[skill] * 2)
+            for skill in SKILLS
+        ])
+
+    def to_state(self) -> dict:
+        """Raw counts, for merging later (see from_state)"""
+        return {
+            'rows': self.rows,
+            'invalid_rows': self.invalid_rows,
+            'skills': {skill: hist.counts for skill, hist in self.skills.items()},
+            'overall': self.overall.counts,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'CohortStats':
+        stats = cls()
+        stats.rows = state['rows']
+        stats.invalid_rows = state['invalid_rows']
+        stats.skills = {skill: BandHistogram(state['skills'][skill]) for skill in SKILLS}
+        stats.overall = BandHistogram(state['overall'])
+        return stats
+
+    def to_json(self) -> dict:
+        return {
+            'rows': self.rows,
+            'invalid_rows': self.invalid_rows,
+            'overall': self.overall.to_json(),
+            'skills': {skill: hist.to_json() for skill, hist in self.skills.items()},
+        }
+
+
+if np is not None:
+    OVERALL_BY_SUM_ARRAY = np.array(OVERALL_BY_SUM, dtype=np.intp)
+
+
+def doubled_from_validation(validation):
+    """
+    score*2 block for a batch_validation.ColumnValidation, in the layout
+    add_doubled() takes; invalid cells become INVALID_SCORE.
+    """
+    invalid = {skill: set() for skill in SKILLS}
+    for skill, reasons in validation.errors.items():
+        for rows in reasons.values():
+            invalid[skill].update(rows)
+
+    if np is not None:
+        doubled = np.empty((validation.row_count, len(SKILLS)), dtype=np.uint8)
+        for k, skill in enumerate(SKILLS):
+            column = np.asarray(validation.values[skill], dtype=np.float64) * 2
+            bad = np.zeros(validation.row_count, dtype=bool)
+            bad[list(invalid[skill])] = True
+            doubled[:, k] = np.where(bad, INVALID_SCORE, np.nan_to_num(column)).astype(np.uint8)
+        return doubled
+
+    doubled = []
+    for row in range(validation.row_count):
+        doubled.extend(
+            INVALID_SCORE if row in invalid[skill] else int(validation.values[skill][row] * 2)
+            for skill in SKILLS
+        )
+    return doubled
+
+
+def cohort_stats(cohort, chunk_rows: int = 1 << 20) -> CohortStats:
+    """Scan a CohortFile in fixed-size blocks of records"""
+    stats = CohortStats()
+    for start in range(0, len(cohort), chunk_rows):
+        stats.add_doubled(cohort.doubled_scores(start, start + chunk_rows))
+    return stats
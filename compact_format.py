@@ -0,0 +1,162 @@
+"""
+IELTS Score Analyzer - Compact Batch Format
+Normalized batch output that lists every static string once and refers to it by index
+
+Layout of a compact batch response:
+
+    {
+      "format": "compact",
+      "dictionary": {
+        "strings": ["Nghe (Listening)", ...],
+        "skills": ["listening", "speaking", "reading", "writing"],
+        "skill_labels": [0, 1, 2, 3]
+      },
+      "results": [
+        {
+          "student_name": "...",
+          "overall": 6.5,
+          "band_description": 4,
+          "scores": [7.5, 6.5, 5.5, 5.0],
+          "strengths": [[label, score, status], ...],
+          "weaknesses": [[label, score, status], ...],
+          "summary": "...",
+          "recommendations": [[label, score, [item, ...]], ...],
+          "action_items": [item, ...],
+          "analyzed_at": "..."
+        }
+      ]
+    }
+
+Every label, status, band description, recommendation and action item is
+either an integer index into "strings" or, when it is not a static string,
+the text itself. Rows with an "error" key are passed through unchanged.
+
+Batches serialize compact rows like full ones: the name-independent parts
+are encoded once per score profile (encode_compact_profile) and only the
+name, summary and timestamp are spliced in per student.
+"""
+
+from ielts_engine import SUMMARY_PREFIX, personalize_analysis
+from json_serializer import dumps as json_dumps, FRAGMENTS
+
+COMPACT_FORMAT = 'compact'
+
+# compact_row() keys that do not depend on the student
+_PROFILE_HEAD = ('overall', 'band_description', 'scores', 'strengths', 'weaknesses')
+_PROFILE_TAIL = ('recommendations', 'action_items')
+
+
+class StringDictionary:
+    """Static strings of the rule tables, indexed once"""
+
+    def __init__(self, strings: list, skills: list, skill_labels: list):
+        self.strings = list(dict.fromkeys(strings))
+        self.index = {text: i for i, text in enumerate(self.strings)}
+        self.skills = list(skills)
+        self.skill_labels = [self.index[label] for label in skill_labels]
+
+    @classmethod
+    def from_tables(cls, skill_names: dict, band_descriptions: dict, recommendations: dict,
+                    status_labels: dict, maintain_suffix: str, action_items: list):
+        """Collect every static string the rule-based analysis can emit"""
+        strings = list(skill_names.values())
+        strings.extend(label + maintain_suffix for label in skill_names.values())
+        strings.extend(status_labels.values())
+        strings.extend(band_descriptions[band] for band in sorted(band_descriptions))
+        for skill in skill_names:
+            for level in ('low', 'medium', 'high'):
+                strings.extend(recommendations[skill][level])
+        strings.extend(action_items)
+        return cls(strings, skill_names, skill_names.values())
+
+    def ref(self, text):
+        """Index of a static string, or the text itself"""
+        return self.index.get(text, text)
+
+    def to_json(self) -> dict:
+        return {
+            'strings': self.strings,
+            'skills': self.skills,
+            'skill_labels': self.skill_labels,
+        }
+
+
+def compact_row(analysis: dict, dictionary: StringDictionary) -> dict:
+    """Convert one analysis into its compact row"""
+    if 'error' in analysis:
+        return analysis
+
+    ref = dictionary.ref
+    return {
+        'student_name': analysis['student_name'],
+        'overall': analysis['overall'],
+        'band_description': ref(analysis['band_description']),
+        'scores': [skill['score'] for skill in analysis['skills']],
+        'strengths': [[ref(s['skill']), s['score'], ref(s.get('status', ''))] for s in analysis['strengths']],
+        'weaknesses': [[ref(w['skill']), w['score'], ref(w.get('status', ''))] for w in analysis['weaknesses']],
+        'summary': analysis['summary'],
+        'recommendations': [
+            [ref(rec['skill']), rec['score'], [ref(item) for item in rec['items']]]
+            for rec in analysis['recommendations']
+        ],
+        'action_items': [ref(item) for item in analysis['action_items']],
+        'analyzed_at': analysis['analyzed_at'],
+    }
+
+
+def _members(row: dict, keys: tuple) -> bytes:
+    """',"key":value...' for some keys of a row, as json_dumps would write them"""
+    return b',' + json_dumps({key: row[key] for key in keys})[1:-1]
+
+
+def encode_compact_profile(profile: dict, dictionary: StringDictionary) -> tuple:
+    """Pre-encoded parts of the compact rows of an analyze_profile() result"""
+    row = compact_row(personalize_analysis(profile, ''), dictionary)
+    return _members(row, _PROFILE_HEAD), profile['summary'], _members(row, _PROFILE_TAIL)
+
+
+def encode_compact_personalized(parts: tuple, student_name, analyzed_at: str) -> bytes:
+    """Same bytes as json_dumps(compact_row(personalize_analysis(...))), from encode_compact_profile() parts"""
+    head, summary, tail = parts
+    text = FRAGMENTS.text
+    return b''.join((
+        b'{"student_name":', text(student_name),
+        head,
+        b',"summary":', text(f"{SUMMARY_PREFIX}{student_name} {summary}"),
+        tail,
+        b',"analyzed_at":', text(analyzed_at),
+        b'}',
+    ))
+
+
+def expand_row(row: dict, dictionary: dict) -> dict:
+    """
+    Rebuild the full analysis dict from a compact row.
+    Takes the "dictionary" section of a compact response.
+    """
+    if 'error' in row:
+        return row
+
+    strings = dictionary['strings']
+
+    def text(value):
+        return value if isinstance(value, str) else strings[value]
+
+    return {
+        'student_name': row['student_name'],
+        'overall': row['overall'],
+        'band_description': text(row['band_description']),
+        'skills': [
+            {'name': name, 'score': score, 'label': strings[label]}
+            for name, score, label in zip(dictionary['skills'], row['scores'], dictionary['skill_labels'])
+        ],
+        'strengths': [{'skill': text(l), 'score': sc, 'status': text(st)} for l, sc, st in row['strengths']],
+        'weaknesses': [{'skill': text(l), 'score': sc, 'status': text(st)} for l, sc, st in row['weaknesses']],
+        'summary': row['summary'],
+        'recommendations': [
+            {'skill': text(label), 'score': score, 'items': [text(item) for item in items]}
+            for label, score, items in row['recommendations']
+        ],
+        'action_items': [text(item) for item in row['action_items']],
+        'analyzed_at': row['analyzed_at'],
+    }
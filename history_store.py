@@ -0,0 +1,654 @@
+"""
+IELTS Score Analyzer - Analysis History
+Every analysis kept in SQLite (WAL), written behind the request by one thread
+
+record() and record_batch() only put work on a queue; a writer thread turns
+it into rows and commits them in batches, so the analysis path never waits
+on disk. The queue is bounded by the analyses it holds: when the writer falls
+behind, record() waits up to QUEUE_WAIT seconds for room, then drops the
+analysis and counts it in `dropped` (see status()). Reads use their own
+connections and are served by the indexes on student_id, name and analysis
+date.
+
+Result JSON is zlib-compressed against a preset dictionary of the catalog
+strings (about 4x smaller); dictionaries are stored once per catalog version.
+
+AI analysis text (llm_analysis / ai_analysis) is also indexed in an FTS5
+table in the same transaction as its row, for ranked search with snippets.
+"""
+
+import atexit
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import zlib
+from collections import deque
+from datetime import datetime
+
+from batch_validation import SKILLS
+from catalog import get_catalog
+from ielts_engine import calculate_overall
+from json_serializer import dumps as json_dumps
+
+HISTORY_DB = os.getenv('HISTORY_DB', 'ielts_history.db')
+
+# Rows per write transaction
+WRITE_BATCH = 5000
+
+# Analyses waiting for the writer (a queued batch counts its rows and the
+# profile analyses it holds), and how long record() waits for room before
+# the analysis is dropped
+QUEUE_ROWS = 10000
+QUEUE_WAIT = 5.0
+
+# Student IDs per IN (...) query (SQLite limits bound parameters)
+LOOKUP_BATCH = 500
+
+# Default and largest number of rows returned by a query
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id            INTEGER PRIMARY KEY,
+    student_id    TEXT,
+    student_name  TEXT NOT NULL,
+    name_key      TEXT NOT NULL,
+    analyzed_at   REAL NOT NULL,
+    listening     REAL NOT NULL,
+    speaking      REAL NOT NULL,
+    reading       REAL NOT NULL,
+    writing       REAL NOT NULL,
+    overall       REAL NOT NULL,
+    source        TEXT NOT NULL,
+    dictionary    INTEGER NOT NULL,
+    result        BLOB NOT NULL,
+    cohort        TEXT
+);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id            INTEGER PRIMARY KEY,
+    version       TEXT NOT NULL UNIQUE,
+    data          BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_student ON analyses (student_id, analyzed_at)
+    WHERE student_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_analyses_name ON analyses (name_key, analyzed_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_date ON analyses (analyzed_at);
+"""
+
+# Full-text index over AI analysis text; rowid is analyses.id. Needs SQLite built with FTS5.
+TEXT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS analysis_text USING fts5(
+    body, provider UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Keys that hold AI analysis text: Flask (llm_analysis) and desktop (ai_analysis)
+TEXT_KEYS = ('llm_analysis', 'ai_analysis')
+
+# Only these sources can carry AI text; batch and bulk runs are rule-based
+TEXT_SOURCES = ('web', 'desktop')
+
+# Rows read per page when indexing text stored before the index existed
+REINDEX_PAGE = 1000
+
+# Snippet: highlight markers, ellipsis and length in tokens
+SNIPPET_MARKERS = ('[', ']', '…')
+SNIPPET_TOKENS = 16
+
+INSERT = (
+    "INSERT INTO analyses (student_id, student_name, name_key, analyzed_at, "
+    "listening, speaking, reading, writing, overall, source, dictionary, result, cohort) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# zlib only uses the last 32 KB of a preset dictionary
+ZDICT_SIZE = 32768
+
+COLUMNS = ('id', 'student_id', 'student_name', 'analyzed_at') + SKILLS + ('overall', 'source')
+
+
+def name_key(student_name: str) -> str:
+    """Exact-name lookup key: NFC, case-folded, single spaces"""
+    return ' '.join(unicodedata.normalize('NFC', str(student_name)).casefold().split())
+
+
+def _label(value):
+    """Trimmed student_id or cohort, None when empty"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _timestamp(analyzed_at) -> float:
+    if isinstance(analyzed_at, str):
+        try:
+            return datetime.fromisoformat(analyzed_at).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def analysis_text(analysis: dict):
+    """(text, provider) of the AI analysis in a result, or None"""
+    for key in TEXT_KEYS:
+        text = analysis.get(key)
+        # The desktop app stores connection errors as "⚠️ ..." in place of the text
+        if isinstance(text, str) and text.strip() and not text.startswith('⚠️'):
+            return text, analysis.get('llm_provider')
+    return None
+
+
+def match_query(text: str) -> str:
+    """
+    FTS5 MATCH expression from a plain search box: every word or "quoted
+    phrase" must appear; a trailing * keeps prefix search (shadow*).
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', str(text)):
+        term = phrase if phrase else word
+        prefix = not phrase and term.endswith('*')
+        term = term.rstrip('*') if prefix else term
+        if term.replace('"', '').strip():
+            terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    if not terms:
+        raise ValueError('Empty search query')
+    return ' '.join(terms)
+
+
+def catalog_dictionary(catalog) -> bytes:
+    """Preset compression dictionary: the catalog strings as they appear in result JSON"""
+    strings = list(catalog.band_descriptions.values())
+    strings.extend(catalog.status_labels.values())
+    strings.extend(catalog.skill_names.values())
+    strings.extend(catalog.action_items)
+    for items in catalog.advice.values():
+        strings.extend(items)
+    return json_dumps(strings)[-ZDICT_SIZE:]
+
+
+# (dictionary, compressor with it loaded): loading a 32 KB dictionary costs
+# more than compressing a row, so each row starts from a copy instead
+_PRIMED = (None, None)
+
+
+def compress(data: bytes, zdict: bytes) -> bytes:
+    global _PRIMED
+    primed_zdict, primed = _PRIMED
+    if primed_zdict is not zdict and primed_zdict != zdict:
+        primed = zlib.compressobj(6, zdict=zdict)
+        _PRIMED = (zdict, primed)
+    compressor = primed.copy()
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes, zdict: bytes) -> bytes:
+    return zlib.decompressobj(zdict=zdict).decompress(data)
+
+
+def analysis_row(analysis: dict, student_id, source: str, dictionary: tuple, cohort=None) -> tuple:
+    """INSERT parameters for one analysis dict"""
+    dictionary_id, zdict = dictionary
+    scores = {skill['name']: skill['score'] for skill in analysis['skills']}
+    student_name = analysis.get('student_name') or 'Unknown'
+    return (
+        _label(student_id), student_name, name_key(student_name),
+        _timestamp(analysis.get('analyzed_at')),
+        *(scores[skill] for skill in SKILLS), analysis['overall'], source,
+        dictionary_id, compress(json_dumps(analysis), zdict), _label(cohort),
+    )
+
+
+def batch_row(results, index: int, student_ids, source: str, dictionary: tuple, cohort=None) -> tuple:
+    """INSERT parameters for one row of a ResultBatch"""
+    dictionary_id, zdict = dictionary
+    scores = results.row_scores(index)
+    student_name = results.names[index]
+    return (
+        _label(student_ids[index]) if student_ids else None, student_name, name_key(student_name),
+        results.analyzed_at[index], *(scores[skill] for skill in SKILLS),
+        calculate_overall(scores), source, dictionary_id, compress(results.encoded(index), zdict), _label(cohort),
+    )
+
+
+def batch_indexes(results):
+    """Rows of a ResultBatch analyzed in this run (not errors, not reused results)"""
+    return (index for index in range(len(results))
+            if index not in results.errors and index not in results.reused_rows)
+
+
+def queued_rows(item) -> int:
+    """
+    Analyses a queue item keeps in memory: a batch counts its rows plus its
+    profile analyses (each as large as a whole analysis dict). Control items
+    count as one so get() sees them.
+    """
+    kind, payload = item[0], item[1]
+    return max(len(payload) + len(payload.profiles), 1) if kind == 'batch' else 1
+
+
+class RowQueue(queue.Queue):
+    """Queue whose maxsize bounds queued analyses rather than items"""
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.rows = 0
+        self._weights = deque()     # queued_rows() of each item when it was put
+
+    def _qsize(self):
+        return self.rows
+
+    def _put(self, item):
+        # Weighed once: get() must subtract exactly what put() added
+        weight = queued_rows(item)
+        super()._put(item)
+        self._weights.append(weight)
+        self.rows += weight
+
+    def _get(self):
+        self.rows -= self._weights.popleft()
+        return super()._get()
+
+
+class HistoryStore:
+    """SQLite analysis history with a bounded write-behind queue"""
+
+    def __init__(self, path: str = HISTORY_DB, queue_rows: int = QUEUE_ROWS):
+        self.path = path
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0            # analyses not queued because the writer was QUEUE_WAIT behind
+        self._stopped = False       # set when the writer exits through a stop item
+        self._zdicts = {}           # dictionary id -> data, for reads
+        self._dictionary = None     # (catalog version, (id, data)) used by the writer
+        self._listeners = []        # called with every committed list of rows
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            # Stores created before cohorts: existing rows belong to no cohort
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(analyses)")}
+            if 'cohort' not in columns:
+                conn.execute("ALTER TABLE analyses ADD COLUMN cohort TEXT")
+            self.full_text, reindex = self._create_text_index(conn)
+        finally:
+            conn.close()
+        self._queue = RowQueue(queue_rows)
+        if reindex:
+            self._queue.put(('reindex', None, None, None, None))
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+        # Commit what is still queued when the process exits normally
+        atexit.register(self.close, 10)
+
+    def _create_text_index(self, conn) -> tuple:
+        """(FTS5 available, existing rows need indexing)"""
+        existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'analysis_text'"
+        ).fetchone() is not None
+        try:
+            conn.executescript(TEXT_SCHEMA)
+        except sqlite3.OperationalError as e:
+            print(f"History: full-text search unavailable: {e}", file=sys.stderr)
+            return False, False
+        return True, not existed and conn.execute("SELECT 1 FROM analyses LIMIT 1").fetchone() is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # -------------------------------------------------------------------------
+    # Write side
+    # -------------------------------------------------------------------------
+
+    def record(self, analysis: dict, student_id=None, source: str = 'web', cohort: str = None):
+        """Queue one analysis dict; waits only while the queue is full"""
+        self._enqueue(('one', analysis, student_id, source, cohort))
+
+    def record_batch(self, results, student_ids: list = None, source: str = 'batch', cohort: str = None):
+        """Queue the analyzed rows of a finished ResultBatch; waits only while the queue is full"""
+        self._enqueue(('batch', results, student_ids, source, cohort))
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put(item, timeout=QUEUE_WAIT)
+        except queue.Full:
+            count = len(item[1]) if item[0] == 'batch' else 1
+            self.dropped += count
+            print(f"History: writer is behind, dropped {count} analyses", file=sys.stderr)
+
+    def status(self) -> dict:
+        """Writer counters and the analyses still waiting in the queue"""
+        return {
+            'running': self._writer.is_alive(),
+            'queued': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'written': self.written,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+    def subscribe(self, callback):
+        """Call callback(rows) on the writer thread after each commit (INSERT parameter tuples)"""
+        self._listeners.append(callback)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is committed; False if the writer has died"""
+        if not self._writer.is_alive():
+            return self._stopped
+        done = threading.Event()
+        started = time.monotonic()
+        try:
+            self._queue.put(('flush', done, None, None, None), timeout=timeout)
+        except queue.Full:
+            return False
+        if timeout is not None:
+            timeout = max(timeout - (time.monotonic() - started), 0)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None) -> bool:
+        """Commit what is queued and stop the writer; False if it died or did not stop in time"""
+        if self._writer.is_alive():
+            started = time.monotonic()
+            try:
+                self._queue.put(('stop', None, None, None, None), timeout=timeout)
+            except queue.Full:
+                return False
+            if timeout is not None:
+                timeout = max(timeout - (time.monotonic() - started), 0)
+            self._writer.join(timeout)
+        return self._stopped
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                # Block for the first item, then drain whatever else is waiting,
+                # up to WRITE_BATCH analyses so the queue bound also holds in flight
+                items = [self._queue.get()]
+                rows = queued_rows(items[0])
+                try:
+                    while rows < WRITE_BATCH:
+                        items.append(self._queue.get_nowait())
+                        rows += queued_rows(items[-1])
+                except queue.Empty:
+                    pass
+                if not self._write(conn, items):
+                    self._stopped = True
+                    return
+        except BaseException as e:
+            print(f"History: writer stopped, later analyses are not recorded: {e!r}", file=sys.stderr)
+            raise
+        finally:
+            conn.close()
+
+    def _writer_dictionary(self, conn) -> tuple:
+        """(id, data) of the dictionary for the catalog in effect, stored on first use"""
+        catalog = get_catalog()
+        if self._dictionary is None or self._dictionary[0] != catalog.version:
+            zdict = catalog_dictionary(catalog)
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO dictionaries (version, data) VALUES (?, ?)",
+                             (catalog.version, zdict))
+            dictionary_id, zdict = conn.execute(
+                "SELECT id, data FROM dictionaries WHERE version = ?", (catalog.version,)
+            ).fetchone()
+            self._dictionary = (catalog.version, (dictionary_id, bytes(zdict)))
+        return self._dictionary[1]
+
+    def _write(self, conn, items) -> bool:
+        """Commit one drained group; False once a stop item is seen"""
+        rows, documents, waiting, running = [], [], [], True
+        try:
+            for kind, payload, student_id, source, cohort in items:
+                if kind == 'one':
+                    try:
+                        row = analysis_row(payload, student_id, source, self._writer_dictionary(conn), cohort)
+                    except Exception as e:
+                        self._skip(1, e)
+                        continue
+                    text = analysis_text(payload) if self.full_text else None
+                    if text is not None:
+                        documents.append((row, text))
+                    else:
+                        rows.append(row)
+                elif kind == 'batch':
+                    rows = self._add_batch(conn, rows, payload, student_id, source, cohort)
+                elif kind == 'flush':
+                    waiting.append(payload)
+                elif kind == 'reindex':
+                    try:
+                        self._reindex_text(conn)
+                    except Exception as e:
+                        print(f"History: indexing stored AI text failed: {e!r}", file=sys.stderr)
+                else:
+                    running = False
+            self._commit(conn, rows, documents)
+        except Exception as e:
+            # A bad item costs its rows, never the writer thread
+            self._skip(len(rows) + len(documents), e)
+        finally:
+            for done in waiting:
+                done.set()
+        return running
+
+    def _add_batch(self, conn, rows, results, student_ids, source, cohort) -> list:
+        """Append the rows of a ResultBatch, committing every WRITE_BATCH rows"""
+        try:
+            dictionary = self._writer_dictionary(conn)
+            indexes = list(batch_indexes(results))
+        except Exception as e:
+            self._skip(1, e)
+            return rows
+        for index in indexes:
+            try:
+                rows.append(batch_row(results, index, student_ids, source, dictionary, cohort))
+            except Exception as e:
+                self._skip(1, e)
+                continue
+            if len(rows) >= WRITE_BATCH:
+                self._commit(conn, rows)
+                rows = []
+        return rows
+
+    def _skip(self, count: int, error: Exception):
+        self.failed += count
+        print(f"History: skipped {count} analyses: {error!r}", file=sys.stderr)
+
+    def _commit(self, conn, rows, documents=()):
+        """Insert rows, plus rows with AI text and their full-text entries"""
+        if not rows and not documents:
+            return
+        try:
+            with conn:
+                conn.executemany(INSERT, rows)
+                for row, (text, provider) in documents:
+                    rowid = conn.execute(INSERT, row).lastrowid
+                    conn.execute("INSERT INTO analysis_text (rowid, body, provider) VALUES (?, ?, ?)",
+                                 (rowid, text, provider))
+            rows = rows + [row for row, _ in documents]
+            self.written += len(rows)
+        except sqlite3.Error as e:
+            self.failed += len(rows) + len(documents)
+            print(f"History: write failed for {len(rows) + len(documents)} rows: {e}", file=sys.stderr)
+            return
+        for callback in self._listeners:
+            try:
+                callback(rows)
+            except Exception as e:
+                print(f"History: listener failed: {e!r}", file=sys.stderr)
+
+    def _reindex_text(self, conn):
+        """Index AI text of rows stored before the full-text table existed"""
+        last_id, indexed = 0, 0
+        while True:
+            page = conn.execute(
+                f"SELECT id, dictionary, result FROM analyses WHERE id > ? "
+                f"AND source IN ({','.join('?' * len(TEXT_SOURCES))}) ORDER BY id LIMIT ?",
+                (last_id, *TEXT_SOURCES, REINDEX_PAGE)
+            ).fetchall()
+            if not page:
+                break
+            documents = []
+            for rowid, dictionary_id, result in page:
+                text = analysis_text(json.loads(decompress(result, self._read_dictionary(conn, dictionary_id))))
+                if text is not None:
+                    documents.append((rowid, *text))
+            with conn:
+                conn.executemany("INSERT INTO analysis_text (rowid, body, provider) VALUES (?, ?, ?)", documents)
+            indexed += len(documents)
+            last_id = page[-1][0]
+        print(f"History: indexed AI text of {indexed} stored analyses", file=sys.stderr)
+
+    # -------------------------------------------------------------------------
+    # Read side
+    # -------------------------------------------------------------------------
+
+    def query(self, student_id=None, student_name: str = None, since: float = None, until: float = None,
+              limit: int = DEFAULT_LIMIT, include_result: bool = False) -> list:
+        """Newest first; filters combine, and each one is backed by an index"""
+        where, params = [], []
+        if student_id is not None:
+            where.append("student_id = ?")
+            params.append(_label(student_id))
+        if student_name is not None:
+            where.append("name_key = ?")
+            params.append(name_key(student_name))
+        if since is not None:
+            where.append("analyzed_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("analyzed_at < ?")
+            params.append(until)
+
+        columns = COLUMNS + (('dictionary', 'result') if include_result else ())
+        sql = f"SELECT {', '.join(columns)} FROM analyses"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY analyzed_at DESC, id DESC LIMIT ?"
+        params.append(max(1, min(int(limit), MAX_LIMIT)))
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+            entries = []
+            for row in rows:
+                entry = dict(zip(columns, row))
+                entry['analyzed_at'] = datetime.fromtimestamp(entry['analyzed_at']).isoformat()
+                if include_result:
+                    zdict = self._read_dictionary(conn, entry.pop('dictionary'))
+                    entry['result'] = json.loads(decompress(entry['result'], zdict))
+                entries.append(entry)
+        finally:
+            conn.close()
+        return entries
+
+    def search_text(self, text: str, skill: str = 'overall', min_band: float = None, max_band: float = None,
+                    limit: int = DEFAULT_LIMIT) -> list:
+        """
+        Analyses whose AI text matches, best bm25 rank first, with a snippet.
+        min_band / max_band filter on the chosen skill's score (or overall).
+        """
+        if not self.full_text:
+            raise RuntimeError('Full-text search needs SQLite with FTS5')
+        if skill not in SKILLS + ('overall',):
+            raise ValueError(f'Unknown skill: {skill}')
+
+        open_mark, close_mark, ellipsis = SNIPPET_MARKERS
+        sql = (
+            f"SELECT a.{', a.'.join(COLUMNS)}, analysis_text.provider, "
+            f"snippet(analysis_text, 0, ?, ?, ?, ?), bm25(analysis_text) "
+            f"FROM analysis_text JOIN analyses a ON a.id = analysis_text.rowid "
+            f"WHERE analysis_text MATCH ?"
+        )
+        params = [open_mark, close_mark, ellipsis, SNIPPET_TOKENS, match_query(text)]
+        if min_band is not None:
+            sql += f" AND a.{skill} >= ?"
+            params.append(min_band)
+        if max_band is not None:
+            sql += f" AND a.{skill} <= ?"
+            params.append(max_band)
+        sql += " ORDER BY bm25(analysis_text) LIMIT ?"
+        params.append(max(1, min(int(limit), MAX_LIMIT)))
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        entries = []
+        for row in rows:
+            entry = dict(zip(COLUMNS + ('provider', 'snippet', 'rank'), row))
+            entry['analyzed_at'] = datetime.fromtimestamp(entry['analyzed_at']).isoformat()
+            entry['rank'] = -entry['rank']
+            entries.append(entry)
+        return entries
+
+    def score_rows(self, student_ids: list) -> list:
+        """
+        (student_id, student_name, analyzed_at, listening, speaking, reading,
+        writing, overall) for every stored attempt, by student then date
+        """
+        ids = sorted({_label(student_id) for student_id in student_ids} - {None})
+        rows = []
+        conn = self._connect()
+        try:
+            for start in range(0, len(ids), LOOKUP_BATCH):
+                batch = ids[start:start + LOOKUP_BATCH]
+                rows.extend(conn.execute(
+                    f"SELECT student_id, student_name, analyzed_at, {', '.join(SKILLS)}, overall "
+                    f"FROM analyses WHERE student_id IN ({','.join('?' * len(batch))}) "
+                    f"ORDER BY student_id, analyzed_at, id",
+                    batch
+                ))
+        finally:
+            conn.close()
+        return rows
+
+    def students(self) -> list:
+        """(student_id, student_name, name_key, latest analyzed_at) per distinct student"""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT student_id, student_name, name_key, MAX(analyzed_at) "
+                "FROM analyses GROUP BY student_id, name_key"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def latest_scores(self) -> list:
+        """
+        (student_id, name_key, analyzed_at, listening, speaking, reading,
+        writing, overall, cohort) of each student's latest attempt per cohort,
+        oldest first
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT student_id, name_key, MAX(analyzed_at) AS latest, {', '.join(SKILLS)}, overall, cohort "
+                f"FROM analyses GROUP BY cohort, student_id, name_key ORDER BY latest"
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _read_dictionary(self, conn, dictionary_id: int) -> bytes:
+        zdict = self._zdicts.get(dictionary_id)
+        if zdict is None:
+            row = conn.execute("SELECT data FROM dictionaries WHERE id = ?", (dictionary_id,)).fetchone()
+            zdict = self._zdicts[dictionary_id] = bytes(row[0])
+        return zdict
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        finally:
+            conn.close()
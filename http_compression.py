@@ -0,0 +1,110 @@
+"""
+IELTS Score Analyzer - HTTP Compression
+Streaming gzip / brotli / zstd encoders for chunked responses
+"""
+
+import zlib
+
+# Optional: faster or denser codecs when installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Flush compressed output to the client once this much input has been seen
+FLUSH_THRESHOLD = 64 * 1024
+
+
+def available_encodings() -> list:
+    """Content codings this server can produce, best first"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        # Brotli quality goes 0-11, default to a streaming-friendly middle
+        self._obj = brotli.Compressor(quality=min(11, max(0, level)))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+COMPRESSORS = {
+    'gzip': (_GzipCompressor, 6),
+    'br': (_BrotliCompressor, 5),
+    'zstd': (_ZstdCompressor, 3),
+}
+
+
+def compress_stream(chunks, encoding: str, level: int = None):
+    """
+    Compress an iterable of byte chunks on the fly.
+    Output is flushed every FLUSH_THRESHOLD input bytes so the client keeps
+    receiving data while the body is still being produced.
+    """
+    factory, default_level = COMPRESSORS[encoding]
+    compressor = factory(default_level if level is None else level)
+    pending = 0
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= FLUSH_THRESHOLD:
+            data += compressor.flush()
+            pending = 0
+        if data:
+            yield data
+
+    tail = compressor.finish()
+    if tail:
+        yield tail
@@ -7,7 +7,6 @@ import sys
 import json
 import os
 from pathlib import Path
-from datetime import datetime
 
 # Try PyQt6 first, fall back to PyQt5
 try:
@@ -16,9 +15,9 @@ try:
         QLabel, QLineEdit, QPushButton, QTextEdit, QTabWidget,
         QGroupBox, QFormLayout, QDoubleSpinBox, QMessageBox,
         QDialog, QDialogButtonBox, QComboBox, QCheckBox, QFrame,
-        QScrollArea, QFileDialog, QProgressBar, QSplitter
+        QScrollArea, QFileDialog, QProgressBar, QSplitter, QCompleter
     )
-    from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings
+    from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSettings, QStringListModel
     from PyQt6.QtGui import QFont, QPalette, QColor, QIcon, QPixmap
     PYQT_VERSION = 6
 except ImportError:
@@ -28,15 +27,21 @@ except ImportError:
             QLabel, QLineEdit, QPushButton, QTextEdit, QTabWidget,
             QGroupBox, QFormLayout, QDoubleSpinBox, QMessageBox,
             QDialog, QDialogButtonBox, QComboBox, QCheckBox, QFrame,
-            QScrollArea, QFileDialog, QProgressBar, QSplitter
+            QScrollArea, QFileDialog, QProgressBar, QSplitter, QCompleter
         )
-        from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings
+        from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings, QStringListModel
         from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap
         PYQT_VERSION = 5
     except ImportError:
         print("Please install PyQt6: pip install PyQt6")
         sys.exit(1)
 
+from report_writer import write_report, report_filename
+from catalog import start_watcher
+from ielts_engine import analyze_scores_rule_based
+from history_store import HistoryStore
+from name_index import build_index
+
 
 # =============================================================================
 # CONSTANTS & DATA
@@ -45,96 +50,11 @@ except ImportError:
 APP_NAME = "IELTS Score Analyzer"
 APP_VERSION = "1.0.0"
 CONFIG_FILE = "ielts_analyzer_config.json"
+HISTORY_FILE = "ielts_history.db"
 
-BAND_DESCRIPTIONS = {
-    9: "Expert User - Thành thạo hoàn toàn",
-    8: "Very Good User - Rất thành thạo",
-    7: "Good User - Thành thạo",
-    6: "Competent User - Đủ năng lực",
-    5: "Modest User - Khiêm tốn",
-    4: "Limited User - Hạn chế",
-    3: "Extremely Limited - Rất hạn chế",
-    2: "Intermittent User - Không ổn định",
-    1: "Non User - Không sử dụng được"
-}
+# Skill names, band descriptions and recommendations come from catalog.json and
+# the analysis rules from rules.py, both shared with the web backend
 
-SKILL_NAMES = {
-    'listening': 'Nghe (Listening)',
-    'speaking': 'Nói (Speaking)',
-    'reading': 'Đọc (Reading)',
-    'writing': 'Viết (Writing)'
-}
-
-RECOMMENDATIONS = {
-    'listening': {
-        'low': [
-            "Nghe podcast tiếng Anh hàng ngày (BBC Learning English, IELTS Liz)",
-            "Xem phim/series có phụ đề tiếng Anh, dần bỏ phụ đề",
-            "Luyện nghe với bài test IELTS Listening từ Cambridge",
-            "Tập nghe các giọng khác nhau: British, American, Australian"
-        ],
-        'medium': [
-            "Nghe TED Talks, documentaries để tăng độ khó",
-            "Practice note-taking khi nghe academic lectures",
-            "Làm quen với tất cả dạng câu hỏi IELTS Listening"
-        ],
-        'high': [
-            "Nghe tin tức quốc tế hàng ngày (BBC, CNN)",
-            "Thử thách với academic lectures từ Coursera, edX"
-        ]
-    },
-    'speaking': {
-        'low': [
-            "Thực hành nói mỗi ngày, tự ghi âm và nghe lại",
-            "Sử dụng app Cambly, iTalki để luyện với native speakers",
-            "Học topic thường gặp trong IELTS Speaking Part 1, 2, 3",
-            "Xây dựng vocabulary theo chủ đề với collocations"
-        ],
-        'medium': [
-            "Tập trả lời Part 2 với cue card trong 2 phút",
-            "Cải thiện pronunciation và connected speech",
-            "Học cách phát triển ý tưởng và đưa ví dụ"
-        ],
-        'high': [
-            "Thực hành tranh luận các chủ đề phức tạp",
-            "Học idioms, phrasal verbs nâng cao"
-        ]
-    },
-    'reading': {
-        'low': [
-            "Đọc báo tiếng Anh hàng ngày (The Guardian, BBC News)",
-            "Học kỹ năng skimming và scanning",
-            "Xây dựng vocabulary qua đọc và ghi chép từ mới",
-            "Sử dụng Kindle với dictionary tích hợp"
-        ],
-        'medium': [
-            "Làm quen với các dạng bài Reading IELTS",
-            "Đọc academic articles và research papers",
-            "Tập đọc nhanh trong thời gian giới hạn"
-        ],
-        'high': [
-            "Đọc tài liệu chuyên ngành phức tạp",
-            "Cải thiện tốc độ đọc mà vẫn hiểu sâu nội dung"
-        ]
-    },
-    'writing': {
-        'low': [
-            "Viết nhật ký bằng tiếng Anh mỗi ngày",
-            "Học cấu trúc bài luận IELTS Task 1 và Task 2",
-            "Luyện viết câu phức với linking words",
-            "Nhờ giáo viên chữa bài và học từ feedback"
-        ],
-        'medium': [
-            "Tập phân tích đề và lập dàn ý trước khi viết",
-            "Học paraphrase và sử dụng synonyms đa dạng",
-            "Viết 2-3 bài essay mỗi tuần"
-        ],
-        'high': [
-            "Viết bài luận phức tạp với nhiều góc nhìn",
-            "Cải thiện academic vocabulary"
-        ]
-    }
-}
 
 # =============================================================================
 # STYLES
@@ -875,84 +795,12 @@ class AIAnalysisWorker(QThread):
             self.error.emit(str(e))
     
     def analyze_rule_based(self):
-        """Rule-based IELTS analysis"""
-        scores = self.scores
-        student_name = self.student_name
-        
-        # Calculate overall
-        total = sum(scores.values())
-        overall = round((total / 4) * 2) / 2
-        
-        # Create skill array
-        skills = [
-            {'name': 'listening', 'score': scores['listening'], 'label': SKILL_NAMES['listening']},
-            {'name': 'speaking', 'score': scores['speaking'], 'label': SKILL_NAMES['speaking']},
-            {'name': 'reading', 'score': scores['reading'], 'label': SKILL_NAMES['reading']},
-            {'name': 'writing', 'score': scores['writing'], 'label': SKILL_NAMES['writing']}
-        ]
-        
-        # Sort and categorize
-        sorted_skills = sorted(skills, key=lambda x: x['score'], reverse=True)
-        strengths = [s for s in sorted_skills if s['score'] >= overall]
-        weaknesses = [s for s in sorted_skills if s['score'] < overall]
-        
-        # Generate summary
-        summary = f"Học viên {student_name} đạt điểm IELTS tổng thể {overall}. "
-        
-        if strengths:
-            strength_names = [s['label'].split(' ')[0] for s in strengths]
-            summary += f"Có khả năng {' và '.join(strength_names)} tốt"
-            if strengths[0]['score'] >= 7:
-                summary += f" với điểm nổi bật ở kỹ năng {strengths[0]['label'].split(' ')[0]} ({strengths[0]['score']})."
-            else:
-                summary += "."
-        
-        if weaknesses:
-            weakness_names = [w['label'].split(' ')[0] for w in weaknesses]
-            summary += f" Tuy nhiên, {' và '.join(weakness_names)} còn hạn chế do chưa thường xuyên luyện tập."
-        
-        # Generate recommendations
-        recommendations = []
-        for skill in weaknesses:
-            level = 'high' if skill['score'] >= 7 else ('medium' if skill['score'] >= 5 else 'low')
-            recs = RECOMMENDATIONS[skill['name']][level]
-            recommendations.append({
-                'skill': skill['label'],
-                'score': skill['score'],
-                'items': recs
-            })
-        
-        # Action items
-        action_items = []
-        if weaknesses:
-            weakest = weaknesses[-1]
-            action_items.append(
-                f"Ưu tiên cải thiện {weakest['label'].split(' ')[0]} "
-                f"(hiện tại: {weakest['score']}, mục tiêu: {min(9, weakest['score'] + 1)})"
-            )
-        
-        action_items.extend([
-            f"Đặt mục tiêu đạt {min(9, overall + 0.5)} trong 3 tháng",
-            "Luyện tập 2 tiếng mỗi ngày với kỹ năng yếu",
-            "Làm mock test 2 tuần/lần để theo dõi tiến độ"
-        ])
-        
-        band = int(overall)
-        band_desc = BAND_DESCRIPTIONS.get(max(1, min(9, band)), "")
-        
-        return {
-            'student_name': student_name,
-            'overall': overall,
-            'band_description': band_desc,
-            'skills': skills,
-            'strengths': [{'skill': s['label'], 'score': s['score']} for s in strengths],
-            'weaknesses': [{'skill': w['label'], 'score': w['score']} for w in weaknesses],
-            'summary': summary,
-            'recommendations': recommendations,
-            'action_items': action_items,
-            'ai_analysis': None,
-            'analyzed_at': datetime.now().isoformat()
-        }
+        """Rule-based IELTS analysis (same compiled rules as the web backend)"""
+        analysis = analyze_scores_rule_based(self.scores, self.student_name)
+        analyzed_at = analysis.pop('analyzed_at')
+        analysis['ai_analysis'] = None
+        analysis['analyzed_at'] = analyzed_at
+        return analysis
     
     def analyze_with_ai(self, provider_index):
         """Analyze with AI (GPT-4 or Claude)"""
@@ -1129,6 +977,9 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(1100, 750)
         self.current_analysis = None
         self.settings = self.load_settings()
+        self.history = None
+        self.names = None
+        self.name_matches = {}
         
         self.setup_ui()
         self.apply_theme()
@@ -1235,6 +1086,14 @@ class MainWindow(QMainWindow):
         self.student_id.setPlaceholderText("Mã học viên (tùy chọn)")
         input_layout.addRow("🆔 Mã học viên:", self.student_id)
         
+        # Suggestions from the history; the index matches without diacritics, so no Qt filtering
+        self.name_model = QStringListModel(self)
+        self.name_completer = QCompleter(self.name_model, self)
+        self.name_completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.name_completer.activated.connect(self.on_student_chosen)
+        self.student_name.setCompleter(self.name_completer)
+        self.student_name.textEdited.connect(self.suggest_students)
+        
         # Score inputs
         self.listening_score = QDoubleSpinBox()
         self.listening_score.setRange(0, 9)
@@ -1484,6 +1343,10 @@ class MainWindow(QMainWindow):
         self.progress.setVisible(False)
         self.statusBar().showMessage("✅ Phân tích hoàn tất!")
         
+        # "Tự động lưu kết quả": keep it in the local history (written in the background)
+        if self.settings.get('auto_save', True):
+            self.history_store().record(analysis, self.student_id.text().strip() or None, source='desktop')
+        
         # Display results
         self.display_results(analysis)
     
@@ -1655,6 +1518,47 @@ class MainWindow(QMainWindow):
         self.current_analysis = None
         self.statusBar().showMessage("🔄 Đã làm mới form")
     
+    def history_store(self):
+        """Local analysis history next to the config file, opened on first use"""
+        if self.history is None:
+            if sys.platform == 'win32':
+                config_dir = Path(os.environ.get('APPDATA', '')) / 'IELTSAnalyzer'
+            else:
+                config_dir = Path.home() / '.ielts_analyzer'
+            config_dir.mkdir(parents=True, exist_ok=True)
+            self.history = HistoryStore(str(config_dir / HISTORY_FILE))
+        return self.history
+    
+    def name_index(self):
+        """Name search over the local history, built on first use"""
+        if self.names is None:
+            self.names = build_index(self.history_store())
+        return self.names
+    
+    def suggest_students(self, text):
+        """Offer stored students matching the typed name"""
+        if len(text.strip()) < 2:
+            self.name_model.setStringList([])
+            return
+        self.name_matches = {}
+        for student in self.name_index().search(text, 10):
+            self.name_matches.setdefault(student['student_name'], student['student_id'])
+        self.name_model.setStringList(list(self.name_matches))
+        if self.name_matches:
+            self.name_completer.complete()
+    
+    def on_student_chosen(self, name):
+        """Fill in the student ID of the chosen suggestion"""
+        student_id = self.name_matches.get(name)
+        if student_id:
+            self.student_id.setText(student_id)
+    
+    def closeEvent(self, event):
+        """Commit queued history entries before quitting"""
+        if self.history is not None:
+            self.history.close(timeout=5)
+        super().closeEvent(event)
+    
     def export_report(self):
         """Export analysis report"""
         if not self.current_analysis:
@@ -1663,85 +1567,8 @@ class MainWindow(QMainWindow):
         
         analysis = self.current_analysis
         
-        # Generate report
-        report = f"""
-╔══════════════════════════════════════════════════════════════╗
-║           IELTS SCORE ANALYSIS REPORT                        ║
-║           BÁO CÁO PHÂN TÍCH ĐIỂM IELTS                       ║
-╚══════════════════════════════════════════════════════════════╝
-
-📅 Ngày phân tích: {datetime.now().strftime('%d/%m/%Y %H:%M')}
-👤 Học viên: {analysis['student_name']}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📊 ĐIỂM TỔNG THỂ: {analysis['overall']}
-   {analysis['band_description']}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📈 CHI TIẾT ĐIỂM:
-"""
-        
-        for skill in analysis['skills']:
-            bar_length = int(skill['score'] / 9 * 20)
-            bar = '█' * bar_length + '░' * (20 - bar_length)
-            report += f"   • {skill['label']}: {skill['score']} [{bar}]\n"
-        
-        report += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📝 TÓM TẮT ĐÁNH GIÁ:
-{analysis['summary']}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-💪 ĐIỂM MẠNH:
-"""
-        for s in analysis['strengths']:
-            report += f"   ✓ {s['skill']}: {s['score']}\n"
-        
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📉 ĐIỂM CẦN CẢI THIỆN:
-"""
-        for w in analysis['weaknesses']:
-            report += f"   ⚠ {w['skill']}: {w['score']}\n"
-        
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-🎯 ĐỀ XUẤT CẢI THIỆN:
-"""
-        for rec in analysis['recommendations']:
-            report += f"\n   📌 {rec['skill']}:\n"
-            for item in rec['items']:
-                report += f"      → {item}\n"
-        
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-📌 KẾ HOẠCH HÀNH ĐỘNG:
-"""
-        for i, action in enumerate(analysis['action_items'], 1):
-            report += f"   {i}. {action}\n"
-        
-        if analysis.get('ai_analysis'):
-            report += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-🤖 PHÂN TÍCH AI:
-{analysis['ai_analysis']}
-"""
-        
-        report += """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Báo cáo được tạo bởi IELTS Score Analyzer - AI Document Summarizer
-"""
-        
         # Save file dialog
-        default_name = f"IELTS_Report_{analysis['student_name']}_{datetime.now().strftime('%Y%m%d')}.txt"
+        default_name = report_filename(analysis)
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Lưu Báo Cáo",
@@ -1751,8 +1578,8 @@ Báo cáo được tạo bởi IELTS Score Analyzer - AI Document Summarizer
         
         if file_path:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(report)
+                with open(file_path, 'wb') as f:
+                    write_report(analysis, f)
                 QMessageBox.information(self, "Thành công", f"✅ Đã xuất báo cáo:\n{file_path}")
                 self.statusBar().showMessage(f"✅ Đã xuất báo cáo: {file_path}")
             except Exception as e:
@@ -1772,6 +1599,7 @@ def main():
     app.setApplicationVersion(APP_VERSION)
     app.setOrganizationName("IELTS Analyzer")
     
+    start_watcher()
     window = MainWindow()
     window.show()
     
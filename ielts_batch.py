@@ -0,0 +1,364 @@
+"""
+IELTS Score Analyzer - Batch CLI
+Analyze roster files from the command line, without Flask or PyQt
+
+Usage:
+    python ielts_batch.py roster.csv -o results.jsonl
+    python ielts_batch.py roster.xlsx -o results.csv --workers 4
+    python ielts_batch.py cohort.ielts -o results.parquet --chunk-size 50000
+    type roster.csv | python ielts_batch.py - --format csv > results.csv
+
+Output has one record per input row, in input order. Progress and
+throughput go to stderr.
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from analysis_results import ResultBatch, SKILLS
+from batch_validation import validate_columns
+from cohort_format import CohortFile, CohortFormatError, COHORT_EXTENSION
+from json_serializer import dumps as json_dumps
+from llm_analysis import analyze_with_llm, LLM_PROVIDERS
+from roster_io import iter_roster_rows, MappedRoster, RosterFormatError
+
+# Optional: Parquet output
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+OUTPUT_FORMATS = ('jsonl', 'csv', 'parquet')
+OUTPUT_EXTENSIONS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+CSV_COLUMNS = (
+    'student_id', 'student_name', *SKILLS, 'overall', 'band_description',
+    'strengths', 'weaknesses', 'summary', 'llm_analysis', 'error'
+)
+
+DEFAULT_CHUNK_ROWS = 10000
+
+
+# =============================================================================
+# ANALYSIS (runs in worker processes)
+# =============================================================================
+
+def analyze_rows(rows: list, llm: str = None):
+    """Validate and analyze one chunk of roster rows, in order; returns (results, validation)"""
+    columns = {skill: [row.get(skill) for row in rows] for skill in SKILLS}
+    validation = validate_columns(columns, len(rows))
+    analyzed_at = time.time()
+
+    # Rule-based rows share profiles through ResultBatch; LLM rows are one-offs
+    results = ResultBatch() if not llm else []
+    for index, row in enumerate(rows):
+        student_name = row.get('student_name') or 'Unknown'
+        if not validation.is_valid(index):
+            error = {
+                'error': validation.row_message(index),
+                'student_name': student_name,
+                'reasons': validation.row_errors(index)
+            }
+            if llm:
+                results.append(error)
+            else:
+                results.append_error(error)
+        elif llm:
+            results.append(analyze_with_llm(validation.row_scores(index), student_name, llm))
+        else:
+            results.append(validation.row_scores(index), student_name, analyzed_at)
+    return results, validation
+
+
+def encode_jsonl(results, student_ids: list) -> bytes:
+    encoded = results.iter_encoded() if isinstance(results, ResultBatch) else map(json_dumps, results)
+    lines = []
+    for data, student_id in zip(encoded, student_ids):
+        if student_id not in (None, ''):
+            data = data[:-1] + b',"student_id":' + json_dumps(student_id) + b'}'
+        lines.append(data)
+    return b'\n'.join(lines) + b'\n' if lines else b''
+
+
+def flat_record(analysis: dict, student_id) -> dict:
+    """One CSV/Parquet record for an analysis or an error row"""
+    record = dict.fromkeys(CSV_COLUMNS)
+    record['student_id'] = None if student_id in (None, '') else str(student_id)
+    record['student_name'] = str(analysis.get('student_name', ''))
+    if 'error' in analysis:
+        record['error'] = analysis['error']
+        return record
+    for skill in analysis['skills']:
+        record[skill['name']] = skill['score']
+    record['overall'] = analysis['overall']
+    record['band_description'] = analysis['band_description']
+    record['strengths'] = '; '.join(s['skill'] for s in analysis['strengths'])
+    record['weaknesses'] = '; '.join(w['skill'] for w in analysis['weaknesses'])
+    record['summary'] = analysis['summary']
+    record['llm_analysis'] = analysis.get('llm_analysis')
+    return record
+
+
+def encode_csv(results, student_ids: list) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for analysis, student_id in zip(results, student_ids):
+        record = flat_record(analysis, student_id)
+        writer.writerow(['' if record[c] is None else record[c] for c in CSV_COLUMNS])
+    return buffer.getvalue().encode('utf-8')
+
+
+def encode_columns(results, student_ids: list) -> dict:
+    columns = {column: [] for column in CSV_COLUMNS}
+    for analysis, student_id in zip(results, student_ids):
+        for column, value in flat_record(analysis, student_id).items():
+            columns[column].append(value)
+    return columns
+
+
+ENCODERS = {'jsonl': encode_jsonl, 'csv': encode_csv, 'parquet': encode_columns}
+
+# Per-process cache of mapped input files, so each worker maps a file once
+_OPEN_INPUTS = {}
+
+
+def _mapped(kind: str, path: str):
+    key = (kind, path)
+    if key not in _OPEN_INPUTS:
+        _OPEN_INPUTS[key] = MappedRoster(path) if kind == 'range' else CohortFile(path)
+    return _OPEN_INPUTS[key]
+
+
+def task_rows(task: tuple) -> list:
+    """
+    Rows of one unit of work. Tasks are ('rows', rows), ('range', path,
+    start, end) for a CSV byte range, or ('cohort', path, start, stop).
+    """
+    kind = task[0]
+    if kind == 'rows':
+        return task[1]
+    if kind == 'range':
+        return list(_mapped(kind, task[1]).iter_range(task[2], task[3]))
+    return list(_mapped(kind, task[1]).iter_rows(task[2], task[3]))
+
+
+def run_task(task: tuple, output_format: str, llm: str = None):
+    """Analyze one unit of work; returns (encoded output, rows, invalid rows)"""
+    rows = task_rows(task)
+
+    results, validation = analyze_rows(rows, llm)
+    student_ids = [row.get('student_id') for row in rows]
+    return ENCODERS[output_format](results, student_ids), len(rows), len(validation.invalid_rows)
+
+
+# =============================================================================
+# INPUT
+# =============================================================================
+
+def _chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_tasks(path: str, chunk_rows: int, input_format: str = 'csv'):
+    """
+    Split an input into tasks. Cohort files and byte-splittable CSVs are
+    handed to workers as positions, so only offsets cross process boundaries.
+    Returns (tasks, total rows or None).
+    """
+    if path == '-':
+        rows = iter_roster_rows(sys.stdin.buffer, f"stdin.{input_format}")
+        return (('rows', chunk) for chunk in _chunks(rows, chunk_rows)), None
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == COHORT_EXTENSION:
+        with CohortFile(path) as cohort:
+            count = len(cohort)
+        return (('cohort', path, start, min(start + chunk_rows, count))
+                for start in range(0, count, chunk_rows)), count
+
+    if extension in ('.csv', '.txt') and os.path.getsize(path):
+        with MappedRoster(path) as roster:
+            if roster.line_aligned:
+                ranges = roster.row_ranges(chunk_rows)
+                return (('range', path, start, end) for start, end in ranges), None
+
+    def file_tasks():
+        with open(path, 'rb') as stream:
+            for chunk in _chunks(iter_roster_rows(stream, path), chunk_rows):
+                yield ('rows', chunk)
+    return file_tasks(), None
+
+
+def run_tasks(tasks, workers: int, output_format: str, llm: str = None):
+    """Yield task results in input order, keeping at most 2 tasks per worker in flight"""
+    if workers <= 1:
+        for task in tasks:
+            yield run_task(task, output_format, llm)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(run_task, task, output_format, llm))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# =============================================================================
+# OUTPUT & PROGRESS
+# =============================================================================
+
+class StreamOutput:
+    """JSONL/CSV chunks written to a file or stdout"""
+
+    def __init__(self, path: str, output_format: str):
+        self.stream = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        if output_format == 'csv':
+            self.stream.write(b'\xef\xbb\xbf')  # BOM so Excel reads Vietnamese names
+            self.stream.write((','.join(CSV_COLUMNS) + '\n').encode('utf-8'))
+
+    def write(self, data: bytes):
+        self.stream.write(data)
+
+    def close(self):
+        if self.stream is sys.stdout.buffer:
+            self.stream.flush()
+        else:
+            self.stream.close()
+
+
+class ParquetOutput:
+    """One Parquet row group per chunk"""
+
+    def __init__(self, path: str):
+        if pyarrow is None:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        if path == '-':
+            raise SystemExit("Parquet output needs a file path (-o results.parquet)")
+        self.path = path
+        self.writer = None
+
+    def write(self, columns: dict):
+        if not columns['student_name']:
+            return
+        table = pyarrow.table(columns, schema=PARQUET_SCHEMA)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            pq.write_table(pyarrow.table({c: [] for c in CSV_COLUMNS}, schema=PARQUET_SCHEMA), self.path)
+        else:
+            self.writer.close()
+
+
+if pyarrow is not None:
+    PARQUET_SCHEMA = pyarrow.schema(
+        [(column, pyarrow.float64() if column in SKILLS or column == 'overall' else pyarrow.string())
+         for column in CSV_COLUMNS]
+    )
+
+
+class Progress:
+    """Rows and throughput on stderr, redrawn at most once per interval"""
+
+    def __init__(self, total: int = None, quiet: bool = False, interval: float = 1.0, counter: str = 'invalid'):
+        self.total = total
+        self.quiet = quiet
+        self.interval = interval
+        self.counter = counter
+        self.rows = 0
+        self.invalid = 0
+        self.started = self.last_shown = time.perf_counter()
+        self.tty = sys.stderr.isatty()
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0
+        done = f"{self.rows:,}" + (f"/{self.total:,} ({self.rows / self.total:.0%})" if self.total else "")
+        return f"{done} rows  {rate:,.0f} rows/s  {self.invalid:,} {self.counter}  {elapsed:.1f}s"
+
+    def update(self, rows: int, invalid: int):
+        self.rows += rows
+        self.invalid += invalid
+        now = time.perf_counter()
+        if not self.quiet and now - self.last_shown >= self.interval:
+            self.last_shown = now
+            sys.stderr.write(f"\r{self.line()}" if self.tty else f"{self.line()}\n")
+            sys.stderr.flush()
+
+    def finish(self):
+        if not self.quiet:
+            sys.stderr.write(f"\r{self.line()}\n" if self.tty else f"{self.line()}\n")
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze IELTS rosters without the web or desktop app")
+    parser.add_argument('input', help="roster file (.csv, .xlsx, .json, .jsonl, .ielts) or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                        help="output format (default: from the output extension, else jsonl)")
+    parser.add_argument('--input-format', default='csv', choices=('csv', 'json', 'jsonl'),
+                        help="format of stdin input (default: csv)")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="worker processes (0 = one per CPU, default: 1)")
+    parser.add_argument('-c', '--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"rows per work unit (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument('--llm', choices=('off',) + LLM_PROVIDERS, default='off',
+                        help="add LLM analysis (needs OPENAI_API_KEY / ANTHROPIC_API_KEY)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no progress output")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output_format = args.format or OUTPUT_EXTENSIONS.get(os.path.splitext(args.output)[1].lower(), 'jsonl')
+    workers = args.workers or os.cpu_count() or 1
+    llm = None if args.llm == 'off' else args.llm
+
+    try:
+        tasks, total = iter_tasks(args.input, max(1, args.chunk_size), args.input_format)
+    except (OSError, RosterFormatError, CohortFormatError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    output = ParquetOutput(args.output) if output_format == 'parquet' else StreamOutput(args.output, output_format)
+    progress = Progress(total, args.quiet)
+    try:
+        for data, rows, invalid in run_tasks(tasks, workers, output_format, llm):
+            output.write(data)
+            progress.update(rows, invalid)
+    except (OSError, RosterFormatError, CohortFormatError) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    finally:
+        output.close()
+    progress.finish()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
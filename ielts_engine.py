@@ -0,0 +1,249 @@
+"""
+IELTS Score Analyzer - Rule Engine
+Rule-based analysis shared by the web backend, the desktop app and batch tools
+
+The text tables (skill names, band descriptions, labels, recommendations)
+live in catalog.json; see catalog.py.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+from catalog import get_catalog
+from rules import RULES
+
+# Bump when the analysis logic changes (table edits are tracked by fingerprints)
+RULESET_VERSION = 1
+
+# Opening of every summary; the student's name follows it
+SUMMARY_PREFIX = "Học viên "
+
+
+
+def calculate_overall(scores: dict) -> float:
+    """Calculate overall IELTS band score"""
+    total = sum(scores.values())
+    avg = total / 4
+    # Round to nearest 0.5
+    return round(avg * 2) / 2
+
+
+def get_score_level(score: float) -> str:
+    """Categorize score level"""
+    return RULES.level(score)
+
+
+def get_band_description(score: float) -> str:
+    """Get band description for a score"""
+    return get_catalog().band_description(int(score))
+
+
+def analyze_profile(scores: dict) -> dict:
+    """
+    Name-independent part of the rule-based analysis.
+    'summary' holds only the text after the student's name; see personalize_analysis().
+    """
+    catalog = get_catalog()
+    skill_names = catalog.skill_names
+    status_labels = catalog.status_labels
+    overall = calculate_overall(scores)
+    
+    # Create skill array with scores
+    skills = [
+        {'name': 'listening', 'score': scores['listening'], 'label': skill_names['listening']},
+        {'name': 'speaking', 'score': scores['speaking'], 'label': skill_names['speaking']},
+        {'name': 'reading', 'score': scores['reading'], 'label': skill_names['reading']},
+        {'name': 'writing', 'score': scores['writing'], 'label': skill_names['writing']}
+    ]
+    
+    # Sort by score
+    sorted_skills = sorted(skills, key=lambda x: x['score'], reverse=True)
+    strengths = [s for s in sorted_skills if RULES.is_strength(s['score'], overall)]
+    weaknesses = [s for s in sorted_skills if not RULES.is_strength(s['score'], overall)]
+    
+    # Generate summary (the name is inserted in front by personalize_analysis)
+    summary_parts = [RULES.render('overall', overall=overall)]
+    
+    if strengths:
+        strength_names = [s['label'].split(' ')[0] for s in strengths]
+        summary_parts.append(RULES.render('strengths', names=RULES.join(strength_names)))
+        top = strengths[0]
+        if RULES.highlight(top['score']):
+            summary_parts[-1] += RULES.render('highlight', name=top['label'].split(' ')[0], score=top['score'])
+        else:
+            summary_parts[-1] += RULES.render('no_highlight')
+    
+    if weaknesses:
+        weakness_names = [w['label'].split(' ')[0] for w in weaknesses]
+        summary_parts.append(RULES.render('weaknesses', names=RULES.join(weakness_names)))
+    
+    summary = " ".join(summary_parts)
+    
+    # Generate recommendations for weak skills
+    recommendations_list = []
+    for skill in weaknesses:
+        level = RULES.level(skill['score'])
+        skill_recs = catalog.advice[(skill['name'], level)]
+        recommendations_list.append({
+            'skill': skill['label'],
+            'score': skill['score'],
+            'items': list(skill_recs)
+        })
+    
+    # Also add some recommendations for maintaining strengths
+    for skill in strengths[:1]:  # Top strength
+        level = RULES.level(skill['score'])
+        skill_recs = catalog.advice[(skill['name'], level)]
+        recommendations_list.append({
+            'skill': skill['label'] + catalog.maintain_suffix,
+            'score': skill['score'],
+            'items': list(skill_recs[:RULES.maintain_items])
+        })
+    
+    # Generate action items
+    action_items = []
+    if weaknesses:
+        weakest = weaknesses[-1]
+        action_items.append(RULES.render(
+            'weakest_action', name=weakest['label'].split(' ')[0],
+            score=weakest['score'], target=RULES.weakest_target(weakest['score'])
+        ))
+    
+    action_items.append(RULES.render('overall_action', target=RULES.overall_target(overall)))
+    action_items.extend(catalog.action_items)
+    
+    return {
+        'overall': overall,
+        'band_description': catalog.band_description(int(overall)),
+        'skills': skills,
+        'strengths': [
+            {'skill': s['label'], 'score': s['score'], 
+             'status': status_labels[RULES.status(s['score'])]}
+            for s in strengths
+        ],
+        'weaknesses': [
+            {'skill': w['label'], 'score': w['score'], 'status': status_labels['needs_work']}
+            for w in weaknesses
+        ],
+        'summary': summary,
+        'recommendations': recommendations_list,
+        'action_items': action_items
+    }
+
+
+def personalize_analysis(profile: dict, student_name: str, analyzed_at: datetime = None) -> dict:
+    """
+    Full analysis for one student from a shared analyze_profile() result.
+    The nested lists are shared between students with the same profile.
+    """
+    return {
+        'student_name': student_name,
+        'overall': profile['overall'],
+        'band_description': profile['band_description'],
+        'skills': profile['skills'],
+        'strengths': profile['strengths'],
+        'weaknesses': profile['weaknesses'],
+        'summary': f"{SUMMARY_PREFIX}{student_name} {profile['summary']}",
+        'recommendations': profile['recommendations'],
+        'action_items': profile['action_items'],
+        'analyzed_at': (analyzed_at or datetime.now()).isoformat()
+    }
+
+
+def analyze_scores_rule_based(scores: dict, student_name: str, analyzed_at: datetime = None) -> dict:
+    """
+    Rule-based analysis of IELTS scores
+    Returns structured analysis with summary, strengths, weaknesses, recommendations
+    """
+    return personalize_analysis(analyze_profile(scores), student_name, analyzed_at)
+
+
+# =============================================================================
+# RULE SET FINGERPRINTS
+# =============================================================================
+
+def rule_tables(catalog=None) -> dict:
+    """Every table entry an analysis can depend on, by entry key"""
+    catalog = catalog or get_catalog()
+    tables = {
+        'ruleset': RULESET_VERSION,
+        # Level thresholds are left out: a level change shows up as a different key
+        'rules': {name: value for name, value in RULES.spec.items() if name != 'levels'},
+        'summary_prefix': SUMMARY_PREFIX,
+        'maintain_suffix': catalog.maintain_suffix,
+        'action_items': list(catalog.action_items),
+    }
+    for skill, label in catalog.skill_names.items():
+        tables[f'skill_names/{skill}'] = label
+    for band, description in catalog.band_descriptions.items():
+        tables[f'band/{band}'] = description
+    for status, label in catalog.status_labels.items():
+        tables[f'status/{status}'] = label
+    for (skill, level), items in catalog.advice.items():
+        tables[f'recommendations/{skill}/{level}'] = list(items)
+    return tables
+
+
+def rule_fingerprints(catalog=None) -> dict:
+    """Entry key -> short content hash of the entry"""
+    return {
+        key: hashlib.blake2b(
+            json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8'), digest_size=6
+        ).hexdigest()
+        for key, value in rule_tables(catalog).items()
+    }
+
+
+def rule_entries(scores: dict, fingerprints: dict = None) -> dict:
+    """
+    Entry key -> fingerprint for the entries an analysis of these scores uses.
+    Threshold changes show up as different keys (e.g. writing/medium -> writing/high).
+    """
+    fingerprints = fingerprints or rule_fingerprints()
+    overall = calculate_overall(scores)
+    keys = ['ruleset', 'rules', 'summary_prefix', 'action_items', f'band/{max(1, min(9, int(overall)))}']
+    keys.extend(f'skill_names/{skill}' for skill in PROFILE_SKILLS)
+    
+    # Same ordering as analyze_profile(), so the top strength matches
+    ranked = sorted(PROFILE_SKILLS, key=lambda skill: scores[skill], reverse=True)
+    strengths = [skill for skill in ranked if RULES.is_strength(scores[skill], overall)]
+    weaknesses = [skill for skill in ranked if not RULES.is_strength(scores[skill], overall)]
+    
+    for skill in strengths:
+        keys.append(f'status/{RULES.status(scores[skill])}')
+    if weaknesses:
+        keys.append('status/needs_work')
+    for skill in weaknesses + strengths[:1]:
+        keys.append(f'recommendations/{skill}/{RULES.level(scores[skill])}')
+    if strengths:
+        keys.append('maintain_suffix')
+    return {key: fingerprints[key] for key in sorted(set(keys))}
+
+
+# =============================================================================
+# SCORE PROFILES
+# =============================================================================
+
+PROFILE_SKILLS = ('listening', 'speaking', 'reading', 'writing')
+PROFILE_BITS = 5            # score*2 is 0..18
+NO_PROFILE = -1             # scores that are not half-bands
+
+
+def profile_code(scores: dict) -> int:
+    """Pack four half-band scores into one integer (5 bits each of score*2)"""
+    code = 0
+    for shift, skill in enumerate(PROFILE_SKILLS):
+        doubled = scores[skill] * 2
+        if doubled != int(doubled) or not 0 <= doubled <= 18:
+            return NO_PROFILE
+        code |= int(doubled) << (shift * PROFILE_BITS)
+    return code
+
+
+def profile_scores(code: int) -> dict:
+    mask = (1 << PROFILE_BITS) - 1
+    return {
+        skill: ((code >> (shift * PROFILE_BITS)) & mask) / 2
+        for shift, skill in enumerate(PROFILE_SKILLS)
+    }
@@ -0,0 +1,335 @@
+"""
+IELTS Score Analyzer - Incremental Batch Store
+Row content hashes and previous results by student ID, for re-uploaded rosters
+
+A row is reused when its student ID is known, the hash of its name and
+scores matches the stored one and the rule entries its result used are
+unchanged; only new, changed or stale rows are analyzed again.
+
+Refresh stored results after editing the rule tables:
+    python incremental_store.py recompute [--roster lop-12a] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from batch_validation import SKILLS
+from ielts_engine import analyze_scores_rule_based, rule_entries, rule_fingerprints, profile_code
+from json_serializer import encode_analysis
+
+INCREMENTAL_DB = os.getenv('INCREMENTAL_DB', 'ielts_incremental.db')
+
+# Student IDs per lookup query (SQLite limits bound parameters)
+LOOKUP_BATCH = 500
+
+# Stored rows read per page by recompute
+RECOMPUTE_PAGE = 5000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS row_results (
+    roster      TEXT NOT NULL,
+    student_id  TEXT NOT NULL,
+    row_hash    BLOB NOT NULL,
+    result      BLOB NOT NULL,
+    rules       TEXT NOT NULL DEFAULT '{}',
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (roster, student_id)
+) WITHOUT ROWID
+"""
+
+
+def row_hash(student_name, scores: dict) -> bytes:
+    """Content hash of the fields an analysis depends on"""
+    # Parsed floats, so '7' and '7.0' hash the same
+    text = '\x1f'.join([str(student_name)] + [repr(float(scores[skill])) for skill in SKILLS])
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def stored_timestamp(result: bytes) -> float:
+    """analyzed_at of a stored result, without parsing the whole JSON"""
+    marker = result.rfind(b'"analyzed_at":"')
+    if marker < 0:
+        return datetime.fromisoformat(json.loads(result)['analyzed_at']).timestamp()
+    start = marker + len(b'"analyzed_at":"')
+    return datetime.fromisoformat(result[start:result.index(b'"', start)].decode('ascii')).timestamp()
+
+
+class RuleEntryCache:
+    """rule_entries() as canonical JSON text, once per score profile"""
+
+    def __init__(self):
+        self.fingerprints = rule_fingerprints()
+        self._by_code = {}
+
+    def text(self, scores: dict) -> str:
+        code = profile_code(scores)
+        text = self._by_code.get(code)
+        if text is None:
+            text = json.dumps(rule_entries(scores, self.fingerprints), sort_keys=True, separators=(',', ':'))
+            if code >= 0:
+                self._by_code[code] = text
+        return text
+
+
+class IncrementalStore:
+    """SQLite table of (roster, student_id) -> (row hash, serialized result)"""
+
+    def __init__(self, path: str = INCREMENTAL_DB):
+        self.path = path
+        conn = self._connect()
+        try:
+            conn.execute(SCHEMA)
+            # Stores created before rule fingerprints: '{}' marks every row stale
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(row_results)")}
+            if 'rules' not in columns:
+                conn.execute("ALTER TABLE row_results ADD COLUMN rules TEXT NOT NULL DEFAULT '{}'")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call; safe across Flask's threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def lookup(self, roster: str, student_ids: list) -> dict:
+        """student_id -> (row_hash, result, rules) for the IDs that are stored"""
+        found = {}
+        conn = self._connect()
+        try:
+            for start in range(0, len(student_ids), LOOKUP_BATCH):
+                batch = student_ids[start:start + LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(
+                    f"SELECT student_id, row_hash, result, rules FROM row_results "
+                    f"WHERE roster = ? AND student_id IN ({placeholders})",
+                    [roster, *batch]
+                )
+                for student_id, digest, result, rules in cursor:
+                    found[student_id] = (bytes(digest), bytes(result), rules)
+        finally:
+            conn.close()
+        return found
+
+    def save(self, roster: str, entries: list):
+        """Store (student_id, row_hash, result, rules) entries, replacing older ones"""
+        if not entries:
+            return
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO row_results (roster, student_id, row_hash, result, rules, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(roster, student_id, digest, result, rules, now)
+                     for student_id, digest, result, rules in entries]
+                )
+        finally:
+            conn.close()
+
+    def clear(self, roster: str = None):
+        conn = self._connect()
+        try:
+            with conn:
+                if roster is None:
+                    conn.execute("DELETE FROM row_results")
+                else:
+                    conn.execute("DELETE FROM row_results WHERE roster = ?", (roster,))
+        finally:
+            conn.close()
+
+
+class IncrementalRun:
+    """
+    Reuse bookkeeping for one batch upload. For each chunk: lookup() returns
+    the stored results that are still valid, remember() notes rows analyzed
+    fresh, and save() writes those back to the store.
+    """
+
+    def __init__(self, store: IncrementalStore, roster: str = ''):
+        self.store = store
+        self.roster = roster
+        self.reused = 0
+        self.recomputed = 0
+        self.without_id = 0
+        self.stale = 0
+        self.rules = RuleEntryCache()
+        self._pending = {}      # chunk row -> (student_id, row_hash, rules)
+        self._analyzed = []     # (student_id, row_hash, rules, batch index)
+
+    def lookup(self, rows: list, validation) -> dict:
+        """chunk row index -> original analyzed_at, for rows whose stored result is still valid"""
+        self._pending = {}
+        for index, row in enumerate(rows):
+            if not validation.is_valid(index):
+                continue
+            student_id = row.get('student_id')
+            if student_id in (None, ''):
+                self.without_id += 1
+                continue
+            student_name = row.get('student_name') or 'Unknown'
+            scores = validation.row_scores(index)
+            self._pending[index] = (str(student_id), row_hash(student_name, scores), self.rules.text(scores))
+
+        stored = self.store.lookup(self.roster, list({pending[0] for pending in self._pending.values()}))
+        reusable = {}
+        for index, (student_id, digest, rules) in list(self._pending.items()):
+            hit = stored.get(student_id)
+            if hit is None or hit[0] != digest:
+                continue
+            if hit[2] != rules:
+                self.stale += 1
+                continue
+            reusable[index] = stored_timestamp(hit[1])
+            del self._pending[index]
+        self.reused += len(reusable)
+        return reusable
+
+    def remember(self, index: int, batch_index: int):
+        """Row `index` of the chunk was analyzed as row `batch_index` of the batch"""
+        self.recomputed += 1
+        pending = self._pending.get(index)
+        if pending is not None:
+            self._analyzed.append((*pending, batch_index))
+
+    def save(self, results):
+        entries = [(sid, digest, results.encoded(i), rules) for sid, digest, rules, i in self._analyzed]
+        self.store.save(self.roster, entries)
+        self._analyzed = []
+
+    def to_json(self) -> dict:
+        return {
+            'reused': self.reused,
+            'recomputed': self.recomputed,
+            'stale': self.stale,
+            'without_id': self.without_id
+        }
+
+
+# =============================================================================
+# RECOMPUTE AFTER RULE CHANGES
+# =============================================================================
+
+def changed_entries(stored: dict, current: dict) -> list:
+    """Entry keys whose fingerprint differs, or that only one side uses"""
+    return sorted(key for key in stored.keys() | current.keys() if stored.get(key) != current.get(key))
+
+
+def count_rows(store: IncrementalStore, roster: str = None) -> int:
+    conn = store._connect()
+    try:
+        if roster is None:
+            return conn.execute("SELECT COUNT(*) FROM row_results").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM row_results WHERE roster = ?", (roster,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_stale_pages(store: IncrementalStore, roster: str = None, page_size: int = RECOMPUTE_PAGE):
+    """
+    Pages of stored rows in key order, each a (checked, stale) pair where stale
+    lists (roster, student_id, analysis, scores, rules, changed entry keys).
+    """
+    rules = RuleEntryCache()
+    after = ('', '')
+    while True:
+        conn = store._connect()
+        try:
+            query = "SELECT roster, student_id, result, rules FROM row_results WHERE (roster, student_id) > (?, ?)"
+            params = list(after)
+            if roster is not None:
+                query += " AND roster = ?"
+                params.append(roster)
+            page = conn.execute(query + " ORDER BY roster, student_id LIMIT ?", params + [page_size]).fetchall()
+        finally:
+            conn.close()
+        if not page:
+            return
+
+        stale = []
+        for row_roster, student_id, result, stored_rules in page:
+            analysis = json.loads(result)
+            scores = {skill['name']: skill['score'] for skill in analysis['skills']}
+            current = rules.text(scores)
+            if current != stored_rules:
+                changed = changed_entries(json.loads(stored_rules), json.loads(current))
+                stale.append((row_roster, student_id, analysis, scores, current, changed))
+        yield len(page), stale
+        after = page[-1][:2]
+
+
+def recompute(store: IncrementalStore, roster: str = None, dry_run: bool = False, progress=None) -> dict:
+    """Re-analyze only the stored results whose rule entries changed"""
+    checked = refreshed = 0
+    affected = {}
+    for page_rows, stale in iter_stale_pages(store, roster):
+        updates = []
+        for row_roster, student_id, analysis, scores, rules, changed in stale:
+            for key in changed:
+                affected[key] = affected.get(key, 0) + 1
+            if not dry_run:
+                fresh = analyze_scores_rule_based(scores, analysis['student_name'])
+                updates.append((encode_analysis(fresh), rules, time.time(), row_roster, student_id))
+        if updates:
+            conn = store._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "UPDATE row_results SET result = ?, rules = ?, updated_at = ? "
+                        "WHERE roster = ? AND student_id = ?", updates
+                    )
+            finally:
+                conn.close()
+        checked += page_rows
+        refreshed += len(stale)
+        if progress is not None:
+            progress.update(page_rows, len(stale))
+    return {
+        'checked': checked,
+        'stale': refreshed,
+        'refreshed': 0 if dry_run else refreshed,
+        'changed_entries': dict(sorted(affected.items()))
+    }
+
+
+def main(argv=None) -> int:
+    from ielts_batch import Progress
+
+    parser = argparse.ArgumentParser(description="Stored batch results for incremental re-analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('recompute', help="refresh results affected by rule table changes")
+    command.add_argument('--db', default=INCREMENTAL_DB, help=f"store path (default: {INCREMENTAL_DB})")
+    command.add_argument('--roster', help="only this roster key")
+    command.add_argument('--dry-run', action='store_true', help="count stale results without updating them")
+    command.add_argument('-q', '--quiet', action='store_true', help="no progress output")
+    commands.add_parser('fingerprints', help="print the current rule entry fingerprints")
+    args = parser.parse_args(argv)
+
+    if args.command == 'fingerprints':
+        print(json.dumps(rule_fingerprints(), indent=2))
+        return 0
+
+    if not os.path.exists(args.db):
+        print(f"Error: {args.db} not found", file=sys.stderr)
+        return 2
+    store = IncrementalStore(args.db)
+    progress = Progress(count_rows(store, args.roster), args.quiet, counter='stale')
+    try:
+        report = recompute(store, args.roster, args.dry_run, progress)
+    except KeyboardInterrupt:
+        print("\nInterrupted", file=sys.stderr)
+        return 130
+    progress.finish()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+IELTS Score Analyzer - JSON Serializer
+Deterministic UTF-8 JSON with pre-encoded fragments for the static analysis strings
+
+Output is compact (no spaces), keeps dict order and does not escape
+non-ASCII text, so the same analysis always serializes to the same bytes.
+Lone surrogates, which have no UTF-8 form, are escaped as \\udXXX like
+json.dumps does with ensure_ascii.
+"""
+
+import json
+import math
+import re
+from json.encoder import encode_basestring
+
+from catalog import get_catalog
+from ielts_engine import SUMMARY_PREFIX
+
+# Optional: faster encoder when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_SURROGATE = re.compile('[\ud800-\udfff]')
+
+
+def _utf8(text: str) -> bytes:
+    """UTF-8 bytes of JSON text, with lone surrogates escaped"""
+    try:
+        return text.encode('utf-8')
+    except UnicodeEncodeError:
+        return _SURROGATE.sub(lambda m: '\\u{0:04x}'.format(ord(m.group())), text).encode('utf-8')
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return _utf8(json.dumps(obj, ensure_ascii=False, separators=(',', ':')))
+
+
+def _orjson_dumps(obj) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        # e.g. integers above 64 bits or lone surrogates, which the stdlib still handles
+        return _stdlib_dumps(obj)
+
+
+backend_dumps = _orjson_dumps if orjson is not None else _stdlib_dumps
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+# =============================================================================
+# FRAGMENT CACHE
+# =============================================================================
+
+class FragmentCache:
+    """Pre-encoded JSON strings and string lists"""
+
+    MAX_LISTS = 4096
+
+    def __init__(self, static_strings):
+        self.strings = {text: self.encode_str(text) for text in static_strings}
+        self.lists = {}
+        self.numbers = {}
+
+    @staticmethod
+    def encode_str(text: str) -> bytes:
+        return _utf8(encode_basestring(text))
+
+    def text(self, value) -> bytes:
+        if type(value) is not str:
+            return backend_dumps(value)
+        data = self.strings.get(value)
+        if data is None:
+            data = _utf8(encode_basestring(value))
+        return data
+
+    def number(self, value) -> bytes:
+        key = (type(value), value)
+        data = self.numbers.get(key)
+        if data is None:
+            if type(value) not in (int, float) or not math.isfinite(value):
+                return backend_dumps(value)
+            data = repr(value).encode('ascii')
+            if len(self.numbers) < 1024:
+                self.numbers[key] = data
+        return data
+
+    def text_list(self, items) -> bytes:
+        """Recommendation item lists repeat across students, cache them whole"""
+        key = tuple(items)
+        data = self.lists.get(key)
+        if data is None:
+            data = b'[' + b','.join(self.text(item) for item in items) + b']'
+            if len(self.lists) < self.MAX_LISTS:
+                self.lists[key] = data
+        return data
+
+
+def _static_strings():
+    # Strings of the catalog loaded at startup; text from a reloaded catalog
+    # is encoded on first use (and whole recommendation lists are cached)
+    catalog = get_catalog()
+    strings = list(catalog.skill_names)
+    strings.extend(catalog.skill_names.values())
+    strings.extend(label + catalog.maintain_suffix for label in catalog.skill_names.values())
+    strings.extend(catalog.status_labels.values())
+    strings.extend(catalog.band_descriptions.values())
+    for items in catalog.advice.values():
+        strings.extend(items)
+    strings.extend(catalog.action_items)
+    return strings
+
+
+FRAGMENTS = FragmentCache(_static_strings())
+
+
+# =============================================================================
+# ANALYSIS FAST PATH
+# =============================================================================
+
+ANALYSIS_KEYS = (
+    'student_name', 'overall', 'band_description', 'skills', 'strengths', 'weaknesses',
+    'summary', 'recommendations', 'action_items', 'analyzed_at'
+)
+
+
+def _encode_assessments(items, fragments) -> bytes:
+    text, number = fragments.text, fragments.number
+    return b','.join(
+        b'{"skill":' + text(s['skill']) + b',"score":' + number(s['score'])
+        + b',"status":' + text(s['status']) + b'}'
+        for s in items
+    )
+
+
+def _encode_scores_part(analysis: dict, fragments: FragmentCache) -> bytes:
+    """"overall" through "weaknesses" """
+    text, number = fragments.text, fragments.number
+    return b''.join((
+        b',"overall":', number(analysis['overall']),
+        b',"band_description":', text(analysis['band_description']),
+        b',"skills":[',
+        b','.join(
+            b'{"name":' + text(s['name']) + b',"score":' + number(s['score'])
+            + b',"label":' + text(s['label']) + b'}'
+            for s in analysis['skills']
+        ),
+        b'],"strengths":[', _encode_assessments(analysis['strengths'], fragments),
+        b'],"weaknesses":[', _encode_assessments(analysis['weaknesses'], fragments),
+        b']',
+    ))
+
+
+def _encode_advice_part(analysis: dict, fragments: FragmentCache) -> bytes:
+    """"recommendations" and "action_items" """
+    text, number = fragments.text, fragments.number
+    return b''.join((
+        b',"recommendations":[',
+        b','.join(
+            b'{"skill":' + text(r['skill']) + b',"score":' + number(r['score'])
+            + b',"items":' + fragments.text_list(r['items']) + b'}'
+            for r in analysis['recommendations']
+        ),
+        b'],"action_items":', fragments.text_list(analysis['action_items']),
+    ))
+
+
+def encode_analysis(analysis: dict, fragments: FragmentCache = FRAGMENTS) -> bytes:
+    """
+    Serialize an analyze_scores_rule_based() dict by splicing cached fragments.
+    Produces the same bytes as the generic encoder; raises KeyError/TypeError
+    when the dict does not have the expected shape.
+    """
+    text = fragments.text
+    out = [
+        b'{"student_name":', text(analysis['student_name']),
+        _encode_scores_part(analysis, fragments),
+        b',"summary":', text(analysis['summary']),
+        _encode_advice_part(analysis, fragments),
+        b',"analyzed_at":', text(analysis['analyzed_at']),
+    ]
+    # Extra keys (e.g. llm_analysis) follow in their original order
+    for key in list(analysis)[len(ANALYSIS_KEYS):]:
+        out.append(b',' + text(key) + b':' + backend_dumps(analysis[key]))
+    out.append(b'}')
+    return b''.join(out)
+
+
+def encode_profile(profile: dict, fragments: FragmentCache = FRAGMENTS) -> tuple:
+    """Pre-encode the name-independent parts of an analyze_profile() result"""
+    return (
+        _encode_scores_part(profile, fragments),
+        profile['summary'],
+        _encode_advice_part(profile, fragments),
+    )
+
+
+def encode_personalized(parts: tuple, student_name, analyzed_at: str,
+                        fragments: FragmentCache = FRAGMENTS) -> bytes:
+    """Same bytes as encode_analysis(personalize_analysis(...)), from encode_profile() parts"""
+    scores_part, summary, advice_part = parts
+    text = fragments.text
+    return b''.join((
+        b'{"student_name":', text(student_name),
+        scores_part,
+        b',"summary":', text(f"{SUMMARY_PREFIX}{student_name} {summary}"),
+        advice_part,
+        b',"analyzed_at":', text(analyzed_at),
+        b'}',
+    ))
+
+
+def dumps(obj) -> bytes:
+    """Serialize any JSON value, using the analysis fast path when it applies"""
+    if type(obj) is dict and tuple(obj)[:len(ANALYSIS_KEYS)] == ANALYSIS_KEYS:
+        try:
+            return encode_analysis(obj)
+        except (KeyError, TypeError):
+            pass
+    return backend_dumps(obj)
@@ -0,0 +1,91 @@
+"""
+IELTS Score Analyzer - LLM Analysis
+Optional GPT-4 / Claude analysis on top of the rule-based engine (no Flask needed)
+"""
+
+import os
+import sys
+
+from ielts_engine import analyze_scores_rule_based
+
+# Optional: LLM Integration (uncomment and configure as needed)
+# from openai import OpenAI
+# from anthropic import Anthropic
+
+# Configuration
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY', '')
+
+LLM_PROVIDERS = ('openai', 'anthropic')
+
+
+def analyze_with_llm(scores: dict, student_name: str, provider: str = 'openai') -> dict:
+    """
+    Use LLM (GPT-4 / Claude) for more sophisticated analysis
+    Falls back to rule-based if API not configured
+    """
+    # Prepare the prompt
+    prompt = f"""Bạn là một chuyên gia tư vấn IELTS. Hãy phân tích điểm IELTS của học viên và đưa ra nhận xét, đề xuất cải thiện.
+
+Thông tin học viên:
+- Tên: {student_name}
+- Listening: {scores['listening']}
+- Speaking: {scores['speaking']}  
+- Reading: {scores['reading']}
+- Writing: {scores['writing']}
+
+Hãy phân tích và đưa ra:
+1. Tóm tắt đánh giá tổng thể (2-3 câu)
+2. Điểm mạnh của học viên
+3. Điểm yếu cần cải thiện
+4. Đề xuất cụ thể cho từng kỹ năng yếu (resources, phương pháp học)
+5. Action items - kế hoạch hành động cụ thể trong 1-3 tháng
+
+Trả lời bằng tiếng Việt, ngắn gọn và thực tế."""
+
+    # Try OpenAI
+    if provider == 'openai' and OPENAI_API_KEY:
+        try:
+            from openai import OpenAI
+            client = OpenAI(api_key=OPENAI_API_KEY)
+            response = client.chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": "Bạn là chuyên gia tư vấn IELTS với nhiều năm kinh nghiệm."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7
+            )
+            llm_analysis = response.choices[0].message.content
+            
+            # Combine with rule-based analysis
+            base_analysis = analyze_scores_rule_based(scores, student_name)
+            base_analysis['llm_analysis'] = llm_analysis
+            base_analysis['llm_provider'] = 'OpenAI GPT-4'
+            return base_analysis
+            
+        except Exception as e:
+            print(f"OpenAI API error: {e}", file=sys.stderr)
+    
+    # Try Anthropic Claude
+    if provider == 'anthropic' and ANTHROPIC_API_KEY:
+        try:
+            from anthropic import Anthropic
+            client = Anthropic(api_key=ANTHROPIC_API_KEY)
+            response = client.messages.create(
+                model="claude-3-sonnet-20240229",
+                max_tokens=1024,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            llm_analysis = response.content[0].text
+            
+            base_analysis = analyze_scores_rule_based(scores, student_name)
+            base_analysis['llm_analysis'] = llm_analysis
+            base_analysis['llm_provider'] = 'Anthropic Claude'
+            return base_analysis
+            
+        except Exception as e:
+            print(f"Anthropic API error: {e}", file=sys.stderr)
+    
+    # Fallback to rule-based
+    return analyze_scores_rule_based(scores, student_name)
@@ -0,0 +1,255 @@
+"""
+IELTS Score Analyzer - Student Name Index
+In-memory prefix search over stored students, ignoring diacritics and case
+
+Names are folded ("Nguyễn Văn Ân" -> "nguyen van an", đ -> d) and split
+into tokens. A sorted vocabulary of tokens answers prefix queries with two
+bisects, and each token points at the students that use it; every query
+token has to prefix-match some token of the name, in any order. The index
+is loaded once from the history and then follows it: HistoryStore hands
+every committed batch of rows to add_rows().
+
+Each token also keeps its students ordered by last analysis, and each pair
+of tokens in a name has its own posting set. Broad queries (many matches)
+walk the most selective token's students newest first and stop after
+`limit` matches; narrow ones start from the smallest pair posting, narrow
+it with set operations and rank the few matches left.
+"""
+
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import combinations, product
+from math import prod
+
+# Default and largest number of matches returned by a search
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+# Walk a token's students by recency when about this many are expected to be
+# checked before `limit` matches are found; otherwise intersect the postings
+WALK_BUDGET = 500
+
+# Query terms considered for the pair postings, and the most token pairs looked up per term pair
+PAIR_TERMS = 3
+MAX_PAIR_LOOKUPS = 256
+
+EMPTY = frozenset()
+
+# Letters NFD does not decompose
+FOLD_TABLE = str.maketrans({'đ': 'd', 'Đ': 'd'})
+
+
+def fold(text: str) -> str:
+    """Search form of a name: no diacritics, case-folded, single spaces"""
+    decomposed = unicodedata.normalize('NFD', str(text).translate(FOLD_TABLE))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in stripped.casefold()).split())
+
+
+class NameIndex:
+    """Students by folded name tokens; safe to update from the history writer thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}      # (student_id, name_key) -> entry id
+        self._ids = []          # entry id -> student_id
+        self._names = []        # entry id -> display name (latest seen)
+        self._tokens = []       # entry id -> folded name tokens
+        self._last = []         # entry id -> latest analyzed_at
+        self._exact = {}        # folded name -> set of entry ids
+        self._postings = {}     # token -> set of entry ids
+        self._pairs = {}        # (token, token) in sorted order -> set of entry ids using both
+        self._recent = {}       # token -> (analyzed_at, entry id) ascending, older duplicates included
+        self._vocabulary = []   # sorted tokens
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, student_id, student_name: str, key: str, analyzed_at: float):
+        """Insert or refresh one student; repeating a row is harmless"""
+        with self._lock:
+            self._add(student_id, student_name, key, analyzed_at)
+
+    def add_rows(self, rows):
+        """Rows that start with (student_id, student_name, name_key, analyzed_at)"""
+        with self._lock:
+            for row in rows:
+                self._add(*row[:4])
+
+    def _add(self, student_id, student_name, key, analyzed_at):
+        entry = self._entries.get((student_id, key))
+        if entry is not None:
+            if analyzed_at >= self._last[entry]:
+                if analyzed_at > self._last[entry]:
+                    for token in set(self._tokens[entry]):
+                        self._log(token, analyzed_at, entry)
+                self._last[entry] = analyzed_at
+                self._names[entry] = student_name
+            return
+
+        entry = self._entries[(student_id, key)] = len(self._ids)
+        folded = fold(student_name)
+        self._ids.append(student_id)
+        self._names.append(student_name)
+        self._tokens.append(tuple(folded.split()))
+        self._last.append(analyzed_at)
+        self._exact.setdefault(folded, set()).add(entry)
+        tokens = sorted(set(folded.split()))
+        for pair in combinations(tokens, 2):
+            self._pairs.setdefault(pair, set()).add(entry)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                self._recent[token] = []
+                insort(self._vocabulary, token)
+            postings.add(entry)
+            self._log(token, analyzed_at, entry)
+
+    def _log(self, token: str, analyzed_at: float, entry: int):
+        """Record that entry was analyzed at analyzed_at, keeping the token's list in order"""
+        recent = self._recent[token]
+        if not recent or analyzed_at >= recent[-1][0]:
+            recent.append((analyzed_at, entry))
+        else:
+            insort(recent, (analyzed_at, entry))
+        # Drop the pairs older analyses left behind once they outnumber the live ones
+        if len(recent) > 2 * len(self._postings[token]) + 16:
+            last = self._last
+            recent[:] = sorted((analyzed_at if e == entry else last[e], e) for e in self._postings[token])
+
+    def _by_recency(self, tokens: list):
+        """Entries using any of tokens, most recently analyzed first"""
+        streams = [reversed(self._recent[token]) for token in tokens]
+        streams = streams[0] if len(streams) == 1 else heapq.merge(*streams, reverse=True)
+        last, seen = self._last, set()
+        for analyzed_at, entry in streams:
+            if analyzed_at == last[entry] and entry not in seen:
+                seen.add(entry)
+                yield entry
+
+    def _prefix_tokens(self, prefix: str) -> list:
+        start = bisect_left(self._vocabulary, prefix)
+        stop = bisect_left(self._vocabulary, prefix + '\U0010ffff', start)
+        return self._vocabulary[start:stop]
+
+    def _pair(self, first: str, second: str) -> set:
+        """Entries using both tokens"""
+        if first == second:
+            return self._postings[first]
+        return self._pairs.get((first, second) if first < second else (second, first), EMPTY)
+
+    def _matches(self, term: str, tokens: list):
+        """Entries with a token starting with term, given its vocabulary expansion"""
+        if len(tokens) == 1:
+            return self._postings[tokens[0]]
+        return set().union(*(self._postings[token] for token in tokens))
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """
+        Students whose name has a token starting with every query token.
+        Exact folded names first, then the most recently analyzed.
+        """
+        folded = fold(query)
+        terms = folded.split()
+        if not terms:
+            return []
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        with self._lock:
+            expansions = []
+            for term in terms:
+                tokens = self._prefix_tokens(term)
+                if not tokens:
+                    return []
+                expansions.append((sum(len(self._postings[token]) for token in tokens), term, tokens))
+            expansions.sort()
+
+            last = self._last.__getitem__
+            # Exact folded names match every term; they come first
+            exact = self._exact.get(folded, set())
+            best = sorted(exact, key=last, reverse=True)[:limit]
+            wanted = limit - len(best)
+            if not wanted:
+                return self._rows(best)
+
+            # Students matching the two terms with the fewest common students,
+            # counted from the pair postings; the other terms are assumed independent
+            pool, rest = self._best_pair(expansions)
+            expected = pool[0] * prod(size / len(self._ids) for size, _, _ in rest)
+            size, term, tokens = expansions[0]
+            if wanted * size <= WALK_BUDGET * max(expected, 1.0):
+                # Many matches: the newest students of the most selective term soon yield enough
+                found = self._walk(tokens, expansions[1:], exact, wanted)
+                if found is not None:
+                    return self._rows(best + found)
+            candidates = self._narrow(pool[1](), rest)
+            best.extend(heapq.nlargest(wanted, candidates - exact if exact else candidates, key=last))
+            return self._rows(best)
+
+    def _walk(self, tokens: list, others: list, exact: set, wanted: int):
+        """
+        The `wanted` newest entries using one of tokens and matching the other
+        terms, or None when that takes more than 2 * WALK_BUDGET steps (the
+        terms turned out to be correlated and the matches are few)
+        """
+        others = [frozenset(ts) for _, _, ts in others]
+        names, found = self._tokens, []
+        for steps, entry in enumerate(self._by_recency(tokens)):
+            if steps > 2 * WALK_BUDGET:
+                return None
+            if entry not in exact and not any(ts.isdisjoint(names[entry]) for ts in others):
+                found.append(entry)
+                if len(found) == wanted:
+                    break
+        return found
+
+    def _best_pair(self, expansions: list) -> tuple:
+        """
+        ((count, build), other expansions): build() returns the entries matching
+        the pair of terms with the fewest common entries (or the only term)
+        """
+        size, term, tokens = expansions[0]
+        best = ((size, lambda: self._matches(term, tokens)), expansions[1:])
+        # Only the most selective terms are paired: a query has few words, but keep it bounded
+        candidates = expansions[:PAIR_TERMS]
+        for i, j in combinations(range(len(candidates)), 2):
+            pairs = list(product(candidates[i][2], candidates[j][2]))
+            if len(pairs) > MAX_PAIR_LOOKUPS:
+                continue
+            count = sum(len(self._pair(a, b)) for a, b in pairs)
+            if count < best[0][0]:
+                build = lambda pairs=pairs: set().union(*(self._pair(a, b) for a, b in pairs))
+                best = ((count, build), [e for k, e in enumerate(expansions) if k not in (i, j)])
+        return best
+
+    def _narrow(self, candidates: set, expansions: list) -> set:
+        """Entries of candidates matching every term of expansions"""
+        for size, term, tokens in expansions:
+            if not candidates:
+                break
+            # One set intersection in C, or one isdisjoint() per candidate for several tokens
+            if len(tokens) == 1:
+                candidates = candidates & self._postings[tokens[0]]
+            else:
+                tokens = frozenset(tokens)
+                names = self._tokens
+                candidates = {entry for entry in candidates if not tokens.isdisjoint(names[entry])}
+        return candidates
+
+    def _rows(self, entries: list) -> list:
+        return [
+            {'student_id': self._ids[entry], 'student_name': self._names[entry], 'last_analyzed_at': self._last[entry]}
+            for entry in entries
+        ]
+
+
+def build_index(history) -> NameIndex:
+    """Index every stored student and keep following the history's writes"""
+    index = NameIndex()
+    # Subscribe first: rows committed while loading are simply added twice
+    history.subscribe(index.add_rows)
+    index.add_rows(history.students())
+    return index
@@ -0,0 +1,140 @@
+"""
+IELTS Score Analyzer - Cohort Percentiles
+Percentile rank of a score among stored students, per cohort and skill
+
+Scores are half-bands, so each cohort keeps one Fenwick tree of counts over
+the 19 band slots per skill and overall. Each student counts once, with
+their latest attempt: a newer attempt moves them between slots (-1 / +1),
+an O(log n) update. The whole history is the default cohort; analyses
+stored with a cohort also count in it.
+"""
+
+import threading
+
+from batch_validation import SKILLS
+from rules import HALF_BANDS
+
+SERIES = SKILLS + ('overall',)
+
+# Cohort key for the whole history
+ALL = None
+
+
+class FenwickTree:
+    """Counts per slot; add() and prefix() are O(log n)"""
+
+    __slots__ = ('tree',)
+
+    def __init__(self, size: int = HALF_BANDS):
+        self.tree = [0] * (size + 1)
+
+    def add(self, slot: int, delta: int = 1):
+        index = slot + 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, slot: int) -> int:
+        """Total count of slots below slot"""
+        total = 0
+        while slot > 0:
+            total += self.tree[slot]
+            slot -= slot & -slot
+        return total
+
+
+def student_key(student_id, name_key: str) -> tuple:
+    """Who a stored row belongs to; students without an ID are told apart by name"""
+    return ('id', student_id) if student_id is not None else ('name', name_key)
+
+
+def band_slot(score: float) -> int:
+    return min(HALF_BANDS - 1, max(0, int(round(float(score) * 2))))
+
+
+class CohortRanks:
+    """Per-cohort band counts of each student's latest scores"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trees = {}        # cohort -> tuple of FenwickTree per series
+        self._counts = {}       # cohort -> number of students
+        self._latest = {}       # (cohort, student) -> (analyzed_at, slots)
+
+    def cohorts(self) -> list:
+        return [cohort for cohort in self._counts if cohort is not ALL]
+
+    def add_rows(self, rows):
+        """HistoryStore INSERT rows: student_id, name, name_key, analyzed_at, scores..., cohort last"""
+        with self._lock:
+            for row in rows:
+                self._add_student(row[0], row[2], row[3], row[4:9], row[-1])
+
+    def add_latest(self, rows):
+        """HistoryStore.latest_scores() rows"""
+        with self._lock:
+            for student_id, key, analyzed_at, *scores, cohort in rows:
+                self._add_student(student_id, key, analyzed_at, scores, cohort)
+
+    def _add_student(self, student_id, key, analyzed_at, scores, cohort):
+        student = student_key(student_id, key)
+        slots = tuple(band_slot(score) for score in scores)
+        self._set(ALL, student, analyzed_at, slots)
+        if cohort is not None:
+            self._set(cohort, student, analyzed_at, slots)
+
+    def _set(self, cohort, student, analyzed_at, slots):
+        previous = self._latest.get((cohort, student))
+        trees = self._trees.get(cohort)
+        if trees is None:
+            trees = self._trees[cohort] = tuple(FenwickTree() for _ in SERIES)
+            self._counts[cohort] = 0
+        if previous is None:
+            self._counts[cohort] += 1
+        elif previous[0] > analyzed_at:
+            return
+        else:
+            for tree, slot in zip(trees, previous[1]):
+                tree.add(slot, -1)
+        for tree, slot in zip(trees, slots):
+            tree.add(slot)
+        self._latest[(cohort, student)] = (analyzed_at, slots)
+
+    def percentiles(self, scores: dict, cohort=ALL, student=None):
+        """
+        Percentile rank (0-100) of each score among the cohort's students:
+        those below plus half of those on the same band. A student_key() given
+        as student is ranked against the others only, not their own earlier
+        attempt. None when there is nobody to rank against.
+        """
+        with self._lock:
+            trees = self._trees.get(cohort)
+            total = self._counts.get(cohort, 0)
+            previous = self._latest.get((cohort, student)) if student is not None else None
+            own_slots = previous[1] if previous else (None,) * len(SERIES)
+            if previous:
+                total -= 1
+            if not total:
+                return None
+            ranks = {}
+            for name, tree, own in zip(SERIES, trees, own_slots):
+                slot = band_slot(scores[name])
+                below = tree.prefix(slot)
+                same = tree.prefix(slot + 1) - below
+                if own is not None and own < slot:
+                    below -= 1
+                elif own == slot:
+                    same -= 1
+                ranks[name] = round(100 * (below + same / 2) / total, 1)
+        ranks['cohort'] = cohort
+        ranks['students'] = total
+        return ranks
+
+
+def build_ranks(history) -> CohortRanks:
+    """Ranks of every stored student, following the history's writes"""
+    ranks = CohortRanks()
+    # Subscribe first: a row committed while loading is applied once more, which is harmless
+    history.subscribe(ranks.add_rows)
+    ranks.add_latest(history.latest_scores())
+    return ranks
@@ -0,0 +1,178 @@
+"""
+IELTS Score Analyzer - Student Progress
+Score series, deltas and linear trends over a student's stored analyses
+
+Trends are least-squares lines through (days since first attempt, score)
+per series. For a class, all students are fitted in one vectorized pass:
+the attempts are sorted by student and the regression sums come from
+np.add.reduceat over the student boundaries.
+"""
+
+from datetime import datetime
+
+from batch_validation import SKILLS
+from rules import RULES
+
+# Optional: vectorized fitting when numpy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SERIES = SKILLS + ('overall',)
+SECONDS_PER_DAY = 86400.0
+
+# Slopes are reported per this many days
+SLOPE_DAYS = 30
+
+# Projections further out than this are reported as unreachable
+MAX_PROJECTION_DAYS = 3650
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+
+def _group_bounds(rows: list) -> list:
+    """(start, stop) of each student's attempts in rows sorted by student"""
+    bounds, start = [], 0
+    for index in range(1, len(rows) + 1):
+        if index == len(rows) or rows[index][0] != rows[start][0]:
+            bounds.append((start, index))
+            start = index
+    return bounds
+
+
+def _fit_python(rows: list, bounds: list):
+    """Per-student fits without numpy: (slopes per day, fitted last values)"""
+    slopes, fitted = [], []
+    for start, stop in bounds:
+        t0 = rows[start][2]
+        days = [(row[2] - t0) / SECONDS_PER_DAY for row in rows[start:stop]]
+        n = len(days)
+        st, stt = sum(days), sum(t * t for t in days)
+        denominator = n * stt - st * st
+        group_slopes, group_fitted = [], []
+        for k in range(len(SERIES)):
+            values = [row[3 + k] for row in rows[start:stop]]
+            sy = sum(values)
+            if denominator > 0:
+                slope = (n * sum(t * y for t, y in zip(days, values)) - st * sy) / denominator
+                group_slopes.append(slope)
+                group_fitted.append((sy - slope * st) / n + slope * days[-1])
+            else:
+                group_slopes.append(None)
+                group_fitted.append(values[-1])
+        slopes.append(group_slopes)
+        fitted.append(group_fitted)
+    return slopes, fitted
+
+
+def _fit_numpy(rows: list, bounds: list):
+    """All students at once: regression sums per student via reduceat"""
+    starts = np.array([start for start, _ in bounds])
+    lasts = np.array([stop - 1 for _, stop in bounds])
+    counts = np.array([stop - start for start, stop in bounds], dtype=np.float64)
+
+    times = np.array([row[2] for row in rows], dtype=np.float64)
+    values = np.array([row[3:3 + len(SERIES)] for row in rows], dtype=np.float64)
+    group = np.repeat(np.arange(len(bounds)), counts.astype(np.intp))
+    days = (times - times[starts][group]) / SECONDS_PER_DAY
+
+    st = np.add.reduceat(days, starts)
+    stt = np.add.reduceat(days * days, starts)
+    sy = np.add.reduceat(values, starts)
+    sty = np.add.reduceat(days[:, None] * values, starts)
+
+    denominator = counts * stt - st * st
+    fitted_ok = denominator > 0
+    safe = np.where(fitted_ok, denominator, 1.0)
+    slopes = (counts[:, None] * sty - st[:, None] * sy) / safe[:, None]
+    intercepts = (sy - slopes * st[:, None]) / counts[:, None]
+    fitted = np.where(fitted_ok[:, None], intercepts + slopes * days[lasts][:, None], values[lasts])
+    slopes = np.where(fitted_ok[:, None], slopes, np.nan)
+
+    return (
+        [[None if np.isnan(v) else float(v) for v in row] for row in slopes],
+        fitted.tolist(),
+    )
+
+
+def fit_trends(rows: list):
+    """Group score_rows() output by student and fit every series"""
+    bounds = _group_bounds(rows)
+    if not bounds:
+        return bounds, [], []
+    if np is not None:
+        slopes, fitted = _fit_numpy(rows, bounds)
+    else:
+        slopes, fitted = _fit_python(rows, bounds)
+    return bounds, slopes, fitted
+
+
+def projection(latest: float, slope_per_day, fitted_last: float, last_time: float, target: float) -> dict:
+    """When the trend line reaches target, from the last attempt on"""
+    if latest >= target:
+        return {'target': target, 'reached': True, 'projected_date': None}
+    if slope_per_day is None or slope_per_day <= 0:
+        return {'target': target, 'reached': False, 'projected_date': None}
+    days = max(0.0, (target - fitted_last) / slope_per_day)
+    if days > MAX_PROJECTION_DAYS:
+        return {'target': target, 'reached': False, 'projected_date': None}
+    return {
+        'target': target,
+        'reached': False,
+        'projected_date': _iso(last_time + days * SECONDS_PER_DAY),
+        'days_from_last_attempt': round(days, 1),
+    }
+
+
+def _trend(slope_per_day):
+    return None if slope_per_day is None else round(slope_per_day * SLOPE_DAYS, 3)
+
+
+def _summary(rows: list, start: int, stop: int, slopes: list, fitted: list, target) -> dict:
+    first, last = rows[start], rows[stop - 1]
+    goal = target if target is not None else RULES.overall_target(last[3 + len(SKILLS)])
+    return {
+        'student_id': last[0],
+        'student_name': last[1],
+        'attempts': stop - start,
+        'first_attempt': _iso(first[2]),
+        'last_attempt': _iso(last[2]),
+        'latest': dict(zip(SERIES, last[3:])),
+        'change': {name: last[3 + k] - first[3 + k] for k, name in enumerate(SERIES)},
+        'slope_per_30_days': {name: _trend(slopes[k]) for k, name in enumerate(SERIES)},
+        'projection': projection(last[-1], slopes[-1], fitted[-1], last[2], goal),
+    }
+
+
+def student_progress(rows: list, target: float = None) -> dict:
+    """Full series, deltas and trends for one student's score_rows()"""
+    if not rows:
+        return None
+    bounds, slopes, fitted = fit_trends(rows)
+    start, stop = bounds[-1]
+    progress = _summary(rows, start, stop, slopes[-1], fitted[-1], target)
+    goal = progress['projection']['target']
+
+    attempts = rows[start:stop]
+    progress['dates'] = [_iso(row[2]) for row in attempts]
+    progress['series'] = {name: [row[3 + k] for row in attempts] for k, name in enumerate(SERIES)}
+    progress['deltas'] = {
+        name: [b - a for a, b in zip(values, values[1:])] for name, values in progress['series'].items()
+    }
+    progress['skill_projections'] = {
+        name: projection(attempts[-1][3 + k], slopes[-1][k], fitted[-1][k], attempts[-1][2], goal)
+        for k, name in enumerate(SKILLS)
+    }
+    return progress
+
+
+def class_progress(rows: list, target: float = None) -> list:
+    """One summary per student, all fitted in a single pass"""
+    bounds, slopes, fitted = fit_trends(rows)
+    return [
+        _summary(rows, start, stop, slopes[g], fitted[g], target)
+        for g, (start, stop) in enumerate(bounds)
+    ]
@@ -0,0 +1,350 @@
+"""
+IELTS Score Analyzer - Report Writer
+Renders text reports from a compiled template and streams many reports as a zip archive
+"""
+
+import re
+import zipfile
+from io import RawIOBase
+from datetime import datetime
+
+SEPARATOR = "━" * 63
+
+HEADER_BANNER = """
+╔══════════════════════════════════════════════════════════════╗
+║           IELTS SCORE ANALYSIS REPORT                        ║
+║           BÁO CÁO PHÂN TÍCH ĐIỂM IELTS                       ║
+╚══════════════════════════════════════════════════════════════╝
+"""
+
+FOOTER = "Báo cáo được tạo bởi IELTS Score Analyzer - AI Document Summarizer"
+
+
+def score_bar(score: float, width: int = 20) -> str:
+    """Text progress bar for a band score"""
+    filled = int(score / 9 * width)
+    return '█' * filled + '░' * (width - filled)
+
+
+# =============================================================================
+# TEMPLATE COMPILER
+# =============================================================================
+
+class Slot:
+    """Typed placeholder filled from the render context"""
+
+    def __init__(self, key: str, kind: str = 'text', default=''):
+        self.key = key
+        self.kind = kind
+        self.default = default
+
+
+class Each:
+    """Repeat a sub-layout for every item of a list in the context"""
+
+    def __init__(self, key: str, layout: list):
+        self.key = key
+        self.layout = layout
+
+
+class When:
+    """Render a sub-layout only when the context value is truthy"""
+
+    def __init__(self, key: str, layout: list):
+        self.key = key
+        self.layout = layout
+
+
+def _encode_text(value) -> bytes:
+    return str(value).encode('utf-8')
+
+
+def _memoized(render):
+    """Cache encoders whose inputs are few distinct values (half-band scores)"""
+    cache = {}
+
+    def encode(value):
+        key = (type(value), value)  # keep 5 and 5.0 apart
+        data = cache.get(key)
+        if data is None:
+            data = render(value)
+            if len(cache) < 256:
+                cache[key] = data
+        return data
+    return encode
+
+
+SLOT_ENCODERS = {
+    'text': _encode_text,
+    'score': _memoized(_encode_text),
+    'bar': _memoized(lambda score: score_bar(score).encode('utf-8')),
+    'status': lambda status: f" - {status}".encode('utf-8') if status else b'',
+    'date': lambda value: value.strftime('%d/%m/%Y %H:%M').encode('utf-8'),
+}
+
+
+class ReportTemplate:
+    """
+    Report layout compiled once into pre-encoded UTF-8 static chunks and
+    typed slots. Rendering only encodes the slot values and joins bytes.
+    """
+
+    def __init__(self, layout: list):
+        self.ops = self._compile(layout)
+
+    @classmethod
+    def _compile(cls, layout: list) -> list:
+        ops = []
+        pending = []  # adjacent static strings are merged into one chunk
+
+        def flush():
+            if pending:
+                ops.append(('static', "".join(pending).encode('utf-8')))
+                pending.clear()
+
+        for part in layout:
+            if isinstance(part, str):
+                pending.append(part)
+                continue
+            flush()
+            if isinstance(part, Slot):
+                if part.kind not in SLOT_ENCODERS:
+                    raise ValueError(f"Unknown slot type: {part.kind}")
+                ops.append(('slot', part.key, SLOT_ENCODERS[part.kind], part.default))
+            elif isinstance(part, Each):
+                ops.append(('each', part.key, cls._compile(part.layout)))
+            elif isinstance(part, When):
+                ops.append(('when', part.key, cls._compile(part.layout)))
+            else:
+                raise TypeError(f"Unsupported layout part: {part!r}")
+        flush()
+        return ops
+
+    @classmethod
+    def _render_ops(cls, ops: list, context: dict, out: list):
+        for op in ops:
+            kind = op[0]
+            if kind == 'static':
+                out.append(op[1])
+            elif kind == 'slot':
+                out.append(op[2](context.get(op[1], op[3])))
+            elif kind == 'each':
+                sub = op[2]
+                for index, item in enumerate(context.get(op[1]) or (), 1):
+                    item = dict(item) if isinstance(item, dict) else {'value': item}
+                    item['index'] = index
+                    cls._render_ops(sub, item, out)
+            elif context.get(op[1]):
+                cls._render_ops(op[2], context, out)
+
+    def render_fragments(self, context: dict) -> list:
+        """Return the list of byte fragments for a context"""
+        out = []
+        self._render_ops(self.ops, context, out)
+        return out
+
+    def render(self, context: dict) -> bytes:
+        return b"".join(self.render_fragments(context))
+
+    def render_around(self, context: dict, key: str) -> tuple:
+        """Render all but the top-level slot `key`: (bytes before it, bytes after it)"""
+        before, after = [], []
+        out = before
+        for op in self.ops:
+            if op[0] == 'slot' and op[1] == key and out is before:
+                out = after
+                continue
+            self._render_ops([op], context, out)
+        return b"".join(before), b"".join(after)
+
+
+# =============================================================================
+# REPORT LAYOUT
+# =============================================================================
+
+_SECTION_BREAK = f"\n{SEPARATOR}\n\n"
+
+REPORT_LAYOUT = [
+    HEADER_BANNER,
+    "\n📅 Ngày phân tích: ", Slot('generated_at', 'date'),
+    "\n👤 Học viên: ", Slot('student_name', default='N/A'), "\n",
+    _SECTION_BREAK,
+    "📊 ĐIỂM TỔNG THỂ: ", Slot('overall', 'score', 0), "\n",
+    "   ", Slot('band_description'), "\n",
+    _SECTION_BREAK,
+    "📈 CHI TIẾT ĐIỂM:\n",
+    Each('skills', [
+        "   • ", Slot('label'), ": ", Slot('score', 'score'), " [", Slot('score', 'bar'), "]\n",
+    ]),
+    _SECTION_BREAK,
+    "📝 TÓM TẮT ĐÁNH GIÁ:\n", Slot('summary'), "\n",
+    _SECTION_BREAK,
+    "💪 ĐIỂM MẠNH:\n",
+    Each('strengths', [
+        "   ✓ ", Slot('skill'), ": ", Slot('score', 'score'), Slot('status', 'status'), "\n",
+    ]),
+    _SECTION_BREAK,
+    "📉 ĐIỂM CẦN CẢI THIỆN:\n",
+    Each('weaknesses', [
+        "   ⚠ ", Slot('skill'), ": ", Slot('score', 'score'), Slot('status', 'status'), "\n",
+    ]),
+    _SECTION_BREAK,
+    "🎯 ĐỀ XUẤT CẢI THIỆN:\n",
+    Each('recommendations', [
+        "\n   📌 ", Slot('skill'), ":\n",
+        Each('items', ["      → ", Slot('value'), "\n"]),
+    ]),
+    _SECTION_BREAK,
+    "📌 KẾ HOẠCH HÀNH ĐỘNG:\n",
+    Each('action_items', ["   ", Slot('index', 'score'), ". ", Slot('value'), "\n"]),
+    When('ai_heading', [_SECTION_BREAK, Slot('ai_heading'), "\n", Slot('ai_text'), "\n"]),
+    f"\n{SEPARATOR}\n{FOOTER}\n",
+]
+
+REPORT_TEMPLATE = ReportTemplate(REPORT_LAYOUT)
+
+
+def _ai_section(analysis: dict):
+    """Return (heading, text) of the AI analysis, or None when absent"""
+    if 'llm_analysis' in analysis:
+        # Web backend: always labelled with the provider
+        return f"🤖 PHÂN TÍCH AI ({analysis.get('llm_provider', 'AI')}):", analysis['llm_analysis']
+    if analysis.get('ai_analysis'):
+        # Desktop app
+        return "🤖 PHÂN TÍCH AI:", analysis['ai_analysis']
+    return None
+
+
+def report_context(analysis: dict, generated_at: datetime = None) -> dict:
+    """
+    Build the template context for an analysis.
+    Works with analyses from both the Flask backend and the desktop app.
+    """
+    context = dict(analysis)
+    context['generated_at'] = generated_at or datetime.now()
+    ai = _ai_section(analysis)
+    if ai:
+        context['ai_heading'], context['ai_text'] = ai[0], str(ai[1])
+    else:
+        context['ai_heading'] = None
+    return context
+
+
+class ReportDataError(ValueError):
+    """Raised when an analysis does not have the shape the report layout needs"""
+    pass
+
+
+# List fields of an analysis whose items are dicts with a numeric 'score'
+SCORED_LISTS = ('skills', 'strengths', 'weaknesses', 'recommendations')
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def check_analysis(analysis) -> None:
+    """
+    Raise ReportDataError unless the analysis can be rendered. Lets callers
+    reject bad input before a streamed response has started.
+    """
+    if not isinstance(analysis, dict):
+        raise ReportDataError('analysis must be an object')
+    if 'overall' in analysis and not _is_number(analysis['overall']):
+        raise ReportDataError('overall must be a number')
+    for key in SCORED_LISTS:
+        items = analysis.get(key)
+        if items is None:
+            continue
+        if not isinstance(items, list):
+            raise ReportDataError(f'{key} must be a list')
+        for item in items:
+            if not isinstance(item, dict):
+                raise ReportDataError(f'{key} items must be objects')
+            if not _is_number(item.get('score')) and (key == 'skills' or 'score' in item):
+                raise ReportDataError(f'{key} items need a numeric score')
+    if not isinstance(analysis.get('action_items', []), list):
+        raise ReportDataError('action_items must be a list')
+
+
+def render_report_bytes(analysis: dict, generated_at: datetime = None) -> bytes:
+    """Render the UTF-8 report for an analysis"""
+    return REPORT_TEMPLATE.render(report_context(analysis, generated_at))
+
+
+def render_report_parts(analysis: dict) -> tuple:
+    """
+    The report without its generation date, as (before, after) bytes.
+    The parts only depend on the analysis, so they can be cached; stamp_report
+    puts the date back in.
+    """
+    return REPORT_TEMPLATE.render_around(report_context(analysis), 'generated_at')
+
+
+def stamp_report(parts: tuple, generated_at: datetime = None) -> bytes:
+    """Same bytes as render_report_bytes, from render_report_parts() output"""
+    before, after = parts
+    return before + SLOT_ENCODERS['date'](generated_at or datetime.now()) + after
+
+
+def write_report(analysis: dict, stream, generated_at: datetime = None) -> int:
+    """Write a UTF-8 report into a binary stream, returns bytes written"""
+    data = render_report_bytes(analysis, generated_at)
+    stream.write(data)
+    return len(data)
+
+
+def render_report(analysis: dict, generated_at: datetime = None) -> str:
+    """Render the whole report as a string"""
+    return render_report_bytes(analysis, generated_at).decode('utf-8')
+
+
+def report_filename(analysis: dict, generated_at: datetime = None) -> str:
+    """Default download name for a student's report"""
+    generated_at = generated_at or datetime.now()
+    return f"IELTS_Report_{analysis.get('student_name', 'Student')}_{generated_at.strftime('%Y%m%d')}.txt"
+
+
+class _ChunkSink(RawIOBase):
+    """Write-only, non-seekable sink that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_reports_zip(analyses, generated_at: datetime = None):
+    """
+    Stream a zip archive with one report per student.
+    Bytes are yielded as soon as each entry is written, so only the current
+    report (plus the zip central directory) is ever held in memory.
+    """
+    generated_at = generated_at or datetime.now()
+    sink = _ChunkSink()
+
+    # A non-seekable sink makes zipfile use data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for index, analysis in enumerate(analyses, 1):
+            if 'error' in analysis:
+                continue
+            name = re.sub(r'[\\/:*?"<>|]+', '_', report_filename(analysis, generated_at))
+            with zf.open(f"{index:06d}_{name}", mode='w') as entry:
+                write_report(analysis, entry, generated_at)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    # Central directory is written on close
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
@@ -0,0 +1,60 @@
+"""
+IELTS Score Analyzer - Response Cache
+Deterministic content hashes (ETags) and a small LRU cache of rendered responses
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Fields that change on every request without changing the meaning of a response
+VOLATILE_FIELDS = ('analyzed_at',)
+
+
+def content_hash(payload, namespace: str = '', exclude=VOLATILE_FIELDS) -> str:
+    """
+    Stable SHA-256 of a JSON-compatible payload.
+    Keys are sorted, so equal content always hashes the same way. The namespace
+    keeps different representations of the same payload (JSON, report) apart.
+    """
+    if isinstance(payload, dict) and exclude:
+        payload = {k: v for k, v in payload.items() if k not in exclude}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    # surrogatepass: a lone surrogate in a student name still hashes
+    return hashlib.sha256(f"{namespace}:{canonical}".encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache keyed by content hash"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
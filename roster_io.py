@@ -0,0 +1,428 @@
+"""
+IELTS Score Analyzer - Roster Input
+Streaming readers for student rosters exported from Excel and other tools
+
+Rows are yielded as dicts with canonical keys (student_name, student_id,
+listening, speaking, reading, writing), decoded incrementally from the
+binary upload stream. CSV, XLSX, JSON arrays and JSON Lines all produce
+the same row stream. CSV files on disk can also be read through mmap in
+line-aligned byte ranges (MappedRoster).
+"""
+
+import csv
+import codecs
+import io
+import json
+import mmap
+import os
+import unicodedata
+import zipfile
+
+# Optional: Excel support
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# How much of the upload is inspected to guess its encoding and delimiter
+PREFIX_SIZE = 64 * 1024
+
+# Legacy Vietnamese Windows code page used by older Excel exports
+LEGACY_ENCODING = 'cp1258'
+
+# Encodings where b'\n' always ends a line, so byte ranges can be split on it
+BYTE_LINE_ENCODINGS = ('utf-8', 'utf-8-sig', LEGACY_ENCODING)
+
+# Target size of one byte range when reading a mapped roster
+RANGE_SIZE = 4 * 1024 * 1024
+
+# Text read per step by the incremental JSON parser
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Largest single JSON element (array item or JSON Lines line), in characters;
+# a malformed element would otherwise be buffered until the end of the upload
+MAX_JSON_ELEMENT_SIZE = 1024 * 1024
+
+HEADER_ALIASES = {
+    'name': 'student_name',
+    'student name': 'student_name',
+    'full name': 'student_name',
+    'họ tên': 'student_name',
+    'tên học viên': 'student_name',
+    'id': 'student_id',
+    'student id': 'student_id',
+    'mã học viên': 'student_id',
+}
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """Guess the text encoding of an upload from its first bytes"""
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+
+    # UTF-16 without BOM: every other byte of ASCII text is zero
+    sample = prefix[:1024]
+    if len(sample) >= 4:
+        if sample[1::2].count(0) > len(sample) // 4 and sample[0::2].count(0) == 0:
+            return 'utf-16-le'
+        if sample[0::2].count(0) > len(sample) // 4 and sample[1::2].count(0) == 0:
+            return 'utf-16-be'
+
+    try:
+        # final=False tolerates a multi-byte character cut at the prefix end
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return LEGACY_ENCODING
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays an already-read prefix before the rest of a binary stream"""
+
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            n = min(len(buffer), len(self._prefix))
+            buffer[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._stream.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
+
+def open_text(stream, encoding: str = None):
+    """
+    Wrap a binary stream in an incrementally decoding text stream.
+    Returns (text_stream, encoding, text_prefix).
+    """
+    prefix = stream.read(PREFIX_SIZE)
+    encoding = encoding or detect_encoding(prefix)
+    raw = io.BufferedReader(_PrefixedStream(prefix, stream))
+    text = io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline='')
+    preview = prefix.decode(encoding, errors='ignore')
+    return text, encoding, preview
+
+
+def canonical_header(name: str) -> str:
+    key = unicodedata.normalize('NFC', (name or '').strip().lstrip('﻿')).lower()
+    key = key.replace('_', ' ')
+    if key in HEADER_ALIASES:
+        return HEADER_ALIASES[key]
+    return key.replace(' ', '_')
+
+
+def sniff_delimiter(preview: str) -> str:
+    """Excel in Vietnamese locales often writes ';' instead of ','"""
+    header = preview.split('\n', 1)[0]
+    counts = {d: header.count(d) for d in (',', ';', '\t')}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else ','
+
+
+def _nfc(value):
+    # cp1258 decodes Vietnamese tones as combining marks; store composed text
+    if isinstance(value, str) and not unicodedata.is_normalized('NFC', value):
+        return unicodedata.normalize('NFC', value)
+    return value
+
+
+class RosterFormatError(ValueError):
+    """Upload that cannot be read as a roster"""
+
+
+def iter_csv_rows(stream, encoding: str = None):
+    """Yield roster rows from a binary CSV stream, decoding as it reads"""
+    text, encoding, preview = open_text(stream, encoding)
+    reader = csv.reader(text, delimiter=sniff_delimiter(preview))
+
+    header = next(reader, None)
+    if header is None:
+        return
+    keys = [canonical_header(name) for name in header]
+
+    for cells in reader:
+        if not any(cell.strip() for cell in cells):
+            continue  # blank lines at the end of Excel exports
+        yield {key: _nfc(cell) for key, cell in zip(keys, cells)}
+
+
+# =============================================================================
+# MEMORY-MAPPED CSV
+# =============================================================================
+
+def split_line_ranges(buffer, start: int, end: int, size: int) -> list:
+    """
+    Cut buffer[start:end] into (start, end) ranges of about `size` bytes,
+    each ending just after a newline. Assumes one record per line.
+    """
+    ranges = []
+    while start < end:
+        cut = min(start + size, end)
+        if cut < end:
+            newline = buffer.find(b'\n', cut - 1, end)
+            cut = end if newline < 0 else newline + 1
+        ranges.append((start, cut))
+        start = cut
+    return ranges
+
+
+class MappedRoster:
+    """
+    A CSV roster file read through a read-only memory map.
+    Rows are decoded one byte range at a time, and pages of finished ranges
+    are dropped again, so memory use stays bounded by the range size.
+    Worker processes can open the same path and read their own ranges.
+    Files that are not line_aligned (UTF-16, or quoted fields) must be read
+    with iter_csv_rows instead.
+    """
+
+    def __init__(self, file):
+        if isinstance(file, (str, os.PathLike)):
+            self._file = open(file, 'rb')
+            self._owns_file = True
+        else:
+            file.flush()
+            self._file = file
+            self._owns_file = False
+        self.size = os.fstat(self._file.fileno()).st_size
+        # An empty file has no rows, as with the streaming reader (mmap cannot map 0 bytes)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+        prefix = self._map[:PREFIX_SIZE] if self._map is not None else b''
+        self.encoding = detect_encoding(prefix)
+        self.delimiter = sniff_delimiter(prefix.decode(self.encoding, errors='ignore'))
+
+        self.keys = []
+        self.data_start = 0
+        self._line_aligned = None
+        if self.supports(self.encoding) and self._map is not None:
+            newline = self._map.find(b'\n')
+            self.data_start = self.size if newline < 0 else newline + 1
+            header = self._map[:self.data_start].decode(self.encoding, errors='replace')
+            self.keys = [canonical_header(name) for name in next(csv.reader([header], delimiter=self.delimiter), [])]
+
+    @staticmethod
+    def supports(encoding: str) -> bool:
+        """Only encodings with single-byte newlines can be split into ranges (see line_aligned)"""
+        return encoding in BYTE_LINE_ENCODINGS
+
+    @property
+    def line_aligned(self) -> bool:
+        """
+        Whether every newline byte ends a record, so ranges() can be used.
+        Quoted fields may hold newlines, so a file with any quote is read as a
+        stream instead (b'"' is never part of a multi-byte character here).
+        """
+        if self._line_aligned is None:
+            self._line_aligned = self.supports(self.encoding)
+            if self._line_aligned and self._map is not None:
+                self._line_aligned = self._map.find(b'"') < 0
+                self.release(0, self.size)
+        return self._line_aligned
+
+    def ranges(self, size: int = RANGE_SIZE, start: int = None, end: int = None) -> list:
+        """Line-aligned ranges over the data rows, or over a sub-range of them"""
+        start = self.data_start if start is None else start
+        end = self.size if end is None else end
+        if start >= end:
+            return []
+        ranges = split_line_ranges(self._map, start, end, size)
+        # Finding the cut points faults in (and reads ahead) pages all over the file
+        self.release(start, end)
+        return ranges
+
+    def row_ranges(self, rows: int, start: int = None, end: int = None) -> list:
+        """Ranges of roughly `rows` rows each, sized from the first rows' average length"""
+        if self._map is None:
+            return []
+        sample = self._map[self.data_start:self.data_start + PREFIX_SIZE]
+        row_bytes = max(1, len(sample) // max(1, sample.count(b'\n')))
+        return self.ranges(rows * row_bytes, start, end)
+
+    def iter_range(self, start: int, end: int):
+        """Yield the rows of one line-aligned byte range"""
+        with memoryview(self._map)[start:end] as view:
+            text = str(view, self.encoding, 'replace')
+        keys = self.keys
+        for cells in csv.reader(io.StringIO(text, newline=''), delimiter=self.delimiter):
+            if not any(cell.strip() for cell in cells):
+                continue
+            yield {key: _nfc(cell) for key, cell in zip(keys, cells)}
+        self.release(start, end)
+
+    def release(self, start: int, end: int):
+        """Let the kernel drop the pages of a range that has been parsed"""
+        if hasattr(mmap, 'MADV_DONTNEED'):
+            start -= start % mmap.PAGESIZE
+            self._map.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def __iter__(self):
+        for start, end in self.ranges():
+            yield from self.iter_range(start, end)
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _canonical_row(row: dict) -> dict:
+    return {canonical_header(str(key)): _nfc(value) for key, value in row.items()}
+
+
+def iter_xlsx_rows(stream):
+    """Yield roster rows from the first sheet of an XLSX workbook"""
+    if openpyxl is None:
+        raise RosterFormatError("Chưa cài đặt thư viện đọc Excel. Chạy: pip install openpyxl")
+
+    # read_only mode streams rows from the sheet XML instead of loading the workbook
+    try:
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        raise RosterFormatError(f"Invalid XLSX file: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keys = [canonical_header(str(name) if name is not None else '') for name in header]
+        for cells in rows:
+            if all(cell is None or (isinstance(cell, str) and not cell.strip()) for cell in cells):
+                continue
+            yield {key: _nfc(cell) for key, cell in zip(keys, cells) if key}
+    finally:
+        workbook.close()
+
+
+def _iter_json_array(text):
+    """Incrementally parse the elements of a top-level JSON array"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = text.read(JSON_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] != '[':
+        raise RosterFormatError("JSON roster must be an array of students")
+    pos += 1
+
+    expect_value = True
+    element = 0
+    while True:
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise RosterFormatError("Unexpected end of JSON roster")
+        if buffer[pos] == ']':
+            return
+        if not expect_value:
+            if buffer[pos] != ',':
+                raise RosterFormatError(f"Expected ',' in JSON roster near: {buffer[pos:pos + 20]!r}")
+            pos += 1
+            expect_value = True
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise RosterFormatError(f"Invalid JSON in roster element {element + 1}: {e.msg}")
+            _check_element_size(len(buffer) - pos, f"Roster element {element + 1}")
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # A number at the end of the buffer may continue in the next chunk
+            _check_element_size(len(buffer) - pos, f"Roster element {element + 1}")
+            fill()
+            continue
+        pos = end
+        element += 1
+        expect_value = False
+        yield value
+
+
+def _check_element_size(size: int, what: str):
+    if size > MAX_JSON_ELEMENT_SIZE:
+        raise RosterFormatError(f"{what} is malformed or larger than {MAX_JSON_ELEMENT_SIZE} characters")
+
+
+def _iter_json_lines(text):
+    number = 0
+    while True:
+        # Bounded reads: one huge line must not be buffered whole
+        line = text.readline(MAX_JSON_ELEMENT_SIZE + 1)
+        if not line:
+            return
+        number += 1
+        _check_element_size(len(line), f"Line {number}")
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise RosterFormatError(f"Invalid JSON on line {number}: {e.msg}")
+
+
+def iter_json_rows(stream, encoding: str = None):
+    """Yield roster rows from a JSON array or JSON Lines upload"""
+    text, encoding, preview = open_text(stream, encoding)
+    first = preview.lstrip('﻿ \t\r\n')[:1]
+
+    if first == '[':
+        values = _iter_json_array(text)
+    else:
+        values = _iter_json_lines(text)
+
+    for value in values:
+        yield _canonical_row(value) if isinstance(value, dict) else {}
+
+
+ROSTER_READERS = {
+    '.csv': iter_csv_rows,
+    '.txt': iter_csv_rows,
+    '.xlsx': iter_xlsx_rows,
+    '.xlsm': iter_xlsx_rows,
+    '.json': iter_json_rows,
+    '.jsonl': iter_json_rows,
+    '.ndjson': iter_json_rows,
+}
+
+
+def iter_roster_rows(stream, filename: str = ''):
+    """Pick a reader from the file extension (CSV when unknown)"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    return ROSTER_READERS.get(extension, iter_csv_rows)(stream)
@@ -0,0 +1,128 @@
+"""
+IELTS Score Analyzer - Compiled Rules
+Declarative analysis rules compiled once into closures
+
+RULE_SPEC holds every threshold, comparison and sentence template the
+rule-based analysis uses. compile_rules() turns it into plain Python
+closures; the engine and both apps run the same compiled RULES. Batches
+need no vectorized form: they evaluate the rules once per distinct score
+profile (see analysis_results.ResultBatch), and cohort statistics use the
+half-band level table.
+"""
+
+import operator
+
+RULE_SPEC = {
+    # First matching [level, comparison, value] wins; otherwise the default
+    'levels': {'thresholds': [['high', '>=', 7], ['medium', '>=', 5]], 'default': 'low'},
+    # A skill is a strength when its score compares this way to the overall band
+    'strength': ['>=', 'overall'],
+    # Status of a strength; weaknesses are always 'needs_work'
+    'status': {'thresholds': [['excellent', '>=', 7]], 'default': 'good'},
+    # The top strength is highlighted in the summary when it passes this test
+    'highlight': ['>=', 7],
+    # Targets: weakest skill + step, overall + step, capped at max
+    'targets': {'weakest': 1, 'overall': 0.5, 'max': 9},
+    # Recommendations repeated for the top strength
+    'maintain_items': 2,
+    'templates': {
+        'overall': "đạt điểm IELTS tổng thể {overall}.",
+        'strengths': "Có khả năng {names} tốt",
+        'highlight': " với điểm nổi bật ở kỹ năng {name} ({score}).",
+        'no_highlight': ".",
+        'weaknesses': "Tuy nhiên, {names} còn hạn chế do có thể chưa thường xuyên luyện tập các kỹ năng này.",
+        'weakest_action': "Ưu tiên cải thiện kỹ năng {name} (hiện tại: {score}, mục tiêu: {target})",
+        'overall_action': "Đặt mục tiêu đạt {target} trong 3 tháng tới",
+        'and': " và ",
+    },
+}
+
+COMPARISONS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+}
+
+HALF_BANDS = 19
+
+
+class RuleSpecError(ValueError):
+    """Raised when a rule spec cannot be compiled"""
+    pass
+
+
+def _comparison(symbol: str):
+    try:
+        return COMPARISONS[symbol]
+    except KeyError:
+        raise RuleSpecError(f"Unknown comparison: {symbol!r}") from None
+
+
+def _number(value):
+    if type(value) not in (int, float):
+        raise RuleSpecError(f"Expected a number, got {value!r}")
+    return value
+
+
+def _compile(arguments: str, expression: str):
+    """
+    One lambda from validated spec pieces (comparison symbols from
+    COMPARISONS, numbers and repr'd labels only), as fast as inline code.
+    """
+    return eval(f"lambda {arguments}: {expression}", {'__builtins__': {}, 'min': min})
+
+
+def _classifier(spec: dict):
+    """score -> label closure for a thresholds/default block"""
+    expression = repr(str(spec['default']))
+    for label, symbol, value in reversed(spec['thresholds']):
+        _comparison(symbol)
+        expression = f"{str(label)!r} if score {symbol} {_number(value)!r} else ({expression})"
+    return _compile('score', expression)
+
+
+class CompiledRules:
+    """Closures and templates compiled from one rule spec"""
+
+    def __init__(self, spec: dict):
+        try:
+            self.level = _classifier(spec['levels'])
+            self.status = _classifier(spec['status'])
+
+            symbol, against = spec['strength']
+            if against != 'overall':
+                raise RuleSpecError(f"Strengths compare against 'overall', not {against!r}")
+            self.is_strength = _comparison(symbol)
+
+            symbol, value = spec['highlight']
+            _comparison(symbol)
+            self.highlight = _compile('score', f"score {symbol} {_number(value)!r}")
+
+            targets = spec['targets']
+            cap = _number(targets['max'])
+            self.weakest_target = _compile('score', f"min({cap!r}, score + {_number(targets['weakest'])!r})")
+            self.overall_target = _compile('overall', f"min({cap!r}, overall + {_number(targets['overall'])!r})")
+
+            self.maintain_items = int(spec['maintain_items'])
+            self.templates = {name: text.format for name, text in spec['templates'].items()}
+            self.join = spec['templates']['and'].join
+        except RuleSpecError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuleSpecError(f"Invalid rule spec: {e!r}") from e
+
+        # Level of every half-band, for table lookups on score*2
+        self.half_band_levels = tuple(self.level(i / 2) for i in range(HALF_BANDS))
+        self.spec = spec
+
+    def render(self, template: str, **fields) -> str:
+        return self.templates[template](**fields)
+
+
+def compile_rules(spec: dict = RULE_SPEC) -> CompiledRules:
+    return CompiledRules(spec)
+
+
+RULES = compile_rules()
@@ -0,0 +1,353 @@
+"""
+IELTS Score Analyzer - Sharded Batch Mode
+Map-reduce batch analysis across processes or hosts sharing a filesystem
+
+    plan    split the input into shards and write plan.json to a work directory
+    work    analyze one shard: partial output + mergeable aggregate state
+    reduce  concatenate partial outputs in order and merge the state
+    run     plan, start N local worker processes, reduce
+
+Usage:
+    python sharding.py run roster.csv -o results.jsonl --shards 8 --processes 4
+    python sharding.py plan roster.csv --work-dir /shared/job1 --shards 64
+    python sharding.py work /shared/job1 --shard 17          (on any node)
+    python sharding.py reduce /shared/job1 -o results.jsonl
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from batch_validation import SKILLS
+from cohort_format import CohortFile, COHORT_EXTENSION, convert_roster
+from cohort_stats import CohortStats, RunningMoments, doubled_from_validation, OVERALL_BY_SUM, INVALID_SCORE
+from ielts_batch import analyze_rows, task_rows, ENCODERS, StreamOutput, Progress, DEFAULT_CHUNK_ROWS
+from roster_io import MappedRoster
+
+# Optional: vectorized moments when numpy is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PLAN_FILE = 'plan.json'
+PLAN_VERSION = 1
+SHARD_FORMATS = ('jsonl', 'csv')     # formats whose parts can be concatenated
+
+
+class ShardError(RuntimeError):
+    """Missing or inconsistent shard files"""
+
+
+# =============================================================================
+# AGGREGATE STATE
+# =============================================================================
+
+class ShardState:
+    """
+    Mergeable statistics of one shard: half-band histograms (exact quantile
+    sketches, since scores take 19 values) and Welford moments per skill
+    and for the overall band.
+    """
+
+    MOMENT_KEYS = SKILLS + ('overall',)
+
+    def __init__(self):
+        self.stats = CohortStats()
+        self.moments = {key: RunningMoments() for key in self.MOMENT_KEYS}
+
+    def add(self, doubled):
+        """Fold in a score*2 block (see cohort_stats.CohortStats.add_doubled)"""
+        self.stats.add_doubled(doubled)
+
+        if np is not None and isinstance(doubled, np.ndarray):
+            valid_rows = np.ones(len(doubled), dtype=bool)
+            for k, skill in enumerate(SKILLS):
+                column = doubled[:, k]
+                valid = column != INVALID_SCORE
+                valid_rows &= valid
+                self.moments[skill].add_values(column[valid] / 2)
+            sums = doubled[valid_rows].sum(axis=1)
+            self.moments['overall'].add_values(np.asarray(OVERALL_BY_SUM)[sums] / 2)
+            return
+
+        for base in range(0, len(doubled), 4):
+            row = doubled[base:base + 4]
+            for skill, value in zip(SKILLS, row):
+                if value != INVALID_SCORE:
+                    self.moments[skill].add(value / 2)
+            if INVALID_SCORE not in row:
+                self.moments['overall'].add(OVERALL_BY_SUM[sum(row)] / 2)
+
+    def merge(self, other: 'ShardState') -> 'ShardState':
+        self.stats.merge(other.stats)
+        for key in self.MOMENT_KEYS:
+            self.moments[key].merge(other.moments[key])
+        return self
+
+    def to_state(self) -> dict:
+        return {
+            'histograms': self.stats.to_state(),
+            'moments': {key: m.to_json() for key, m in self.moments.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'ShardState':
+        shard = cls()
+        shard.stats = CohortStats.from_state(state['histograms'])
+        shard.moments = {key: RunningMoments(**state['moments'][key]) for key in cls.MOMENT_KEYS}
+        return shard
+
+    def to_json(self) -> dict:
+        """Cohort statistics, with the moment-based mean/variance alongside"""
+        report = self.stats.to_json()
+        for key, moments in self.moments.items():
+            section = report['overall'] if key == 'overall' else report['skills'][key]
+            section['welford'] = {'n': moments.n, 'mean': round(moments.mean, 6),
+                                  'variance': round(moments.variance(), 6)}
+        return report
+
+
+# =============================================================================
+# COORDINATOR
+# =============================================================================
+
+def _write_json(path: str, data: dict):
+    """Write through a temp file so readers never see a partial file"""
+    temp = f"{path}.tmp{os.getpid()}"
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+def load_plan(work_dir: str) -> dict:
+    with open(os.path.join(work_dir, PLAN_FILE), encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ShardError(f"Unsupported plan version in {work_dir}")
+    return plan
+
+
+def plan_shards(input_path: str, work_dir: str, shards: int, output_format: str = 'jsonl',
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Split the input into `shards` byte ranges (CSV) or record ranges
+    (cohort file). Other inputs are converted to a cohort file first.
+    """
+    if output_format not in SHARD_FORMATS:
+        raise ShardError(f"Sharded output must be one of: {', '.join(SHARD_FORMATS)}")
+    os.makedirs(work_dir, exist_ok=True)
+    # Results of an earlier plan in the same directory must not be reduced
+    for name in os.listdir(work_dir):
+        if name.startswith('shard-') or name == 'stats.json':
+            os.remove(os.path.join(work_dir, name))
+    input_path = os.path.abspath(input_path)
+    extension = os.path.splitext(input_path)[1].lower()
+
+    kind = ranges = None
+    if extension in ('.csv', '.txt') and os.path.getsize(input_path):
+        with MappedRoster(input_path) as roster:
+            if roster.line_aligned:
+                kind = 'range'
+                size = -(-(roster.size - roster.data_start) // shards)
+                ranges = roster.ranges(max(1, size))
+
+    if kind is None:
+        if extension != COHORT_EXTENSION:
+            # XLSX/JSON/UTF-16 rows cannot be split by byte offset; convert once
+            converted = os.path.join(work_dir, 'input' + COHORT_EXTENSION)
+            convert_roster(input_path, converted)
+            input_path = converted
+        with CohortFile(input_path) as cohort:
+            count = len(cohort)
+        kind = 'cohort'
+        size = max(1, -(-count // shards))
+        ranges = [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    plan = {
+        'version': PLAN_VERSION,
+        'input': input_path,
+        'kind': kind,
+        'format': output_format,
+        'chunk_rows': chunk_rows,
+        'shards': [list(r) for r in ranges],
+        'created_at': datetime.now().isoformat(),
+    }
+    _write_json(os.path.join(work_dir, PLAN_FILE), plan)
+    return plan
+
+
+def shard_paths(work_dir: str, shard: int, output_format: str):
+    base = os.path.join(work_dir, f"shard-{shard:05d}")
+    return f"{base}.{output_format}", f"{base}.state.json"
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def run_shard(work_dir: str, shard: int) -> dict:
+    """
+    Analyze one shard. The state file is renamed into place last, so its
+    presence means the shard is complete; re-running a shard overwrites it.
+    """
+    plan = load_plan(work_dir)
+    if not 0 <= shard < len(plan['shards']):
+        raise ShardError(f"Shard {shard} is not in the plan (0-{len(plan['shards']) - 1})")
+    start, end = plan['shards'][shard]
+    output_path, state_path = shard_paths(work_dir, shard, plan['format'])
+    encode = ENCODERS[plan['format']]
+    chunk_rows = plan['chunk_rows']
+
+    if plan['kind'] == 'range':
+        with MappedRoster(plan['input']) as roster:
+            tasks = [('range', plan['input'], s, e) for s, e in roster.row_ranges(chunk_rows, start, end)]
+    else:
+        tasks = [('cohort', plan['input'], s, min(s + chunk_rows, end)) for s in range(start, end, chunk_rows)]
+
+    state = ShardState()
+    temp_output = f"{output_path}.tmp{os.getpid()}"
+    with open(temp_output, 'wb') as out:
+        for task in tasks:
+            rows = task_rows(task)
+            results, validation = analyze_rows(rows)
+            out.write(encode(results, [row.get('student_id') for row in rows]))
+            state.add(doubled_from_validation(validation))
+    os.replace(temp_output, output_path)
+
+    summary = {'shard': shard, 'rows': state.stats.rows, 'state': state.to_state()}
+    _write_json(state_path, summary)
+    return summary
+
+
+# =============================================================================
+# REDUCER
+# =============================================================================
+
+def reduce_shards(work_dir: str, output_path: str = None) -> dict:
+    """Concatenate shard outputs in order and merge their state into cohort statistics"""
+    plan = load_plan(work_dir)
+    shard_files = [shard_paths(work_dir, i, plan['format']) for i in range(len(plan['shards']))]
+    missing = [i for i, (_, state_path) in enumerate(shard_files) if not os.path.exists(state_path)]
+    if missing:
+        raise ShardError(f"Shards not finished: {', '.join(map(str, missing))}")
+
+    total = ShardState()
+    output = StreamOutput(output_path, plan['format']) if output_path else None
+    try:
+        for output_file, state_path in shard_files:
+            with open(state_path, encoding='utf-8') as f:
+                total.merge(ShardState.from_state(json.load(f)['state']))
+            if output is not None:
+                with open(output_file, 'rb') as part:
+                    while True:
+                        block = part.read(1024 * 1024)
+                        if not block:
+                            break
+                        output.write(block)
+    finally:
+        if output is not None:
+            output.close()
+
+    stats = total.to_json()
+    stats['shards'] = len(shard_files)
+    _write_json(os.path.join(work_dir, 'stats.json'), stats)
+    return stats
+
+
+# =============================================================================
+# LOCAL RUN
+# =============================================================================
+
+def run_local(input_path: str, output_path: str, work_dir: str, shards: int, processes: int,
+              output_format: str = 'jsonl', chunk_rows: int = DEFAULT_CHUNK_ROWS, quiet: bool = False) -> dict:
+    """Plan, run every shard as a separate worker process, then reduce"""
+    plan = plan_shards(input_path, work_dir, shards, output_format, chunk_rows)
+    pending = list(range(len(plan['shards'])))
+    running = {}
+    progress = Progress(quiet=quiet)
+
+    while pending or running:
+        while pending and len(running) < processes:
+            shard = pending.pop(0)
+            command = [sys.executable, os.path.abspath(__file__), 'work', work_dir, '--shard', str(shard)]
+            running[shard] = subprocess.Popen(command, stderr=subprocess.DEVNULL if quiet else None)
+        for shard, process in list(running.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            del running[shard]
+            if code != 0:
+                for other in running.values():
+                    other.kill()
+                raise ShardError(f"Worker for shard {shard} exited with code {code}")
+            with open(shard_paths(work_dir, shard, plan['format'])[1], encoding='utf-8') as f:
+                summary = json.load(f)
+            progress.update(summary['rows'], summary['state']['histograms']['invalid_rows'])
+        time.sleep(0.05)
+
+    progress.finish()
+    return reduce_shards(work_dir, output_path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded IELTS batch analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="split an input into shards")
+    plan.add_argument('input')
+    plan.add_argument('--work-dir', required=True)
+    plan.add_argument('--shards', type=int, required=True)
+
+    work = commands.add_parser('work', help="analyze one shard")
+    work.add_argument('work_dir')
+    work.add_argument('--shard', type=int, required=True)
+
+    reduce = commands.add_parser('reduce', help="merge finished shards")
+    reduce.add_argument('work_dir')
+    reduce.add_argument('-o', '--output', help="final results file (default: statistics only)")
+
+    run = commands.add_parser('run', help="plan, run local worker processes and reduce")
+    run.add_argument('input')
+    run.add_argument('-o', '--output', required=True)
+    run.add_argument('--work-dir', help="default: <output>.shards")
+    run.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    run.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    run.add_argument('-q', '--quiet', action='store_true')
+
+    for command in (plan, run):
+        command.add_argument('--format', choices=SHARD_FORMATS, default='jsonl')
+        command.add_argument('-c', '--chunk-size', type=int, default=DEFAULT_CHUNK_ROWS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        if args.command == 'plan':
+            plan = plan_shards(args.input, args.work_dir, max(1, args.shards), args.format, args.chunk_size)
+            print(f"{len(plan['shards'])} shards -> {os.path.join(args.work_dir, PLAN_FILE)}")
+        elif args.command == 'work':
+            summary = run_shard(args.work_dir, args.shard)
+            print(f"shard {args.shard}: {summary['rows']:,} rows", file=sys.stderr)
+        elif args.command == 'reduce':
+            stats = reduce_shards(args.work_dir, args.output)
+            print(json.dumps(stats, ensure_ascii=False, indent=2))
+        else:
+            work_dir = args.work_dir or f"{args.output}.shards"
+            stats = run_local(args.input, args.output, work_dir, max(1, args.shards),
+                              max(1, args.processes), args.format, args.chunk_size, args.quiet)
+            print(f"{stats['rows']:,} rows in {stats['shards']} shards; statistics in "
+                  f"{os.path.join(work_dir, 'stats.json')}", file=sys.stderr)
+    except (OSError, ShardError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
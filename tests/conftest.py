@@ -0,0 +1,45 @@
+"""
+Shared fixtures: the repo root on sys.path, and every SQLite store of the
+Flask app pointed at a per-test temporary directory.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Module-level defaults are read at import: keep stray databases out of the repo
+_SCRATCH = tempfile.mkdtemp(prefix='ielts-tests-')
+os.environ.setdefault('HISTORY_DB', os.path.join(_SCRATCH, 'history.db'))
+os.environ.setdefault('INCREMENTAL_DB', os.path.join(_SCRATCH, 'incremental.db'))
+os.environ.setdefault('CATALOG_POLL_SECONDS', '0')
+
+import pytest
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """app with a fresh history and incremental store for this test"""
+    import app
+    from history_store import HistoryStore
+    from incremental_store import IncrementalStore
+
+    history = HistoryStore(str(tmp_path / 'history.db'))
+    monkeypatch.setattr(app, 'HISTORY_ENABLED', True)
+    monkeypatch.setattr(app, 'HISTORY_STORE', history)
+    monkeypatch.setattr(app, 'NAME_INDEX', None)
+    monkeypatch.setattr(app, 'COHORT_RANKS', None)
+    monkeypatch.setattr(app, 'INCREMENTAL_STORE', IncrementalStore(str(tmp_path / 'incremental.db')))
+    monkeypatch.setattr(app, 'BATCH_JOBS', type(app.BATCH_JOBS)())
+    app.ANALYSIS_CACHE.clear()
+    yield app
+    app.close_batch_jobs()
+    history.close(timeout=5)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
@@ -0,0 +1,112 @@
+"""Compact result containers (analysis_results.py)"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+import analysis_results
+from analysis_results import AnalysisResult, ProfileCache, ProfileStats, ResultBatch, SKILLS
+from ielts_engine import (
+    NO_PROFILE, analyze_profile, analyze_scores_rule_based, personalize_analysis, profile_code, profile_scores
+)
+from json_serializer import dumps
+
+
+def random_scores(rng) -> dict:
+    # Mostly half-bands, with some scores off the half-band grid
+    return {skill: rng.choice([rng.randrange(0, 19) / 2, round(rng.uniform(0, 9), 2)]) for skill in SKILLS}
+
+
+def test_batch_rows_equal_the_rule_based_analysis():
+    rng = random.Random(3)
+    results, expected = ResultBatch(), []
+    for index in range(300):
+        if index % 50 == 7:
+            results.append_error({'error': 'invalid', 'row': index})
+            expected.append({'error': 'invalid', 'row': index})
+            continue
+        scores, analyzed_at = random_scores(rng), 1_700_000_000.0 + index
+        results.append(scores, f'Học viên {index}', analyzed_at)
+        expected.append(analyze_scores_rule_based(scores, f'Học viên {index}', datetime.fromtimestamp(analyzed_at)))
+
+    assert len(results) == len(expected)
+    assert list(results) == expected
+    assert results[-1] == expected[-1]
+    assert list(results.iter_encoded()) == [dumps(row) for row in expected]
+    with pytest.raises(IndexError):
+        results[len(results)]
+
+
+def test_result_objects_rebuild_the_same_dict():
+    results = ResultBatch()
+    scores = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+    results.append(scores, 'An', 1_700_000_000.0)
+    results.append_error({'error': 'invalid', 'row': 2})
+    result = results.result(0)
+    assert isinstance(result, AnalysisResult)
+    assert result.scores == scores
+    assert result.to_dict() == results[0]
+    assert not hasattr(result, '__dict__')
+    with pytest.raises(ValueError, match='invalid'):
+        results.result(1)
+
+
+def test_profile_codes_round_trip_half_bands_only():
+    rng = random.Random(5)
+    for _ in range(200):
+        scores = {skill: rng.randrange(0, 19) / 2 for skill in SKILLS}
+        assert profile_scores(profile_code(scores)) == scores
+    off_grid = {'listening': 6.3, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+    assert profile_code(off_grid) == NO_PROFILE
+    assert profile_code(dict(off_grid, listening=9.5)) == NO_PROFILE
+
+
+def test_shared_profile_personalizes_like_a_full_analysis():
+    scores = {'listening': 8.0, 'speaking': 5.0, 'reading': 7.5, 'writing': 4.5}
+    analyzed_at = datetime(2026, 3, 14, 9, 26)
+    profile = analyze_profile(scores)
+    for name in ('An', 'Nguyễn Thị Đào'):
+        assert personalize_analysis(profile, name, analyzed_at) == analyze_scores_rule_based(scores, name, analyzed_at)
+
+
+def test_each_profile_is_analyzed_once_per_batch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(analysis_results, 'analyze_profile',
+                        lambda scores: calls.append(scores) or analyze_profile(scores))
+    same = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+    results = ResultBatch()
+    for index in range(10):
+        results.append(same, f'Học viên {index}', 1_700_000_000.0)
+    results.append(dict(same, writing=6.0), 'Bình', 1_700_000_000.0)
+    results.append(dict(same, writing=5.25), 'Chi', 1_700_000_000.0)
+    results.append_reused(same, 'Dũng', 1_600_000_000.0)
+    results.append_error({'error': 'invalid', 'row': 14})
+
+    assert len(calls) == 2
+    assert results.profile_stats() == {'analyzed_rows': 12, 'unique_profiles': 3, 'dedup_ratio': 4.0}
+    assert results[0]['student_name'] == 'Học viên 0' and results[9]['student_name'] == 'Học viên 9'
+    assert results[12]['analyzed_at'] == datetime.fromtimestamp(1_600_000_000.0).isoformat()
+
+
+def test_batches_sharing_a_profile_cache_analyze_each_profile_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(analysis_results, 'analyze_profile',
+                        lambda scores: calls.append(scores) or analyze_profile(scores))
+    same = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+    other = dict(same, writing=6.0)
+    cache, stats = ProfileCache(limit=1), ProfileStats()
+    for chunk in range(3):
+        results = ResultBatch(cache)
+        for index in range(4):
+            results.append(same, f'Học viên {chunk}.{index}', 1_700_000_000.0)
+        results.append(other, 'Bình', 1_700_000_000.0)
+        results.append(dict(same, writing=5.25), 'Chi', 1_700_000_000.0)
+        stats.add(results)
+        assert list(results.iter_encoded()) == [dumps(row) for row in results]
+
+    # Only the first profile fits in the cache; the other is analyzed once per batch
+    assert calls == [same, other, other, other]
+    assert len(cache) == 1
+    assert stats.to_json() == {'analyzed_rows': 18, 'unique_profiles': 5, 'dedup_ratio': 3.6}
+    assert results[0] == analyze_scores_rule_based(same, 'Học viên 2.0', datetime.fromtimestamp(1_700_000_000.0))
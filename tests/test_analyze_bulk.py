@@ -0,0 +1,49 @@
+"""/api/analyze-bulk"""
+
+import json
+
+from json_serializer import dumps
+
+STUDENT = {'student_name': 'Trần Thị Bình', 'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+def test_bulk_rows_match_single_analysis(client):
+    students = [dict(STUDENT, student_id=' HV1 '), dict(STUDENT, student_name='An'), {'student_name': 'x'}]
+    body = client.post('/api/analyze-bulk', json={'students': students}).get_json()
+    assert body['count'] == 3 and body['errors'] == 1
+    single = client.post('/api/analyze', json=students[0]).get_json()
+    strip = lambda row: {k: v for k, v in row.items() if k not in ('analyzed_at', 'percentile')}
+    assert strip(body['results'][0]) == strip(single)
+    assert body['results'][0]['student_id'] == 'HV1'
+    assert 'student_id' not in body['results'][1]
+    assert body['results'][2] == {'error': 'Missing field: listening', 'index': 2}
+
+
+def test_bulk_rejects_bad_student_ids_per_row(app_module, client):
+    students = [dict(STUDENT, student_id={'a': 1}), dict(STUDENT, student_id='x' * 65), dict(STUDENT, student_id=7)]
+    body = client.post('/api/analyze-bulk', json=students).get_json()
+    assert body['errors'] == 2
+    assert body['results'][0] == {'error': 'student_id must be a string', 'index': 0}
+    assert body['results'][1]['index'] == 1
+    assert body['results'][2]['student_id'] == '7'
+
+    history = app_module.history_store()
+    assert history.flush(5)
+    assert [entry['student_id'] for entry in history.query()] == ['7']
+
+
+def test_bulk_response_is_the_serialized_rows(client):
+    raw = client.post('/api/analyze-bulk', json=[STUDENT]).data
+    row = json.loads(raw)['results'][0]
+    assert dumps(row) in raw
+
+
+def test_bulk_request_shape_and_limits(app_module, client, monkeypatch):
+    assert client.post('/api/analyze-bulk', json={'student': STUDENT}).status_code == 400
+    assert client.post('/api/analyze-bulk', json={'students': [STUDENT], 'cohort': ['x']}).status_code == 400
+    monkeypatch.setattr(app_module, 'MAX_BULK_STUDENTS', 2)
+    assert client.post('/api/analyze-bulk', json=[STUDENT] * 3).status_code == 413
+
+    body = client.post('/api/analyze-bulk', json=[STUDENT, STUDENT]).get_json()
+    assert body['count'] == 2 and body['errors'] == 0
+    assert body['profiles'] == {'analyzed_rows': 2, 'unique_profiles': 1, 'dedup_ratio': 2.0}
@@ -0,0 +1,41 @@
+"""Peak memory of a large spooled /api/batch-analyze upload (benchmarks/bench_batch_memory.py)"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('resource')
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+
+def measure(*rows: int, **options) -> list:
+    """
+    Run the benchmark once per roster size, each in a fresh process (ru_maxrss
+    is a peak over the whole process); the runs go in parallel.
+    """
+    runs = [
+        subprocess.Popen([sys.executable, '-c', f"import json, bench_batch_memory as b; "
+                          f"print(json.dumps(b.measure({count}, **{options!r})))"],
+                         cwd=BENCHMARKS, stdout=subprocess.PIPE, text=True)
+        for count in rows
+    ]
+    results = []
+    for run in runs:
+        output, _ = run.communicate(timeout=600)
+        assert run.returncode == 0
+        results.append(json.loads(output.splitlines()[-1]))
+    return results
+
+
+def test_peak_rss_does_not_grow_with_the_roster():
+    # Both uploads are spooled to disk and stream back hundreds of MB of JSON;
+    # keeping the whole batch in memory took over 120 MB for the first alone
+    large, larger = measure(120000, 240000, history=False)
+    assert large['upload_mb'] > 1 and large['response_mb'] > 200
+    # The chunk being analyzed plus the shared profile cache, whatever the roster size
+    assert large['peak_growth_mb'] < 64 and larger['peak_growth_mb'] < 64
+    assert larger['peak_growth_mb'] - large['peak_growth_mb'] < 8
@@ -0,0 +1,58 @@
+"""Column-at-a-time validation of batch scores (batch_validation.py)"""
+
+import pytest
+
+import batch_validation
+from batch_validation import (
+    MISSING, NOT_A_NUMBER, NOT_HALF_BAND, OUT_OF_RANGE, SKILLS, ValidationSummary, validate_columns
+)
+
+CELLS = ['6.5', '7', '', None, 'abc', '9.5', '-1', '6.3', ' 8.0 ', 5.5]
+REASONS = [None, None, MISSING, MISSING, NOT_A_NUMBER, OUT_OF_RANGE, OUT_OF_RANGE, NOT_HALF_BAND, None, None]
+
+
+def row_by_row(cell):
+    """The per-row check the column masks replace"""
+    if cell is None or (isinstance(cell, str) and not cell.strip()):
+        return MISSING
+    try:
+        value = float(cell)
+    except ValueError:
+        return NOT_A_NUMBER
+    if not 0 <= value <= 9:
+        return OUT_OF_RANGE
+    return NOT_HALF_BAND if value * 2 != round(value * 2) else None
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(batch_validation, 'np', None)
+    elif batch_validation.np is None:
+        pytest.skip('numpy is not installed')
+    return request.param
+
+
+def test_column_masks_match_row_by_row_checks(backend):
+    assert [row_by_row(cell) for cell in CELLS] == REASONS
+    columns = {skill: CELLS for skill in SKILLS}
+    validation = validate_columns(columns)
+    for row, reason in enumerate(REASONS):
+        assert validation.is_valid(row) == (reason is None)
+        assert validation.row_errors(row) == ({skill: reason for skill in SKILLS} if reason else {})
+    assert validation.row_scores(8) == {skill: 8.0 for skill in SKILLS}
+    assert validation.row_message(7).startswith('listening: must be a multiple of 0.5')
+    assert validation.to_json()['invalid_rows'] == 6
+
+
+def test_missing_column_is_missing_for_every_row(backend):
+    validation = validate_columns({'listening': ['6'], 'speaking': ['6'], 'reading': ['6']}, 1)
+    assert validation.row_errors(0) == {'writing': MISSING}
+
+
+def test_summary_shifts_chunk_rows_to_batch_positions(backend):
+    summary = ValidationSummary()
+    valid = {skill: ['6.0', '6.5'] for skill in SKILLS}
+    summary.add(validate_columns(valid))
+    summary.add(validate_columns(dict(valid, writing=['6.0', 'x'])))
+    assert summary.to_json() == {'rows': 4, 'invalid_rows': 1, 'errors': {'writing': {NOT_A_NUMBER: [3]}}}
@@ -0,0 +1,81 @@
+"""Hot-reloadable recommendation catalog (catalog.py)"""
+
+import json
+
+import pytest
+
+import catalog
+from catalog import Catalog, CatalogError, CatalogWatcher, get_catalog, set_catalog
+from ielts_engine import analyze_scores_rule_based
+
+SCORES = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+@pytest.fixture
+def restore_catalog():
+    original = get_catalog()
+    yield original
+    set_catalog(original)
+
+
+def edited(band_6: str) -> dict:
+    data = get_catalog().to_json()
+    data['band_descriptions']['6'] = band_6
+    return data
+
+
+def test_catalog_file_round_trips_and_is_immutable():
+    current = get_catalog()
+    with open(current.source, encoding='utf-8') as f:
+        assert current.to_json() == json.load(f)
+    assert Catalog(current.to_json()).version == current.version
+    with pytest.raises(AttributeError):
+        current.version = 'x'
+    with pytest.raises(TypeError):
+        current.recommendations['writing'] = {}
+    assert current.band_description(0) == current.band_descriptions[1]
+
+
+@pytest.mark.parametrize('change', [
+    lambda data: data.pop('skill_names'),
+    lambda data: data['recommendations']['writing'].pop('low'),
+    lambda data: data['recommendations']['writing'].update(low=[]),
+    lambda data: data['band_descriptions'].update({'9': 9}),
+])
+def test_incomplete_catalog_is_rejected(change):
+    data = get_catalog().to_json()
+    change(data)
+    with pytest.raises(CatalogError):
+        Catalog(data)
+
+
+def test_watcher_swaps_in_edits_and_keeps_the_last_good_version(tmp_path, restore_catalog):
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps(edited('Bậc 6 (sửa)'), ensure_ascii=False), encoding='utf-8')
+    watcher = CatalogWatcher(str(path), interval=0)
+    assert watcher.check()
+    assert analyze_scores_rule_based(SCORES, 'An')['band_description'] == 'Bậc 6 (sửa)'
+    assert not watcher.check()
+
+    version = get_catalog().version
+    path.write_text('{"skill_names": ', encoding='utf-8')
+    assert not watcher.check()
+    assert get_catalog().version == version
+
+    path.write_text(json.dumps(restore_catalog.to_json(), ensure_ascii=False) + '\n', encoding='utf-8')
+    assert watcher.check()
+    assert get_catalog().version == restore_catalog.version
+
+
+def test_analyses_after_a_swap_do_not_come_from_the_cache(client, restore_catalog):
+    before = client.post('/api/analyze', json=dict(SCORES, student_name='An')).get_json()
+    set_catalog(Catalog(edited('Bậc 6 (sửa)')))
+    after = client.post('/api/analyze', json=dict(SCORES, student_name='An')).get_json()
+    assert before['band_description'] == restore_catalog.band_descriptions[6]
+    assert after['band_description'] == 'Bậc 6 (sửa)'
+    assert client.get('/api/catalog').get_json()['version'] == get_catalog().version
+
+
+def test_watcher_is_disabled_with_a_zero_interval(monkeypatch):
+    monkeypatch.setattr(catalog, '_WATCHER', None)
+    assert catalog.start_watcher(interval=0) is None
@@ -0,0 +1,120 @@
+"""Binary cohort files and their statistics (cohort_format.py, cohort_stats.py)"""
+
+import io
+import random
+
+import pytest
+
+import cohort_format
+import cohort_stats
+from cohort_format import CohortFile, CohortFormatError, write_cohort
+from cohort_stats import BandHistogram, CohortStats, cohort_stats as scan
+from ielts_engine import analyze_scores_rule_based, calculate_overall
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+ROWS = [
+    {'student_name': 'Nguyễn Văn An', 'student_id': 'HV-01',
+     'listening': '6.5', 'speaking': '6', 'reading': 7, 'writing': 5.5},
+    {'student_name': 'Trần Thị Bình', 'student_id': None,
+     'listening': '8', 'speaking': 'x', 'reading': '7.5', 'writing': '10'},
+    {'student_name': '', 'student_id': 'HV-03',
+     'listening': '0', 'speaking': '9', 'reading': '4.5', 'writing': '3'},
+]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(cohort_format, 'np', None)
+        monkeypatch.setattr(cohort_stats, 'np', None)
+    elif cohort_format.np is None:
+        pytest.skip('numpy is not installed')
+    return request.param
+
+
+def test_rows_round_trip_through_a_mapped_file(tmp_path, backend):
+    path = tmp_path / 'c.ielts'
+    # Chunks of two rows, so the string offsets carry across chunks
+    assert write_cohort(ROWS, path, chunk_rows=2) == 3
+    with CohortFile(str(path)) as cohort:
+        assert len(cohort) == 3
+        assert cohort.row(0) == {'student_name': 'Nguyễn Văn An', 'student_id': 'HV-01',
+                                 'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+        assert cohort.scores(1) == {'listening': 8.0, 'speaking': None, 'reading': 7.5, 'writing': None}
+        assert cohort.student_id(1) == '' and cohort.name(-1) == ''
+        assert [cohort.is_valid(i) for i in range(3)] == [True, False, True]
+        expected = analyze_scores_rule_based(
+            {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}, 'Nguyễn Văn An')
+        assert dict(cohort[0], analyzed_at=None) == dict(expected, analyzed_at=None)
+        with pytest.raises(ValueError):
+            cohort[1]
+        with pytest.raises(IndexError):
+            cohort.row(3)
+
+
+def test_in_memory_buffer_reads_like_the_file(tmp_path):
+    path = tmp_path / 'c.ielts'
+    write_cohort(ROWS, path)
+    with CohortFile(str(path)) as mapped:
+        expected = list(mapped.iter_rows())
+    with CohortFile(path.read_bytes()) as buffered:
+        assert list(buffered.iter_rows()) == expected
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'', 'Not a cohort'),
+    (b'NOTCOHRT' + b'\0' * 100, 'Not a cohort'),
+])
+def test_other_files_are_rejected(data, message):
+    with pytest.raises(CohortFormatError, match=message):
+        CohortFile(data)
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / 'c.ielts'
+    write_cohort(ROWS, path)
+    with pytest.raises(CohortFormatError, match='Truncated'):
+        CohortFile(path.read_bytes()[:-3])
+
+
+def test_stats_match_per_student_analysis(tmp_path, backend):
+    rng = random.Random(7)
+    rows = [{skill: rng.randrange(19) / 2 for skill in SKILLS} for _ in range(500)]
+    rows[10]['writing'] = 'absent'
+    path = tmp_path / 'c.ielts'
+    write_cohort(rows, path)
+    with CohortFile(str(path)) as cohort:
+        stats = scan(cohort, chunk_rows=64)
+
+    valid = [row for row in rows if row['writing'] != 'absent']
+    overall = BandHistogram()
+    for row in valid:
+        overall.counts[int(calculate_overall(row) * 2)] += 1
+    assert stats.rows == 500 and stats.invalid_rows == 1
+    assert stats.overall.counts == overall.counts
+    assert stats.skills['listening'].count == 500 and stats.skills['writing'].count == 499
+    listening = sorted(row['listening'] for row in rows)
+    assert stats.skills['listening'].mean() == pytest.approx(sum(listening) / 500)
+    assert stats.skills['listening'].quantile(0.5) == listening[249]
+
+
+def test_stats_merge_like_one_scan():
+    first, second, both = CohortStats(), CohortStats(), CohortStats()
+    for stats, scores in ((first, {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}),
+                          (second, {'listening': 9.0, 'speaking': None, 'reading': 2.0, 'writing': 4.0})):
+        stats.add_scores(scores)
+        both.add_scores(scores)
+    merged = CohortStats.from_state(first.to_state()).merge(second)
+    assert merged.to_json() == both.to_json()
+    assert merged.to_json()['overall']['count'] == 1
+
+
+def test_cohort_stats_endpoint_reads_cohort_uploads(client, tmp_path):
+    path = tmp_path / 'c.ielts'
+    write_cohort(ROWS, path)
+    response = client.post('/api/cohort-stats', data={'file': (io.BytesIO(path.read_bytes()), 'c.ielts')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['rows'] == 3 and body['invalid_rows'] == 1
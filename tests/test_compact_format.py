@@ -0,0 +1,73 @@
+"""Compact batch output (compact_format.py)"""
+
+import io
+import json
+
+from analysis_results import ResultBatch
+from catalog import get_catalog
+from compact_format import compact_row, expand_row
+from json_serializer import dumps
+
+SCORES = [
+    {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5},
+    {'listening': 8.0, 'speaking': 7.5, 'reading': 8.5, 'writing': 7.0},
+    {'listening': 6.3, 'speaking': 6.0, 'reading': 6.0, 'writing': 6.0},   # not a half-band profile
+]
+
+
+def make_batch():
+    results = ResultBatch()
+    for index, scores in enumerate(SCORES * 2):
+        results.append(scores, f'Học viên "{index}"', 1_700_000_000.0 + index)
+    results.append_error({'error': 'invalid', 'row': 7})
+    return results
+
+
+def test_iter_compact_matches_compact_row(app_module):
+    dictionary = app_module.compact_dictionary(get_catalog())
+    results = make_batch()
+    assert list(results.iter_compact(dictionary)) == [dumps(compact_row(row, dictionary)) for row in results]
+
+
+def test_expand_row_restores_full_analysis(app_module):
+    dictionary = app_module.compact_dictionary(get_catalog())
+    for row in make_batch():
+        compact = json.loads(dumps(compact_row(row, dictionary)))
+        assert expand_row(compact, dictionary.to_json()) == row
+
+
+def test_batch_compact_format(client):
+    roster = "student_name,listening,speaking,reading,writing\nAn,6.5,6.0,7.0,5.5\nBình,5.0,5.5,5.0,4.5\n"
+    full = json.loads(client.post('/api/batch-analyze', data={
+        'file': (io.BytesIO(roster.encode()), 'r.csv')}, content_type='multipart/form-data').data)
+    compact = json.loads(client.post('/api/batch-analyze', data={
+        'file': (io.BytesIO(roster.encode()), 'r.csv'), 'format': 'compact'}, content_type='multipart/form-data').data)
+    assert compact['format'] == 'compact'
+    expanded = [expand_row(row, compact['dictionary']) for row in compact['results']]
+    strip = lambda rows: [dict(row, analyzed_at=None) for row in rows]
+    assert strip(expanded) == strip(full['results'])
+
+
+def test_static_strings_become_indexes(app_module):
+    dictionary = app_module.compact_dictionary(get_catalog())
+    row = make_batch()[0]
+    compact = compact_row(row, dictionary)
+    assert isinstance(compact['band_description'], int)
+    assert dictionary.strings[compact['band_description']] == row['band_description']
+    # Action items with the student's scores in them stay as text
+    assert [isinstance(item, int) for item in compact['action_items']] == [False, False, True, True, True]
+    assert compact['student_name'] == row['student_name']
+    assert dictionary.ref('không có trong bảng') == 'không có trong bảng'
+    error = {'error': 'invalid', 'row': 7}
+    assert compact_row(error, dictionary) == error
+
+
+def test_compact_batch_is_smaller(client):
+    roster = "student_name,listening,speaking,reading,writing\n" + "".join(
+        f"Học viên {i},{5 + i % 4},6.0,7.0,5.5\n" for i in range(50))
+    sizes = [
+        len(client.post('/api/batch-analyze', data={'file': (io.BytesIO(roster.encode()), 'r.csv'), 'format': fmt},
+                        content_type='multipart/form-data').data)
+        for fmt in ('full', 'compact')
+    ]
+    assert sizes[1] < sizes[0] // 2
@@ -0,0 +1,197 @@
+"""SQLite analysis history and its write-behind thread (history_store.py)"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from analysis_results import ResultBatch
+from history_store import HistoryStore, match_query
+from ielts_engine import analyze_scores_rule_based
+
+SCORES = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+class BrokenBatch(ResultBatch):
+    """A batch whose row named 'broken' cannot be serialized"""
+
+    def encoded(self, index, iso=None):
+        if self.names[index] == 'broken':
+            raise UnicodeEncodeError('utf-8', 'broken', 0, 1, 'surrogates not allowed')
+        return super().encoded(index, iso)
+
+
+def test_record_and_query(tmp_path):
+    store = HistoryStore(str(tmp_path / 'h.db'))
+    try:
+        analysis = analyze_scores_rule_based(SCORES, 'Nguyễn Văn An')
+        store.record(analysis, student_id=' HV1 ', cohort='12a')
+        assert store.flush(5)
+        entries = store.query(student_id='HV1', include_result=True)
+        assert len(entries) == 1
+        assert entries[0]['student_name'] == 'Nguyễn Văn An'
+        assert entries[0]['result'] == analysis
+        assert store.query(student_name='  nguyễn   VĂN an') == store.query(student_id='HV1')
+    finally:
+        store.close(5)
+
+
+def test_bad_batch_row_is_skipped_and_writer_keeps_running(tmp_path):
+    store = HistoryStore(str(tmp_path / 'h.db'))
+    try:
+        results = BrokenBatch()
+        results.append(SCORES, 'An')
+        results.append(SCORES, 'broken')
+        results.append_error({'error': 'invalid', 'row': 2})
+        store.record_batch(results, ['HV1', 'HV2', None])
+        store.record({'skills': 'not a list'})
+        assert store.flush(5)
+        assert store.failed == 2
+
+        # A later analysis is still recorded
+        store.record(analyze_scores_rule_based(SCORES, 'Bình'))
+        assert store.flush(5)
+        assert store.count() == 2
+        assert store.written == 2
+    finally:
+        assert store.close(5)
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_flush_and_close_report_a_dead_writer(tmp_path):
+    store = HistoryStore(str(tmp_path / 'h.db'))
+
+    def crash(conn, items):
+        raise RuntimeError('disk on fire')
+
+    store._write = crash
+    store.record(analyze_scores_rule_based(SCORES, 'An'))
+    store._writer.join(5)
+    assert not store.flush(1)
+    assert not store.close(1)
+
+
+AI_TEXTS = [
+    ('An', {'listening': 7.0, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.0},
+     'Cần luyện viết Task 2 mỗi tuần và đọc bài mẫu band 7.'),
+    ('Bình', {'listening': 5.0, 'speaking': 5.0, 'reading': 5.5, 'writing': 4.5},
+     'Nên luyện nghe podcast; phần viết cần thêm từ nối.'),
+    ('Chi', SCORES, '⚠️ Lỗi kết nối: timeout'),
+]
+
+
+def record_ai_analyses(store):
+    for name, scores, text in AI_TEXTS:
+        store.record(dict(analyze_scores_rule_based(scores, name), llm_analysis=text, llm_provider='openai'))
+    # Rule-based rows have no AI text to index
+    store.record(analyze_scores_rule_based(SCORES, 'Dũng'))
+    assert store.flush(5)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('luyen viet', '"luyen" "viet"'),
+    ('"bài mẫu" pod*', '"bài mẫu" "pod"*'),
+    ('say "hi', '"say" """hi"'),
+])
+def test_match_query_quotes_every_term(text, expected):
+    assert match_query(text) == expected
+
+
+def test_empty_match_query_is_rejected():
+    with pytest.raises(ValueError):
+        match_query(' "" * ')
+
+
+def test_ai_text_search_ignores_diacritics_and_filters_by_band(tmp_path):
+    store = HistoryStore(str(tmp_path / 'h.db'))
+    try:
+        record_ai_analyses(store)
+        assert [e['student_name'] for e in store.search_text('luyen viet')] in (['An', 'Bình'], ['Bình', 'An'])
+        assert [e['student_name'] for e in store.search_text('"bai mau"')] == ['An']
+        assert [e['student_name'] for e in store.search_text('pod*')] == ['Bình']
+        assert store.search_text('timeout') == []
+        assert [e['student_name'] for e in store.search_text('viet', skill='writing', min_band=5)] == ['An']
+        assert [e['student_name'] for e in store.search_text('viet', max_band=5.0)] == ['Bình']
+        entry = store.search_text('podcast')[0]
+        assert '[podcast]' in entry['snippet'] and entry['provider'] == 'openai' and entry['rank'] > 0
+        with pytest.raises(ValueError):
+            store.search_text('viet', skill='grammar')
+    finally:
+        store.close(5)
+
+
+def test_text_stored_before_the_index_existed_is_indexed_on_open(tmp_path):
+    path = str(tmp_path / 'h.db')
+    store = HistoryStore(path)
+    record_ai_analyses(store)
+    store.close(5)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE analysis_text")
+    conn.commit()
+    conn.close()
+
+    store = HistoryStore(path)
+    try:
+        # The writer thread indexes the old rows before anything queued after it
+        assert store.flush(5)
+        assert len(store.search_text('luyen')) == 2
+    finally:
+        store.close(5)
+
+
+def test_history_search_endpoint(client, app_module):
+    record_ai_analyses(app_module.history_store())
+    body = client.get('/api/history/search?q=luyen+nghe').get_json()
+    assert body['count'] == 1 and body['results'][0]['student_name'] == 'Bình'
+    assert client.get('/api/history/search?q=').status_code == 400
+    assert client.get('/api/history/search?q=viet&min_band=abc').status_code == 400
+
+
+def test_full_queue_waits_briefly_then_drops_and_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr('history_store.QUEUE_WAIT', 0.05)
+    store = HistoryStore(str(tmp_path / 'h.db'), queue_rows=4)
+    release = threading.Event()
+    store.subscribe(lambda rows: release.wait(5))
+    try:
+        analysis = analyze_scores_rule_based(SCORES, 'An')
+        # The writer takes the first analysis and is held in the listener
+        store.record(analysis)
+        for _ in range(50):
+            if store.status()['queued'] == 0:
+                break
+            time.sleep(0.02)
+        results = ResultBatch()
+        for name in ('B', 'C'):
+            results.append(SCORES, name)
+        # A batch weighs its rows plus its shared profile analyses
+        store.record_batch(results)
+        store.record(analysis)
+        assert store.status()['queued'] == 4
+
+        # No room: the analysis is dropped after QUEUE_WAIT, not queued
+        store.record(analysis)
+        store.record_batch(results)
+        status = store.status()
+        assert status['queued'] == 4
+        assert status['dropped'] == 3
+        assert status['capacity'] == 4
+
+        release.set()
+        assert store.flush(5)
+        status = store.status()
+        assert (status['queued'], status['written'], status['dropped']) == (0, 4, 3)
+        assert store.count() == 4
+    finally:
+        release.set()
+        assert store.close(5)
+
+
+def test_history_status_endpoint(client, app_module):
+    client.post('/api/analyze', json={'student_name': 'An', **SCORES})
+    assert app_module.history_store().flush(5)
+    status = client.get('/api/history/status').get_json()
+    assert status['running']
+    assert status['queued'] == 0
+    assert status['written'] == 1
+    assert status['dropped'] == 0
@@ -0,0 +1,55 @@
+"""Negotiated compression of streamed responses (http_compression.py)"""
+
+import gzip
+import io
+import json
+
+import pytest
+
+import http_compression
+from http_compression import available_encodings, compress_stream
+
+ROSTER = "student_name,listening,speaking,reading,writing\n" + "".join(
+    f"Học viên {i},6.5,6.0,7.0,5.5\n" for i in range(200)
+)
+
+
+def test_gzip_stream_round_trips_and_flushes_as_it_goes(monkeypatch):
+    monkeypatch.setattr(http_compression, 'FLUSH_THRESHOLD', 1024)
+    chunks = [f'{{"row": {i}, "name": "Học viên {i}"}},'.encode() for i in range(500)] + ['', 'đ']
+    out = list(compress_stream(iter(chunks), 'gzip'))
+    assert len(out) > 5
+    assert gzip.decompress(b''.join(out)) == b''.join(chunks[:-2]) + 'đ'.encode()
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        return http_compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding == 'br':
+        return http_compression.brotli.decompress(data)
+    return gzip.decompress(data)
+
+
+@pytest.mark.parametrize('encoding', available_encodings())
+def test_every_available_encoding_round_trips(encoding):
+    data = [b'x' * 100_000, b'y' * 10]
+    compressed = b''.join(compress_stream(data, encoding))
+    assert len(compressed) < 2000
+    assert decompress(compressed, encoding) == b''.join(data)
+
+
+def upload(client, headers):
+    return client.post('/api/batch-analyze', data={'file': (io.BytesIO(ROSTER.encode()), 'r.csv')},
+                       content_type='multipart/form-data', headers=headers)
+
+
+def test_batch_response_is_compressed_when_accepted(client):
+    plain = upload(client, {})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    compressed = upload(client, {'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    body = json.loads(gzip.decompress(compressed.data))
+    assert body['count'] == 200
+    assert len(compressed.data) < len(plain.data) // 4
@@ -0,0 +1,72 @@
+"""Command-line batch runner (ielts_batch.py)"""
+
+import csv
+import io
+import json
+
+import pytest
+
+import ielts_batch
+from cohort_format import write_cohort
+from ielts_engine import analyze_scores_rule_based
+
+ROSTER = (
+    'student_id,student_name,listening,speaking,reading,writing\n'
+    + ''.join(f'HV-{i:02},Học viên {i},{5 + i % 4}.5,6,7,5.5\n' for i in range(7))
+    + ',Trần Bình,6.5,abc,7,5.5\n'
+).encode('utf-8')
+
+
+def run(tmp_path, *args, roster=ROSTER, name='roster.csv'):
+    source = tmp_path / name
+    if not source.exists():
+        source.write_bytes(roster)
+    output = tmp_path / 'out'
+    assert ielts_batch.main([str(source), '-o', str(output), '-q', *args]) == 0
+    return output.read_bytes()
+
+
+def jsonl_rows(data: bytes) -> list:
+    return [dict(json.loads(line), analyzed_at=None) for line in data.splitlines()]
+
+
+@pytest.mark.parametrize('chunk_size', ['1', '3', '1000'])
+def test_jsonl_output_matches_the_engine_in_input_order(tmp_path, chunk_size):
+    rows = jsonl_rows(run(tmp_path, '--format', 'jsonl', '--chunk-size', chunk_size))
+    assert len(rows) == 8
+    for i, row in enumerate(rows[:7]):
+        scores = {'listening': 5.5 + i % 4, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+        expected = analyze_scores_rule_based(scores, f'Học viên {i}')
+        assert row == dict(expected, analyzed_at=None, student_id=f'HV-{i:02}')
+    assert rows[7]['student_name'] == 'Trần Bình' and rows[7]['reasons'] == {'speaking': 'not_a_number'}
+    assert 'student_id' not in rows[7]
+
+
+def test_csv_output_has_bom_header_and_error_rows(tmp_path):
+    data = run(tmp_path, '--format', 'csv')
+    assert data.startswith(b'\xef\xbb\xbf')
+    records = list(csv.DictReader(io.StringIO(data.decode('utf-8-sig'))))
+    assert list(records[0]) == list(ielts_batch.CSV_COLUMNS)
+    assert records[0]['student_id'] == 'HV-00' and records[0]['overall'] == '6.0'
+    assert records[7]['error'] and records[7]['overall'] == ''
+
+
+def test_every_input_kind_gives_the_same_rows(tmp_path):
+    expected = jsonl_rows(run(tmp_path, '--chunk-size', '3'))
+    rows = list(csv.DictReader(io.StringIO(ROSTER.decode('utf-8'))))
+    write_cohort(rows, tmp_path / 'roster.ielts')
+    assert jsonl_rows(run(tmp_path, '--chunk-size', '3', name='roster.ielts'))[:7] == expected[:7]
+    quoted = ROSTER.decode('utf-8').replace('Trần Bình', '"Trần\nBình"').encode('utf-8')
+    quoted_rows = jsonl_rows(run(tmp_path, '--chunk-size', '3', roster=quoted, name='quoted.csv'))
+    assert quoted_rows[:7] == expected[:7] and quoted_rows[7]['student_name'] == 'Trần\nBình'
+    (tmp_path / 'roster.jsonl').write_text('\n'.join(json.dumps(row) for row in rows))
+    assert jsonl_rows(run(tmp_path, name='roster.jsonl'))[:7] == expected[:7]
+
+
+def test_worker_processes_keep_input_order(tmp_path):
+    assert jsonl_rows(run(tmp_path, '--workers', '2', '--chunk-size', '2')) == jsonl_rows(run(tmp_path))
+
+
+def test_missing_input_exits_with_2(tmp_path, capsys):
+    assert ielts_batch.main([str(tmp_path / 'nope.csv'), '-q']) == 2
+    assert 'Error' in capsys.readouterr().err
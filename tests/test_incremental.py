@@ -0,0 +1,116 @@
+"""Incremental re-analysis of re-uploaded rosters (incremental_store.py)"""
+
+import io
+import json
+
+from analysis_results import ResultBatch
+from catalog import Catalog, get_catalog, set_catalog
+from incremental_store import IncrementalRun, recompute, stored_timestamp
+
+ROSTER = (
+    "student_id,student_name,listening,speaking,reading,writing\n"
+    "HV1,Nguyễn Văn An,6.5,6.0,7.0,5.5\n"
+    "HV2,Trần Thị Bình,5.0,5.5,5.0,4.5\n"
+    "HV3,Lê Hoàng Cường,8.0,7.5,8.5,7.0\n"
+)
+
+
+def upload(client, text, **values):
+    data = {'file': (io.BytesIO(text.encode('utf-8')), 'roster.csv'), 'incremental': '1', 'roster': 'lop-12a'}
+    data.update(values)
+    response = client.post('/api/batch-analyze', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    return json.loads(response.data)
+
+
+def test_unchanged_rows_are_reused_byte_for_byte(client):
+    first = upload(client, ROSTER)
+    assert first['incremental']['recomputed'] == 3
+
+    changed = ROSTER.replace('HV2,Trần Thị Bình,5.0', 'HV2,Trần Thị Bình,6.0')
+    second = upload(client, changed)
+    assert second['incremental'] == {'reused': 2, 'recomputed': 1, 'stale': 0, 'without_id': 0}
+    assert second['results'][0] == first['results'][0]
+    assert second['results'][2] == first['results'][2]
+    assert second['results'][1]['skills'][0]['score'] == 6.0
+    assert second['profiles']['analyzed_rows'] == 1
+
+
+def test_reused_rows_keep_scores_not_serialized_bytes(app_module):
+    results = ResultBatch()
+    scores = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+    results.append(scores, 'An', 1_700_000_000.0)
+    results.append_reused(scores, 'Bình', 1_600_000_000.0)
+    assert results.reused_rows == {1}
+    assert results[1]['student_name'] == 'Bình'
+    assert stored_timestamp(results.encoded(1)) == 1_600_000_000.0
+    assert results.profile_stats()['analyzed_rows'] == 1
+
+
+def test_rule_change_recomputes_only_affected_rows(app_module):
+    store = app_module.incremental_store()
+    run = IncrementalRun(store, 'k')
+    results = ResultBatch()
+
+    class Valid:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def is_valid(self, index):
+            return True
+
+        def row_scores(self, index):
+            return {k: self.rows[index][k] for k in ('listening', 'speaking', 'reading', 'writing')}
+
+    rows = [
+        {'student_id': 'A', 'student_name': 'A', 'listening': 4.0, 'speaking': 8.0, 'reading': 8.0, 'writing': 8.0},
+        {'student_id': 'B', 'student_name': 'B', 'listening': 8.0, 'speaking': 8.0, 'reading': 8.0, 'writing': 8.0},
+    ]
+    validation = Valid(rows)
+    assert run.lookup(rows, validation) == {}
+    for index, row in enumerate(rows):
+        results.append(validation.row_scores(index), row['student_name'])
+        run.remember(index, index)
+    run.save(results)
+
+    original = get_catalog()
+    data = original.to_json()
+    data['recommendations']['listening']['low'] = ['Nghe podcast mỗi ngày']
+    try:
+        set_catalog(Catalog(data))
+        report = recompute(store)
+        assert report['stale'] == 1
+        assert list(report['changed_entries']) == ['recommendations/listening/low']
+    finally:
+        set_catalog(original)
+
+
+def test_rows_without_id_renamed_or_in_another_roster_are_recomputed(client):
+    upload(client, ROSTER)
+    renamed = ROSTER.replace('HV3,Lê Hoàng Cường,8.0', 'HV3,Lê Hoàng Cương,8.0').replace('HV1,', ',')
+    # Same scores written differently still hash the same
+    reformatted = renamed.replace('6.0,7.0,5.5', '6,7,5.5').replace('5.0,5.5,5.0,4.5', '5,5.5,5,4.5')
+    assert upload(client, reformatted)['incremental'] == {'reused': 1, 'recomputed': 2, 'stale': 0, 'without_id': 1}
+    assert upload(client, ROSTER, roster='lop-12b')['incremental']['reused'] == 0
+
+
+def test_uploads_after_a_rule_change_refresh_only_stale_rows(client, app_module):
+    first = upload(client, ROSTER)
+    original = get_catalog()
+    data = original.to_json()
+    # Only Bình's writing (4.5) uses this entry
+    data['recommendations']['writing']['low'] = ['Viết một bài Task 2 mỗi ngày']
+    try:
+        set_catalog(Catalog(data))
+        store = app_module.incremental_store()
+        assert recompute(store, dry_run=True)['refreshed'] == 0
+        second = upload(client, ROSTER)
+        assert second['incremental'] == {'reused': 2, 'recomputed': 1, 'stale': 1, 'without_id': 0}
+        assert 'Viết một bài Task 2 mỗi ngày' in json.dumps(second['results'][1], ensure_ascii=False)
+        assert second['results'][0] == first['results'][0]
+
+        # The upload stored the fresh result, so nothing is left to recompute
+        assert recompute(store) == {'checked': 3, 'stale': 0, 'refreshed': 0, 'changed_entries': {}}
+        assert upload(client, ROSTER)['incremental']['reused'] == 3
+    finally:
+        set_catalog(original)
@@ -0,0 +1,54 @@
+"""Deterministic JSON serialization (json_serializer.py)"""
+
+import json
+
+from analysis_results import ResultBatch
+from ielts_engine import analyze_scores_rule_based
+from json_serializer import dumps, encode_analysis
+
+SCORES = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+# Non-BMP (𝓐, emoji) and a lone surrogate, as json.loads('"\\ud800"') gives
+NAMES = ['Nguyễn Văn An', 'Lê 𝓐n 😀', 'Trần \ud800 Bình', '"quoted"\n\\']
+
+
+def reference(obj) -> bytes:
+    """json.dumps without ASCII escaping; only lone surrogates are escaped"""
+    text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return ''.join(
+        '\\u{0:04x}'.format(ord(c)) if '\ud800' <= c <= '\udfff' else c for c in text
+    ).encode('utf-8')
+
+
+def test_generic_values_match_json_dumps():
+    for value in [{'a': [1, 2.5, None, True]}, 'Phạm', [NAMES], {'name': NAMES[1]}]:
+        assert dumps(value) == reference(value)
+    assert dumps({'name': NAMES[1]}) == json.dumps({'name': NAMES[1]}, ensure_ascii=False,
+                                                   separators=(',', ':')).encode('utf-8')
+
+
+def test_fast_path_matches_json_dumps_for_any_name():
+    for name in NAMES:
+        analysis = analyze_scores_rule_based(SCORES, name)
+        encoded = encode_analysis(analysis)
+        assert encoded == reference(analysis)
+        assert dumps(analysis) == encoded
+        assert json.loads(encoded.decode('utf-8')) == analysis
+
+
+def test_batch_rows_match_json_dumps():
+    results = ResultBatch()
+    for name in NAMES:
+        results.append(SCORES, name, 1_700_000_000.0)
+    results.append({'listening': 6.3, 'speaking': 6.0, 'reading': 6.0, 'writing': 6.0}, NAMES[2])
+    assert list(results.iter_encoded()) == [reference(row) for row in results]
+
+
+def test_bulk_with_lone_surrogate_name(client):
+    student = '{"student_name": "\\ud800", "listening": 6, "speaking": 6, "reading": 6, "writing": 6}'
+    bulk = client.post('/api/analyze-bulk', data=f'[{student}]', content_type='application/json')
+    assert bulk.status_code == 200
+    assert bulk.get_json()['results'][0]['student_name'] == '\ud800'
+    single = client.post('/api/analyze', data=student, content_type='application/json')
+    assert single.status_code == 200
+    assert single.get_json()['student_name'] == '\ud800'
@@ -0,0 +1,54 @@
+"""Diacritics-insensitive student name search (name_index.py)"""
+
+import random
+
+import name_index
+from name_index import NameIndex, fold
+
+FAMILY = ['Nguyễn', 'Trần', 'Lê', 'Đặng']
+MIDDLE = ['Văn', 'Thị', 'Ngọc', 'Đức']
+GIVEN = ['An', 'Ân', 'Bình', 'Nga', 'Hải', 'Hạnh']
+
+
+def scan(students, query, limit):
+    """Reference result: exact folded names first, then newest, by brute force"""
+    terms = fold(query).split()
+    matches = [s for s in students.values()
+               if all(any(token.startswith(term) for token in fold(s[1]).split()) for term in terms)]
+    matches.sort(key=lambda s: (fold(s[1]) != fold(query), -s[2]))
+    return [(s[0], s[2]) for s in matches[:limit]]
+
+
+def test_fold_strips_diacritics_and_d_stroke():
+    assert fold('  Đặng   Thị NGỌC-Ánh ') == 'dang thi ngoc anh'
+
+
+def test_search_matches_a_linear_scan(monkeypatch):
+    # A small budget makes both the recency walk and the set path run
+    monkeypatch.setattr(name_index, 'WALK_BUDGET', 20)
+    rng = random.Random(7)
+    index, students = NameIndex(), {}
+    for step in range(3000):
+        number = rng.randrange(800)
+        name = f'{FAMILY[number % 4]} {MIDDLE[number // 4 % 4]} {GIVEN[number // 16 % 6]}'
+        analyzed_at = rng.random() * 1e6
+        index.add(f'HV{number}', name, name.casefold(), analyzed_at)
+        previous = students.get(number)
+        if previous is None or analyzed_at >= previous[2]:
+            students[number] = (f'HV{number}', name, analyzed_at)
+
+    for query in ['nguyen', 'ng', 'n', 'dang thi nga', 'tran duc', 'le ngoc an', 'an', 'h h', 'thi ng', 'xuan']:
+        for limit in (1, 5, 50):
+            got = [(row['student_id'], row['last_analyzed_at']) for row in index.search(query, limit)]
+            assert got == scan(students, query, limit), (query, limit)
+
+
+def test_refresh_moves_a_student_to_the_front():
+    index = NameIndex()
+    index.add('HV1', 'Nguyễn Văn An', 'nguyễn văn an', 1.0)
+    index.add('HV2', 'Nguyễn Thị Bình', 'nguyễn thị bình', 2.0)
+    assert [row['student_id'] for row in index.search('nguyen')] == ['HV2', 'HV1']
+    index.add('HV1', 'Nguyễn Văn An', 'nguyễn văn an', 3.0)
+    assert [row['student_id'] for row in index.search('nguyen')] == ['HV1', 'HV2']
+    assert index.search('binh nguyen')[0]['student_name'] == 'Nguyễn Thị Bình'
+    assert index.search('tran') == []
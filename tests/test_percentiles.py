@@ -0,0 +1,71 @@
+"""Cohort percentile ranks (percentiles.py)"""
+
+from percentiles import CohortRanks, student_key
+
+AN = student_key('HV1', 'an')
+BINH = student_key(None, 'bình')
+
+
+def scores(band: float, writing: float = None) -> dict:
+    row = {'listening': band, 'speaking': band, 'reading': band, 'writing': band, 'overall': band}
+    if writing is not None:
+        row['writing'] = writing
+    return row
+
+
+def row(student_id, key, analyzed_at, band, writing=None, cohort=None):
+    values = scores(band, writing)
+    return (student_id, key.title(), key, analyzed_at, *values.values(), 'web', 1, b'', cohort)
+
+
+def test_ranks_count_below_plus_half_of_same_band():
+    ranks = CohortRanks()
+    ranks.add_rows([row('HV1', 'an', 1, 5.0), row(None, 'bình', 1, 6.0), row('HV3', 'cường', 1, 7.0, cohort='12a')])
+    result = ranks.percentiles(scores(6.0))
+    assert result['listening'] == 50.0 and result['students'] == 3
+    assert ranks.percentiles(scores(6.0), '12a')['listening'] == 0.0
+    assert ranks.cohorts() == ['12a']
+
+
+def test_single_student_is_not_ranked_against_their_own_attempt():
+    ranks = CohortRanks()
+    ranks.add_rows([row('HV1', 'an', 1, 6.0, writing=5.0)])
+    assert ranks.percentiles(scores(6.0, writing=6.5), student=AN) is None
+    # Someone else is still ranked against that attempt
+    assert ranks.percentiles(scores(6.0, writing=6.5), student=BINH)['writing'] == 100.0
+
+
+def test_repeat_attempt_ranks_against_the_other_students():
+    ranks = CohortRanks()
+    ranks.add_rows([row('HV1', 'an', 1, 5.0, writing=4.0), row(None, 'bình', 1, 6.0)])
+    result = ranks.percentiles(scores(6.0, writing=6.0), student=AN)
+    assert result['students'] == 1
+    assert result['writing'] == 50.0 and result['listening'] == 50.0
+
+    # A newer attempt replaces the older one instead of adding a student
+    ranks.add_rows([row('HV1', 'an', 2, 7.0)])
+    assert ranks.percentiles(scores(6.5))['students'] == 2
+    assert ranks.percentiles(scores(6.5))['listening'] == 50.0
+
+
+def test_repeat_analyze_excludes_earlier_attempt(app_module, client):
+    student = {'student_id': 'HV1', 'student_name': 'An', 'listening': 6, 'speaking': 6, 'reading': 6, 'writing': 5}
+    client.post('/api/analyze', json=student)
+    assert app_module.history_store().flush(5)
+    again = client.post('/api/analyze', json=dict(student, writing=6.5)).get_json()
+    assert again['percentile'] is None
+
+
+def test_etag_changes_once_the_cohort_grows(app_module, client):
+    student = {'student_name': 'An', 'listening': 6, 'speaking': 6, 'reading': 6, 'writing': 5, 'cohort': 'x'}
+    first = client.post('/api/analyze', json=student)
+    assert first.get_json()['percentile'] is None
+    for index in range(5):
+        client.post('/api/analyze', json=dict(student, student_name=f'Học viên {index}', writing=index + 3))
+    assert app_module.history_store().flush(5)
+
+    again = client.post('/api/analyze', json=student, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 200
+    # An is ranked against the five others, not their own first attempt
+    assert again.get_json()['percentile']['students'] == 5
+    assert again.headers['ETag'] != first.headers['ETag']
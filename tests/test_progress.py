@@ -0,0 +1,110 @@
+"""Per-student progress series and class trends (progress.py)"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import progress
+from ielts_engine import analyze_scores_rule_based, calculate_overall
+from progress import class_progress, student_progress
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+START = datetime(2026, 1, 1, 9, 0)
+
+
+def row(student_id, days: float, scores: dict, name='An'):
+    analyzed_at = (START + timedelta(days=days)).timestamp()
+    return (student_id, name, analyzed_at, *(scores[skill] for skill in SKILLS), calculate_overall(scores))
+
+
+def steady(student_id, attempts: int, step: float = 0.5, every: int = 30):
+    """Each skill up by step every `every` days, from 5.0"""
+    return [row(student_id, i * every, dict.fromkeys(SKILLS, 5.0 + i * step)) for i in range(attempts)]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if request.param == 'python':
+        monkeypatch.setattr(progress, 'np', None)
+    elif progress.np is None:
+        pytest.skip('numpy is not installed')
+
+
+def test_linear_progress_projects_the_target_date(backend):
+    result = student_progress(steady('HV1', 3), target=7.0)
+    assert result['attempts'] == 3
+    assert result['series']['overall'] == [5.0, 5.5, 6.0]
+    assert result['deltas']['writing'] == [0.5, 0.5]
+    assert result['change']['overall'] == 1.0
+    assert result['slope_per_30_days']['overall'] == pytest.approx(0.5)
+    # Two more 30-day steps from the last attempt
+    assert result['projection'] == {
+        'target': 7.0, 'reached': False,
+        'projected_date': (START + timedelta(days=120)).isoformat(), 'days_from_last_attempt': 60.0,
+    }
+    assert result['skill_projections']['reading']['days_from_last_attempt'] == 60.0
+
+
+def test_single_flat_and_finished_students(backend):
+    single = student_progress(steady('HV1', 1))
+    assert single['slope_per_30_days']['overall'] is None
+    # Without a target, the next step of the rules is the goal
+    assert single['projection'] == {'target': 5.5, 'reached': False, 'projected_date': None}
+
+    falling = student_progress(steady('HV2', 3, step=-0.5), target=7.0)
+    assert falling['slope_per_30_days']['overall'] == pytest.approx(-0.5)
+    assert falling['projection']['projected_date'] is None
+
+    done = student_progress(steady('HV3', 3), target=6.0)
+    assert done['projection']['reached'] is True
+
+    # A trend this slow would take longer than MAX_PROJECTION_DAYS
+    slow = student_progress(steady('HV4', 2, step=0.5, every=3000), target=9.0)
+    assert slow['projection']['projected_date'] is None
+    assert student_progress([]) is None
+
+
+def same_fit(a: dict, b: dict):
+    for key in ('student_id', 'attempts', 'first_attempt', 'last_attempt', 'latest', 'change'):
+        assert a[key] == b[key]
+    for name, slope in a['slope_per_30_days'].items():
+        assert slope == pytest.approx(b['slope_per_30_days'][name], abs=1e-3)
+    assert a['projection'].get('days_from_last_attempt') == pytest.approx(
+        b['projection'].get('days_from_last_attempt'), abs=0.1)
+
+
+def test_class_fit_matches_per_student_fits(monkeypatch):
+    pytest.importorskip('numpy')
+    rng = random.Random(8)
+    rows = []
+    for student in range(30):
+        days = sorted(rng.uniform(0, 400) for _ in range(rng.randint(1, 6)))
+        rows.extend(row(f'HV{student:02}', day, {skill: rng.randrange(6, 19) / 2 for skill in SKILLS}) for day in days)
+
+    vectorized = class_progress(rows, target=7.5)
+    assert [student['student_id'] for student in vectorized] == sorted({r[0] for r in rows})
+    for student in vectorized:
+        alone = student_progress([r for r in rows if r[0] == student['student_id']], target=7.5)
+        same_fit(student, alone)
+    monkeypatch.setattr(progress, 'np', None)
+    for python_fit, numpy_fit in zip(class_progress(rows, target=7.5), vectorized):
+        same_fit(python_fit, numpy_fit)
+
+
+def test_progress_endpoints_read_the_history(client, app_module):
+    history = app_module.history_store()
+    for i, analyzed_at in enumerate((START, START + timedelta(days=30))):
+        scores = dict.fromkeys(SKILLS, 5.0 + i)
+        history.record(analyze_scores_rule_based(scores, 'Nguyễn Văn An', analyzed_at), student_id='HV1')
+    assert history.flush(5)
+
+    response = client.get('/api/progress/HV1?target=7')
+    assert response.status_code == 200
+    assert response.get_json()['slope_per_30_days']['overall'] == pytest.approx(1.0)
+    assert client.get('/api/progress/HV9').status_code == 404
+    assert client.get('/api/progress/HV1?target=10').status_code == 400
+
+    body = client.post('/api/progress/class', json={'student_ids': ['HV1', 'HV9']}).get_json()
+    assert body['count'] == 1 and body['missing'] == ['HV9']
+    assert client.post('/api/progress/class', json={'student_ids': []}).status_code == 400
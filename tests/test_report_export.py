@@ -0,0 +1,219 @@
+"""Report rendering and the streamed zip export (/api/export, /api/export-batch)"""
+
+import io
+import os
+import zipfile
+from datetime import datetime
+
+import pytest
+
+from ielts_engine import analyze_scores_rule_based
+from report_writer import (
+    Each, ReportDataError, ReportTemplate, Slot, When,
+    check_analysis, render_report, render_report_bytes, render_report_parts, stamp_report,
+)
+
+SCORES = {'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+def test_report_contains_scores_and_name():
+    report = render_report(analyze_scores_rule_based(SCORES, 'Nguyễn Văn An'))
+    assert 'Nguyễn Văn An' in report
+    assert 'ĐIỂM TỔNG THỂ: 6.0' in report
+    assert 'Nghe (Listening): 6.5' in report
+
+
+@pytest.mark.parametrize('analysis', [
+    'not an object',
+    {'skills': 'listening'},
+    {'skills': [{'name': 'listening'}]},
+    {'skills': [{'name': 'listening', 'score': '6.5'}]},
+    {'strengths': [3]},
+    {'overall': [6.5]},
+])
+def test_check_analysis_rejects_unrenderable(analysis):
+    with pytest.raises(ReportDataError):
+        check_analysis(analysis)
+
+
+def test_export_batch_zip_has_one_report_per_student(client):
+    results = [analyze_scores_rule_based(SCORES, name) for name in ('An', 'Bình')]
+    results.append({'error': 'invalid row', 'row': 3})
+    response = client.post('/api/export-batch', json={'results': results})
+    assert response.status_code == 200
+    names = zipfile.ZipFile(io.BytesIO(response.data)).namelist()
+    assert len(names) == 2
+
+
+def test_export_batch_rejects_bad_rows_before_streaming(client):
+    good = analyze_scores_rule_based(SCORES, 'An')
+    no_score = dict(good, skills=[{'name': 'listening', 'label': 'Listening'}])
+    response = client.post('/api/export-batch', json={'results': [good, 'oops', no_score]})
+    assert response.status_code == 400
+    assert [row['index'] for row in response.get_json()['invalid']] == [1, 2]
+
+
+def test_export_rejects_bad_analysis(client):
+    response = client.post('/api/export', json={'analysis': {'skills': [1]}})
+    assert response.status_code == 400
+
+
+def test_report_parts_stamp_to_the_same_bytes():
+    generated_at = datetime(2026, 3, 14, 9, 26)
+    for analysis in (analyze_scores_rule_based(SCORES, 'An'),
+                     dict(analyze_scores_rule_based(SCORES, 'Bình'), llm_analysis='Tốt', llm_provider='openai')):
+        parts = render_report_parts(analysis)
+        assert stamp_report(parts, generated_at) == render_report_bytes(analysis, generated_at)
+
+
+def test_cached_export_carries_the_current_date(client, monkeypatch):
+    import app
+
+    class Clock(datetime):
+        current = datetime(2026, 3, 14, 9, 26)
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(app, 'datetime', Clock)
+    analysis = analyze_scores_rule_based(SCORES, 'An')
+    first = client.post('/api/export', json={'analysis': analysis})
+    Clock.current = datetime(2026, 3, 15, 8, 0)
+    again = client.post('/api/export', json={'analysis': analysis}, headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 200
+    assert '15/03/2026 08:00' in again.data.decode('utf-8')
+    assert '20260315' in again.headers['Content-Disposition']
+
+
+def test_batch_jobs_are_bounded_by_rows_and_age(app_module, monkeypatch):
+    from analysis_results import ResultBatch
+    from upload_spool import ResultSpool
+
+    def batch(rows):
+        results = ResultBatch()
+        for _ in range(rows):
+            results.append(SCORES, 'An')
+        spool = ResultSpool()
+        spool.write(results.iter_encoded())
+        return spool
+
+    monkeypatch.setattr(app_module, 'MAX_BATCH_JOB_ROWS', 5)
+    first_spool = batch(3)
+    first = app_module.store_batch_job(first_spool)
+    second = app_module.store_batch_job(batch(2))
+    assert [row['student_name'] for row in app_module.batch_job(first)] == ['An'] * 3
+    third = app_module.store_batch_job(batch(1))
+    assert app_module.batch_job(first) is None
+    # Evicted results are deleted from disk
+    assert not os.path.exists(first_spool.path)
+    assert app_module.batch_job(second) is not None and app_module.batch_job(third) is not None
+    too_large = batch(6)
+    assert app_module.store_batch_job(too_large) is None
+    too_large.close()
+
+    kept = batch(1)
+    app_module.store_batch_job(kept)
+    app_module.close_batch_jobs()
+    assert not os.path.exists(kept.path)
+
+    monkeypatch.setattr(app_module, 'BATCH_JOB_TTL', -1)
+    assert app_module.batch_job(third) is None
+
+
+def test_export_batch_by_job_id(client):
+    roster = b"student_name,listening,speaking,reading,writing\nAn,6.5,6.0,7.0,5.5\n"
+    job_id = client.post('/api/batch-analyze', data={'file': (io.BytesIO(roster), 'r.csv')},
+                         content_type='multipart/form-data').get_json()['job_id']
+    response = client.post('/api/export-batch', json={'job_id': job_id})
+    assert len(zipfile.ZipFile(io.BytesIO(response.data)).namelist()) == 1
+    assert client.post('/api/export-batch', json={'job_id': 'nope'}).status_code == 404
+
+
+def test_chunked_batch_is_spooled_and_exported_in_either_format(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'BATCH_CHUNK_ROWS', 2)
+    roster = (b"student_name,listening,speaking,reading,writing\n"
+              b"An,6.5,6.0,7.0,5.5\nBinh,6.5,6.0,7.0,5.5\nChi,x,6.0,7.0,5.5\n"
+              b"Dung,6.5,6.0,7.0,5.5\nEm,8.0,8.0,8.0,8.0\n")
+
+    def analyze(output_format):
+        return client.post('/api/batch-analyze', data={'file': (io.BytesIO(roster), 'r.csv'), 'format': output_format},
+                           content_type='multipart/form-data').get_json()
+
+    full, compact = analyze('full'), analyze('compact')
+    assert full['count'] == compact['count'] == 5
+    assert [row.get('student_name') for row in full['results']] == ['An', 'Binh', None, 'Dung', 'Em']
+    assert full['results'][2]['row'] == 2
+    # Profiles are shared between chunks
+    assert full['profiles'] == {'analyzed_rows': 4, 'unique_profiles': 2, 'dedup_ratio': 2.0}
+
+    def without_time(rows):
+        return [{key: value for key, value in row.items() if key != 'analyzed_at'} for row in rows]
+
+    expected = without_time(full['results'])
+    assert without_time(app_module.batch_job(full['job_id'])) == expected
+    assert without_time(app_module.batch_job(compact['job_id'])) == expected
+    response = client.post('/api/export-batch', json={'job_id': compact['job_id']})
+    assert len(zipfile.ZipFile(io.BytesIO(response.data)).namelist()) == 4
+
+
+SEPARATOR_LINE = '━' * 63
+
+
+def baseline_report(analysis: dict, generated_at: datetime) -> str:
+    """The report as the original string-building export wrote it"""
+    def section(title):
+        return f"\n{SEPARATOR_LINE}\n\n{title}\n"
+
+    report = (
+        "\n╔══════════════════════════════════════════════════════════════╗\n"
+        "║           IELTS SCORE ANALYSIS REPORT                        ║\n"
+        "║           BÁO CÁO PHÂN TÍCH ĐIỂM IELTS                       ║\n"
+        "╚══════════════════════════════════════════════════════════════╝\n\n"
+        f"📅 Ngày phân tích: {generated_at.strftime('%d/%m/%Y %H:%M')}\n"
+        f"👤 Học viên: {analysis.get('student_name', 'N/A')}\n"
+        f"\n{SEPARATOR_LINE}\n\n"
+        f"📊 ĐIỂM TỔNG THỂ: {analysis.get('overall', 0)}\n   {analysis.get('band_description', '')}\n"
+        + section("📈 CHI TIẾT ĐIỂM:")
+    )
+    for skill in analysis['skills']:
+        bar_length = int(skill['score'] / 9 * 20)
+        report += f"   • {skill['label']}: {skill['score']} [{'█' * bar_length + '░' * (20 - bar_length)}]\n"
+    report += section("📝 TÓM TẮT ĐÁNH GIÁ:") + analysis['summary'] + "\n" + section("💪 ĐIỂM MẠNH:")
+    for s in analysis['strengths']:
+        report += f"   ✓ {s['skill']}: {s['score']} - {s['status']}\n"
+    report += section("📉 ĐIỂM CẦN CẢI THIỆN:")
+    for w in analysis['weaknesses']:
+        report += f"   ⚠ {w['skill']}: {w['score']} - {w['status']}\n"
+    report += section("🎯 ĐỀ XUẤT CẢI THIỆN:")
+    for rec in analysis['recommendations']:
+        report += f"\n   📌 {rec['skill']}:\n" + ''.join(f"      → {item}\n" for item in rec['items'])
+    report += section("📌 KẾ HOẠCH HÀNH ĐỘNG:")
+    for i, action in enumerate(analysis['action_items'], 1):
+        report += f"   {i}. {action}\n"
+    if 'llm_analysis' in analysis:
+        report += section(f"🤖 PHÂN TÍCH AI ({analysis.get('llm_provider', 'AI')}):") + analysis['llm_analysis'] + "\n"
+    return report + f"\n{SEPARATOR_LINE}\nBáo cáo được tạo bởi IELTS Score Analyzer - AI Document Summarizer\n"
+
+
+@pytest.mark.parametrize('scores', [
+    SCORES,
+    {'listening': 9.0, 'speaking': 8.5, 'reading': 9.0, 'writing': 8.0},
+    {'listening': 3.0, 'speaking': 4.5, 'reading': 2.0, 'writing': 4.0},
+])
+def test_compiled_template_matches_the_original_layout(scores):
+    generated_at = datetime(2026, 3, 14, 9, 26)
+    analysis = analyze_scores_rule_based(scores, 'Nguyễn Văn An')
+    assert render_report(analysis, generated_at) == baseline_report(analysis, generated_at)
+    with_ai = dict(analysis, llm_analysis='Cần luyện Writing Task 2.', llm_provider='anthropic')
+    assert render_report(with_ai, generated_at) == baseline_report(with_ai, generated_at)
+
+
+def test_template_merges_static_text_and_keeps_int_and_float_scores_apart():
+    template = ReportTemplate(['a', 'b', Slot('x', 'score'), Each('items', ['-', Slot('value'), ';']),
+                               When('flag', ['!'])])
+    assert [op[0] for op in template.ops] == ['static', 'slot', 'each', 'when']
+    assert template.render({'x': 5, 'items': ['p', 'q']}) == b'ab5-p;-q;'
+    assert template.render({'x': 5.0, 'items': [], 'flag': True}) == b'ab5.0!'
+    with pytest.raises(ValueError):
+        ReportTemplate([Slot('x', 'nope')])
@@ -0,0 +1,74 @@
+"""ETags, conditional requests and the LRU response cache"""
+
+import json
+from datetime import datetime
+
+from response_cache import ResponseCache, content_hash
+
+STUDENT = {'student_name': 'Trần Thị Bình', 'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+def test_content_hash_ignores_key_order_and_volatile_fields():
+    a = content_hash({'x': 1, 'y': 2, 'analyzed_at': 'now'})
+    b = content_hash({'y': 2, 'x': 1, 'analyzed_at': 'later'})
+    assert a == b
+    assert content_hash({'x': 1}, namespace='report') != content_hash({'x': 1}, namespace='analysis')
+
+
+def test_lru_evicts_oldest():
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_repeat_analyze_returns_304(client):
+    first = client.post('/api/analyze', json=STUDENT)
+    etag = first.headers['ETag']
+    second = client.post('/api/analyze', json=STUDENT, headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == etag
+
+
+def test_etag_depends_on_student_id_and_cohort(client):
+    etags = {
+        client.post('/api/analyze', json=dict(STUDENT, **extra)).headers['ETag']
+        for extra in ({}, {'student_id': 'HV1'}, {'student_id': 'HV2'}, {'cohort': 'lop-12a'})
+    }
+    assert len(etags) == 4
+
+
+def test_export_etag_matches_analysis_content(client, app_module, monkeypatch):
+    # The report prints its generation time to the minute, so the ETag follows it
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2026, 3, 14, 9, 26)
+
+    monkeypatch.setattr(app_module, 'datetime', Clock)
+    analysis = client.post('/api/analyze', json=STUDENT).get_json()
+    first = client.post('/api/export', json={'analysis': analysis})
+    again = client.post('/api/export', json={'analysis': dict(analysis, analyzed_at='x')},
+                        headers={'If-None-Match': first.headers['ETag']})
+    assert first.status_code == 200 and again.status_code == 304
+
+
+def test_etag_covers_every_per_request_field(client, app_module):
+    # Requests with the same scores whose bodies differ only in per-request fields
+    variants = [{}, {'student_id': 'HV1'}, {'cohort': 'lop-12a'}, {'student_id': 'HV1', 'cohort': 'lop-12a'}, {}]
+    seen = {}
+    for round_ in range(2):
+        for extra in variants:
+            response = client.post('/api/analyze', json=dict(STUDENT, **extra))
+            body = dict(response.get_json(), analyzed_at=None)
+            key = json.dumps(body, sort_keys=True, ensure_ascii=False)
+            etag = response.headers['ETag']
+            assert seen.setdefault(etag, key) == key, f'one ETag for two bodies: {extra}'
+        if round_ == 0:
+            # Grow the cohort so the percentile in the bodies changes
+            for index in range(3):
+                client.post('/api/analyze', json=dict(STUDENT, student_name=f'Học viên {index}', cohort='lop-12a'))
+            assert app_module.history_store().flush(5)
@@ -0,0 +1,192 @@
+"""Streaming roster readers (roster_io.py)"""
+
+import io
+import json
+import unicodedata
+
+import pytest
+
+import roster_io
+from roster_io import RosterFormatError, iter_json_rows
+
+STUDENT = {'name': 'Nguyễn Văn An', 'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}
+
+
+def read(data: bytes):
+    return list(iter_json_rows(io.BytesIO(data)))
+
+
+def test_json_array_across_chunks(monkeypatch):
+    monkeypatch.setattr(roster_io, 'JSON_CHUNK_SIZE', 7)
+    rows = read(json.dumps([STUDENT, 12345678, STUDENT], ensure_ascii=False).encode())
+    assert rows[0]['student_name'] == 'Nguyễn Văn An'
+    assert rows[1] == {}
+    assert rows[2]['writing'] == 5.5
+
+
+def test_json_lines():
+    rows = read(b'\n'.join(json.dumps(STUDENT).encode() for _ in range(3)) + b'\n\n')
+    assert len(rows) == 3
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'{"name": "An"', 'Invalid JSON on line 1'),
+    (b'[{"name": "An"}, {"name": ]', 'element 2'),
+    (b'[{"name": "An"} {"name": "Binh"}]', "Expected ','"),
+    (b'[{"name": "An"},', 'Unexpected end'),
+])
+def test_malformed_json(data, message):
+    with pytest.raises(RosterFormatError, match=message):
+        read(data)
+
+
+def test_malformed_array_element_is_not_buffered_to_the_end(monkeypatch):
+    monkeypatch.setattr(roster_io, 'JSON_CHUNK_SIZE', 64)
+    monkeypatch.setattr(roster_io, 'MAX_JSON_ELEMENT_SIZE', 256)
+    reads = []
+
+    class Upload(io.BytesIO):
+        def readinto(self, buffer):
+            reads.append(len(buffer))
+            return super().readinto(buffer)
+
+    data = b'[' + json.dumps(STUDENT).encode() + b', {"name": "' + b'x' * 100_000 + b'"}]'
+    with pytest.raises(RosterFormatError, match='Roster element 2 is malformed or larger than 256'):
+        list(iter_json_rows(Upload(data)))
+    assert sum(reads) < len(data) // 10
+
+
+def test_oversized_json_line(monkeypatch):
+    monkeypatch.setattr(roster_io, 'MAX_JSON_ELEMENT_SIZE', 256)
+    data = json.dumps(STUDENT).encode() + b'\n{"name": "' + b'x' * 10_000 + b'"}\n'
+    with pytest.raises(RosterFormatError, match='Line 2'):
+        read(data)
+
+
+def test_malformed_upload_is_rejected_with_400(client):
+    response = client.post('/api/batch-analyze', data={
+        'file': (io.BytesIO(b'[{"name": "An", "listening": 6'), 'roster.json')
+    }, content_type='multipart/form-data')
+    assert response.status_code == 400
+    assert 'JSON' in response.get_json()['error']
+
+
+QUOTED_CSV = (
+    'student_name,listening,speaking,reading,writing\n'
+    '"Nguyễn Văn An\nlớp 12A",6.5,6.0,7.0,5.5\n'
+    '"Trần, Bình",5.0,5.5,5.0,4.5\n'
+).encode('utf-8')
+
+PLAIN_CSV = 'student_name;listening;speaking;reading;writing\nAn;6.5;6;7;5.5\n\nBình;5;5.5;5;4.5\n'.encode('utf-8')
+
+
+def batch(client, data: bytes):
+    response = client.post('/api/batch-analyze', data={'file': (io.BytesIO(data), 'roster.csv')},
+                           content_type='multipart/form-data')
+    body = response.get_json()
+    for row in body.get('results', []):
+        row.pop('analyzed_at', None)
+    body.pop('job_id', None)
+    return response.status_code, body
+
+
+@pytest.mark.parametrize('data', [QUOTED_CSV, PLAIN_CSV, b'', b'student_name,listening\n'])
+def test_spooled_upload_parses_like_in_memory(client, monkeypatch, data):
+    in_memory = batch(client, data)
+    monkeypatch.setattr('upload_spool.SPOOL_THRESHOLD', 0)
+    # Ranges of a few bytes, so the quoted newline falls on a cut
+    monkeypatch.setattr(roster_io.MappedRoster.ranges, '__defaults__', (16, None, None))
+    assert batch(client, data) == in_memory
+    assert in_memory[0] == 200
+
+
+def test_mapped_roster_reads_plain_csv_by_ranges(tmp_path):
+    path = tmp_path / 'r.csv'
+    path.write_bytes(PLAIN_CSV)
+    with roster_io.MappedRoster(str(path)) as roster:
+        assert roster.line_aligned
+        assert [row['student_name'] for row in roster] == ['An', 'Bình']
+    path.write_bytes(QUOTED_CSV)
+    with roster_io.MappedRoster(str(path)) as roster:
+        assert not roster.line_aligned
+    path.write_bytes(b'')
+    with roster_io.MappedRoster(str(path)) as roster:
+        assert list(roster) == []
+
+
+VIETNAMESE_ROSTER = 'Họ tên,Nghe,listening,speaking,reading,writing\nNguyễn Thị Đào,x,6.5,6,7,5.5\n'
+
+
+def encode(text: str, encoding: str) -> bytes:
+    if encoding != 'cp1258':
+        return text.encode(encoding)
+    # cp1258 has letters like ê and ơ but writes the tone as a combining mark after them
+    out = b''
+    for char in text:
+        try:
+            out += char.encode('cp1258')
+        except UnicodeEncodeError:
+            decomposed = unicodedata.normalize('NFD', char)
+            base, tone = decomposed[:-1], decomposed[-1]
+            out += unicodedata.normalize('NFC', base).encode('cp1258') + tone.encode('cp1258')
+    return out
+
+
+@pytest.mark.parametrize('encoding, detected', [
+    ('utf-8', 'utf-8'),
+    ('utf-8-sig', 'utf-8-sig'),
+    ('utf-16', 'utf-16'),
+    ('utf-16-le', 'utf-16-le'),
+    ('cp1258', 'cp1258'),
+])
+def test_csv_encodings_decode_to_the_same_rows(encoding, detected):
+    data = encode(VIETNAMESE_ROSTER, encoding)
+    assert roster_io.detect_encoding(data[:roster_io.PREFIX_SIZE]) == detected
+    rows = list(roster_io.iter_csv_rows(io.BytesIO(data)))
+    assert rows == [{'student_name': 'Nguyễn Thị Đào', 'nghe': 'x', 'listening': '6.5', 'speaking': '6',
+                     'reading': '7', 'writing': '5.5'}]
+
+
+def test_multibyte_character_cut_by_the_prefix_is_still_utf8(monkeypatch):
+    data = ('student_name,listening\n' + 'Đào,6.5\n' * 10).encode('utf-8')
+    cut = data.index('Đ'.encode('utf-8')) + 1
+    assert roster_io.detect_encoding(data[:cut]) == 'utf-8'
+    monkeypatch.setattr(roster_io, 'PREFIX_SIZE', cut)
+    assert [row['student_name'] for row in roster_io.iter_csv_rows(io.BytesIO(data))] == ['Đào'] * 10
+
+
+def test_semicolon_csv_with_blank_lines():
+    rows = list(roster_io.iter_csv_rows(io.BytesIO(PLAIN_CSV)))
+    assert [(row['student_name'], row['writing']) for row in rows] == [('An', '5.5'), ('Bình', '4.5')]
+
+
+def test_xlsx_rows_match_csv_rows():
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Họ tên', 'Listening', 'Speaking', 'Reading', 'Writing'])
+    sheet.append(['Nguyễn Văn An', 6.5, 6.0, 7.0, 5.5])
+    sheet.append([None, None, None, None, ''])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    rows = list(roster_io.iter_roster_rows(buffer, 'Roster.XLSX'))
+    assert rows == [{'student_name': 'Nguyễn Văn An', 'listening': 6.5, 'speaking': 6.0, 'reading': 7.0, 'writing': 5.5}]
+
+
+def test_xlsx_without_openpyxl_is_a_format_error(monkeypatch):
+    monkeypatch.setattr(roster_io, 'openpyxl', None)
+    with pytest.raises(RosterFormatError, match='openpyxl'):
+        list(roster_io.iter_xlsx_rows(io.BytesIO(b'PK')))
+
+
+@pytest.mark.parametrize('filename', ['roster.json', 'roster.jsonl', 'roster.ndjson'])
+def test_json_rows_use_canonical_headers(filename):
+    data = '\n'.join(json.dumps(row, ensure_ascii=False) for row in (
+        {'Họ tên': 'Nguyễn Văn An', 'Mã học viên': 'HV-01', 'Listening': 6.5},
+        {'full name': 'Bình'},
+    )).encode('utf-8')
+    assert list(roster_io.iter_roster_rows(io.BytesIO(data), filename)) == [
+        {'student_name': 'Nguyễn Văn An', 'student_id': 'HV-01', 'listening': 6.5},
+        {'student_name': 'Bình'},
+    ]
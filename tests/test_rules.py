@@ -0,0 +1,68 @@
+"""Compiled analysis rules (rules.py)"""
+
+import itertools
+
+import pytest
+
+from ielts_engine import analyze_profile
+from rules import RULE_SPEC, RULES, RuleSpecError, compile_rules
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+# Every band from 0 to 9 in quarter steps, so off-grid scores are covered too
+QUARTERS = [i / 4 for i in range(37)]
+
+
+def hand_coded(score: float, overall: float):
+    """The checks as ielts_engine wrote them inline before rules.py"""
+    level = 'high' if score >= 7 else 'medium' if score >= 5 else 'low'
+    strong = score >= overall
+    status = ('excellent' if score >= 7 else 'good') if strong else 'needs_work'
+    return level, strong, status, min(9, score + 1), score >= 7
+
+
+def compiled(score: float, overall: float):
+    strong = RULES.is_strength(score, overall)
+    return (RULES.level(score), strong, RULES.status(score) if strong else 'needs_work',
+            RULES.weakest_target(score), RULES.highlight(score))
+
+
+def test_compiled_rules_match_the_hand_coded_checks():
+    for score, overall in itertools.product(QUARTERS, QUARTERS):
+        assert compiled(score, overall) == hand_coded(score, overall)
+    for overall in QUARTERS:
+        assert RULES.overall_target(overall) == min(9, overall + 0.5)
+    assert RULES.half_band_levels == tuple(hand_coded(i / 2, 0)[0] for i in range(19))
+
+
+def test_summary_and_actions_read_as_before():
+    scores = {'listening': 8.0, 'speaking': 5.0, 'reading': 7.5, 'writing': 4.5}
+    profile = analyze_profile(scores)
+    assert profile['summary'] == (
+        "đạt điểm IELTS tổng thể 6.0. Có khả năng Nghe và Đọc tốt với điểm nổi bật ở kỹ năng Nghe (8.0). "
+        "Tuy nhiên, Nói và Viết còn hạn chế do có thể chưa thường xuyên luyện tập các kỹ năng này."
+    )
+    assert profile['action_items'][:2] == [
+        "Ưu tiên cải thiện kỹ năng Viết (hiện tại: 4.5, mục tiêu: 5.5)",
+        "Đặt mục tiêu đạt 6.5 trong 3 tháng tới",
+    ]
+    assert len(profile['recommendations'][-1]['items']) == RULES.maintain_items
+
+
+def test_edited_spec_changes_the_compiled_rules():
+    spec = dict(RULE_SPEC, levels={'thresholds': [['high', '>', 7.5], ['medium', '>=', 4]], 'default': 'low'})
+    rules = compile_rules(spec)
+    assert [rules.level(score) for score in (7.5, 8.0, 4.0, 3.5)] == ['medium', 'high', 'medium', 'low']
+
+
+@pytest.mark.parametrize('change', [
+    {'levels': {'thresholds': [['high', '=>', 7]], 'default': 'low'}},
+    {'levels': {'thresholds': [['high', '>=', '7']], 'default': 'low'}},
+    {'levels': {'thresholds': [['high', '>=', 7]]}},
+    {'strength': ['>=', 'median']},
+    {'highlight': ['>=', '__import__("os")']},
+    {'targets': {'weakest': 1, 'overall': 0.5}},
+])
+def test_invalid_specs_are_rejected(change):
+    with pytest.raises(RuleSpecError):
+        compile_rules(dict(RULE_SPEC, **change))
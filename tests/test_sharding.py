@@ -0,0 +1,132 @@
+"""Sharded map-reduce batch mode (sharding.py)"""
+
+import json
+import random
+
+import pytest
+
+import ielts_batch
+import sharding
+from sharding import ShardError, ShardState, plan_shards, reduce_shards, run_shard
+
+SKILLS = ('listening', 'speaking', 'reading', 'writing')
+
+
+def roster(count: int = 40) -> bytes:
+    rng = random.Random(11)
+    lines = ['student_id,student_name,listening,speaking,reading,writing']
+    for i in range(count):
+        scores = [str(rng.randrange(19) / 2) for _ in SKILLS]
+        if i % 13 == 5:
+            scores[2] = 'n/a'
+        lines.append(f'HV-{i},Học viên {i},' + ','.join(scores))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def strip(data: bytes) -> list:
+    return [dict(json.loads(line), analyzed_at=None) for line in data.splitlines()]
+
+
+def single_run(tmp_path, source) -> list:
+    output = tmp_path / 'single.jsonl'
+    assert ielts_batch.main([str(source), '-o', str(output), '-q']) == 0
+    return strip(output.read_bytes())
+
+
+def quoted() -> bytes:
+    return roster().replace('Học viên 3,'.encode(), '"Học, viên 3",'.encode())
+
+
+def json_lines() -> bytes:
+    lines = roster().decode('utf-8').splitlines()
+    keys = lines[0].split(',')
+    return '\n'.join(json.dumps(dict(zip(keys, line.split(','))), ensure_ascii=False) for line in lines[1:]).encode()
+
+
+# Quoted fields and JSON cannot be cut by byte offset, so their plan converts them to a cohort file
+@pytest.mark.parametrize('name, make, kind', [
+    ('roster.csv', roster, 'range'),
+    ('quoted.csv', quoted, 'cohort'),
+    ('roster.jsonl', json_lines, 'cohort'),
+])
+def test_sharded_output_matches_a_single_run(tmp_path, name, make, kind):
+    source = tmp_path / name
+    source.write_bytes(make())
+    work_dir = str(tmp_path / 'work')
+    plan = plan_shards(str(source), work_dir, shards=4, chunk_rows=3)
+    assert plan['kind'] == kind
+    assert len(plan['shards']) == 4
+    # Shards may finish in any order
+    for shard in reversed(range(len(plan['shards']))):
+        run_shard(work_dir, shard)
+    output = tmp_path / 'sharded.jsonl'
+    stats = reduce_shards(work_dir, str(output))
+
+    expected = single_run(tmp_path, source)
+    rows = strip(output.read_bytes())
+    valid = [i for i, row in enumerate(expected) if 'error' not in row]
+    assert [rows[i] for i in valid] == [expected[i] for i in valid]
+    # A cohort file keeps no reason for an invalid score, so only byte-range shards repeat the error rows exactly
+    if kind == 'range':
+        assert rows == expected
+    else:
+        assert [rows[i]['reasons'] for i in (5, 18, 31)] == [{'reading': 'missing'}] * 3
+    assert stats['rows'] == 40 and stats['invalid_rows'] == 3 and stats['shards'] == 4
+    assert stats['overall']['count'] == sum(1 for row in expected if 'error' not in row)
+    assert stats['overall']['welford']['mean'] == pytest.approx(
+        sum(row['overall'] for row in expected if 'error' not in row) / 37)
+
+
+def test_reduce_refuses_unfinished_shards(tmp_path):
+    source = tmp_path / 'roster.csv'
+    source.write_bytes(roster())
+    work_dir = str(tmp_path / 'work')
+    plan_shards(str(source), work_dir, shards=3)
+    run_shard(work_dir, 1)
+    with pytest.raises(ShardError, match='0, 2'):
+        reduce_shards(work_dir)
+    with pytest.raises(ShardError, match='not in the plan'):
+        run_shard(work_dir, 3)
+
+
+def test_replanning_drops_earlier_shard_results(tmp_path):
+    source = tmp_path / 'roster.csv'
+    source.write_bytes(roster())
+    work_dir = str(tmp_path / 'work')
+    plan_shards(str(source), work_dir, shards=2)
+    run_shard(work_dir, 0)
+    run_shard(work_dir, 1)
+    plan_shards(str(source), work_dir, shards=2)
+    with pytest.raises(ShardError):
+        reduce_shards(work_dir)
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'python'])
+def test_merged_state_equals_one_pass(monkeypatch, backend):
+    np = pytest.importorskip('numpy') if backend == 'numpy' else None
+    monkeypatch.setattr(sharding, 'np', np)
+    monkeypatch.setattr('cohort_stats.np', np)
+    rng = random.Random(2)
+    doubled = [rng.randrange(19) if rng.random() > 0.05 else 255 for _ in range(4 * 300)]
+
+    def block(values):
+        return np.array(values, dtype=np.uint8).reshape(-1, 4) if np is not None else values
+
+    whole, first, second = ShardState(), ShardState(), ShardState()
+    whole.add(block(doubled))
+    first.add(block(doubled[:4 * 120]))
+    second.add(block(doubled[4 * 120:]))
+    merged = ShardState.from_state(json.loads(json.dumps(first.to_state()))).merge(second)
+    assert merged.stats.to_json() == whole.stats.to_json()
+    for key in ShardState.MOMENT_KEYS:
+        assert merged.moments[key].n == whole.moments[key].n
+        assert merged.moments[key].mean == pytest.approx(whole.moments[key].mean)
+        assert merged.moments[key].variance() == pytest.approx(whole.moments[key].variance())
+
+
+def test_run_command_uses_worker_processes(tmp_path):
+    source = tmp_path / 'roster.csv'
+    source.write_bytes(roster())
+    output = tmp_path / 'out.jsonl'
+    assert sharding.main(['run', str(source), '-o', str(output), '--shards', '3', '--processes', '2', '-q']) == 0
+    assert strip(output.read_bytes()) == single_run(tmp_path, source)
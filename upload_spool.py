@@ -0,0 +1,113 @@
+"""
+IELTS Score Analyzer - Upload Spooling
+Large uploads go straight to a temp file on disk instead of RAM
+
+The multipart parser writes file parts above SPOOL_THRESHOLD into a named
+temp file, which roster readers can memory-map. The file is deleted when
+the request is closed, whether the handler succeeded or failed.
+
+Batch results go the same way: ResultSpool keeps serialized rows in a temp
+file, one per line, so a batch is streamed back and exported later without
+its rows ever being held in memory.
+"""
+
+import os
+import tempfile
+import time
+from io import BytesIO
+
+from flask import Request
+
+# Uploads up to this size stay in memory
+SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', str(1024 * 1024)))
+
+# Hard ceiling for a request body (Flask answers 413 above it)
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_MB', '2048')) * 1024 * 1024
+
+UPLOAD_TMP_DIR = os.getenv('UPLOAD_TMP_DIR') or tempfile.gettempdir()
+SPOOL_PREFIX = 'ielts-upload-'
+
+
+class SpoolingRequest(Request):
+    """Request whose file uploads are spooled to named temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= SPOOL_THRESHOLD:
+            return BytesIO()
+        # delete=True: removed as soon as request.close() closes the file
+        return tempfile.NamedTemporaryFile('wb+', prefix=SPOOL_PREFIX, dir=UPLOAD_TMP_DIR)
+
+
+class ResultSpool:
+    """
+    Serialized result rows in a temp file, one per line (compact JSON never
+    contains a raw newline). Written once, then read back any number of times.
+    """
+
+    def __init__(self):
+        # delete=False: readers reopen the file by name; close() removes it
+        self._file = tempfile.NamedTemporaryFile('wb', prefix=SPOOL_PREFIX, dir=UPLOAD_TMP_DIR, delete=False)
+        self.path = self._file.name
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def write(self, encoded):
+        """Append serialized rows (bytes, without newline)"""
+        file = self._file
+        for row in encoded:
+            file.write(row)
+            file.write(b'\n')
+            self.rows += 1
+
+    def __iter__(self):
+        """
+        The rows, in order. The file is opened here rather than on the first
+        row, so a close() after this call does not cut the read short.
+        """
+        self._file.flush()
+        return self._read(open(self.path, 'rb'))
+
+    @staticmethod
+    def _read(file):
+        with file:
+            for line in file:
+                yield line[:-1]
+
+    def close(self):
+        """Delete the file; open readers keep their data"""
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            # Still open for reading on Windows: cleanup_stale_uploads removes it later
+            pass
+
+
+def spooled_file(stream):
+    """The temp file behind an upload stream, or None when it is in memory"""
+    if isinstance(getattr(stream, 'name', None), str) and hasattr(stream, 'fileno'):
+        return stream
+    return None
+
+
+def cleanup_stale_uploads(max_age: float = 3600) -> int:
+    """Remove spool files left behind by a crashed process"""
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        entries = os.scandir(UPLOAD_TMP_DIR)
+    except OSError:
+        return 0
+    with entries:
+        for entry in entries:
+            if not entry.name.startswith(SPOOL_PREFIX):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed